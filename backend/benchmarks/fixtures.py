@@ -0,0 +1,127 @@
+"""Synthetic fixture data shared by the benchmarks."""
+import random
+
+SKILLS = ["Python", "Go", "Kubernetes", "PostgreSQL", "React", "Kafka", "AWS", "Redis", "FastAPI", "Terraform"]
+
+
+def resume_lines(seed: int, count: int) -> list[str]:
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(['Led', 'Built', 'Designed', 'Migrated', 'Scaled'])} a {rng.choice(SKILLS)} service "
+        f"handling {rng.randint(1, 900)}k requests per day for project {rng.randint(1000, 9999)}."
+        for _ in range(count)
+    ]
+
+
+def make_resume_pdf(seed: int = 0, pages: int = 3, lines_per_page: int = 45) -> bytes:
+    """Builds a small but valid multi-page PDF with extractable text."""
+    objects = []
+    page_ids = []
+    font_id = 3
+    next_id = 4
+    for page in range(pages):
+        lines = resume_lines(seed * 1000 + page, lines_per_page)
+        text_ops = "".join(
+            f"BT /F1 9 Tf 40 {800 - 16 * i} Td ({line}) Tj ET\n" for i, line in enumerate(lines)
+        ).encode()
+        content_id, page_id = next_id, next_id + 1
+        next_id += 2
+        objects.append((content_id, b"<< /Length %d >>\nstream\n" % len(text_ops) + text_ops + b"endstream"))
+        objects.append((
+            page_id,
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (font_id, content_id),
+        ))
+        page_ids.append(page_id)
+
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects = [
+        (1, b"<< /Type /Catalog /Pages 2 0 R >>"),
+        (2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))),
+        (font_id, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"),
+        *objects,
+    ]
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id, body in sorted(objects):
+        offsets[object_id] = len(out)
+        out += b"%d 0 obj\n" % object_id + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for object_id in sorted(offsets):
+        out += b"%010d 00000 n \n" % offsets[object_id]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(out)
+
+
+# Tone-coded speech: each vocabulary word is a sine tone at its own
+# frequency, so a stub transcriber can "recognize" words from any window of
+# the audio without a real ASR model.
+TONE_WORDS = {word: 300 + 40 * i for i, word in enumerate(
+    "i have spent five years building backend services in python and go mostly on "
+    "payments where latency and reliability matter a lot".split()
+)}
+SPEECH_SAMPLE_RATE = 16000
+
+
+def make_tone_speech(
+    words: list[str],
+    word_ms: int = 300,
+    gap_ms: int = 80,
+    lead_silence_ms: int = 500,
+    trail_silence_ms: int = 1200,
+    sample_rate: int = SPEECH_SAMPLE_RATE,
+    seed: int = 0,
+) -> bytes:
+    """Renders words as 16-bit mono PCM tones with low background noise."""
+    import math
+    from array import array
+
+    rng = random.Random(seed)
+    samples = array("h")
+
+    def silence(ms):
+        samples.extend(rng.randint(-60, 60) for _ in range(sample_rate * ms // 1000))
+
+    silence(lead_silence_ms)
+    for word in words:
+        frequency = TONE_WORDS[word]
+        count = sample_rate * word_ms // 1000
+        samples.extend(
+            int(6000 * math.sin(2 * math.pi * frequency * n / sample_rate)) + rng.randint(-60, 60)
+            for n in range(count)
+        )
+        silence(gap_ms)
+    silence(trail_silence_ms)
+    return samples.tobytes()
+
+
+def decode_tone_speech(pcm: bytes, word_ms: int = 300, sample_rate: int = SPEECH_SAMPLE_RATE) -> str:
+    """Inverse of make_tone_speech; words cut to under half their length are dropped."""
+    from array import array
+
+    samples = array("h")
+    samples.frombytes(pcm)
+    frame = sample_rate // 100  # 10 ms
+    frequencies = {frequency: word for word, frequency in TONE_WORDS.items()}
+    words, run = [], []
+
+    def flush():
+        if len(run) * 10 >= word_ms // 2:
+            crossings = sum(1 for a, b in zip(run_samples, run_samples[1:]) if (a < 0) != (b < 0))
+            estimate = crossings / 2 / (len(run_samples) / sample_rate)
+            words.append(frequencies[min(frequencies, key=lambda f: abs(f - estimate))])
+
+    run_samples: list[int] = []
+    for offset in range(0, len(samples) - frame + 1, frame):
+        chunk = samples[offset:offset + frame]
+        if max(abs(s) for s in chunk) > 1000:
+            run.append(offset)
+            run_samples.extend(chunk)
+        elif run:
+            flush()
+            run, run_samples = [], []
+    if run:
+        flush()
+    return " ".join(words)
@@ -0,0 +1,337 @@
+"""
+Load test: how many simultaneous interviews can one backend process carry?
+
+The FastAPI app is served in-process by uvicorn, with local stubs standing
+in for Groq Whisper, ChatGroq and ElevenLabs (see benchmarks/stubs.py). Each
+simulated candidate opens /ws/{client_id}, posts a fixture resume to
+/setup-interview, then speaks a number of turns. Every turn waits for the
+reply to finish playing plus some think time before the next one.
+
+    cd backend
+    python -m benchmarks.load_test --sessions 200 --turns 5
+    python -m benchmarks.load_test --sessions 100 --audio pcm     # paced 20 ms PCM frames, server-side VAD
+    python -m benchmarks.load_test --sessions 200 --protocol 2     # binary framing, see protocol.py
+    python -m benchmarks.load_test --sessions 300 --max-p95-ms 1500   # exit 1 if the gate fails
+
+Opening latency runs from posting /setup-interview to the first audio of the
+first question. Turn latency is the time from the end of the candidate's
+speech to the first byte of Alex's reply audio; reply latency runs to the "Alex:" transcript,
+i.e. until the LLM has finished. The event loop is shared by the server and
+the simulated clients, so its lag is an upper bound on the server's own.
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import os
+import resource
+import socket
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("ELEVENLABS_API_KEY", "benchmark")
+# Keep the run's transcripts out of the real log.
+scratch = tempfile.TemporaryDirectory()
+os.environ.setdefault("TRANSCRIPT_LOG_PATH", os.path.join(scratch.name, "interviews.db"))
+
+import httpx
+import uvicorn
+import websockets
+
+import protocol
+from benchmarks import stubs
+from benchmarks.fixtures import SKILLS, SPEECH_SAMPLE_RATE, TONE_WORDS, make_resume_pdf, make_tone_speech
+
+WORD_MS, GAP_MS, LEAD_MS, TRAIL_MS = 300, 80, 300, 1000
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # ru_maxrss is a peak, in KiB on Linux and bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def percentile(values: list[float], p: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else float("nan")
+    return statistics.quantiles(values, n=100, method="inclusive")[p - 1]
+
+
+class Results:
+    def __init__(self):
+        self.turn_latencies: list[float] = []
+        self.reply_latencies: list[float] = []
+        self.setup_latencies: list[float] = []
+        self.opening_latencies: list[float] = []
+        self.loop_lag: list[float] = []
+        self.errors: list[str] = []
+        self.turns = 0
+
+
+class Fixtures:
+    """Built once up front: generating them inside the run would show up as loop lag."""
+
+    def __init__(self, args):
+        self.words = list(TONE_WORDS)[: args.words]
+        self.pcm = make_tone_speech(self.words, WORD_MS, GAP_MS, LEAD_MS, TRAIL_MS) if args.audio == "pcm" else b""
+        self.speech_end = SPEECH_SAMPLE_RATE * (LEAD_MS + len(self.words) * (WORD_MS + GAP_MS) - GAP_MS) // 1000 * 2
+        self.blob = os.urandom(args.blob_kb * 1024)
+        self.resumes = [make_resume_pdf(seed, pages=2) for seed in range(8)]
+
+
+class Candidate:
+    def __init__(self, index: int, args, fixtures: Fixtures, base_url: str, ws_url: str, http: httpx.AsyncClient, results: Results):
+        self.client_id = f"load_{index}_{os.getpid()}"
+        self.index = index
+        self.args = args
+        self.fixtures = fixtures
+        self.base_url = base_url
+        self.ws_url = ws_url
+        self.http = http
+        self.results = results
+        self.inbox: asyncio.Queue = asyncio.Queue()
+
+    async def read(self, ws):
+        try:
+            async for message in ws:
+                self.inbox.put_nowait((time.perf_counter(), message))
+        except websockets.ConnectionClosed:
+            pass
+
+    def drain(self):
+        while not self.inbox.empty():
+            self.inbox.get_nowait()
+
+    async def wait_quiet(self, quiet: float):
+        """Waits until the server has sent nothing for `quiet` seconds."""
+        while True:
+            try:
+                await asyncio.wait_for(self.inbox.get(), quiet)
+            except asyncio.TimeoutError:
+                return
+
+    def events(self, message: bytes | str) -> list:
+        """A message's audio chunks (bytes) and control messages (dicts), in either protocol version."""
+        if isinstance(message, str):
+            return [json.loads(message)]
+        if self.args.protocol == protocol.LEGACY:
+            return [message]
+        events = []
+        for frame in protocol.parse(message):
+            if frame.type == protocol.AUDIO and frame.payload:
+                events.append(frame.payload)
+            elif frame.type == protocol.CONTROL:
+                events.append(json.loads(bytes(frame.payload)))
+        return events
+
+    async def wait_control(self, type: str):
+        while True:
+            _, message = await asyncio.wait_for(self.inbox.get(), self.args.turn_timeout)
+            if any(isinstance(event, dict) and event.get("type") == type for event in self.events(message)):
+                return
+
+    async def wait_audio(self) -> float:
+        """When the next audio frame arrived, skipping anything else."""
+        while True:
+            received_at, message = await asyncio.wait_for(self.inbox.get(), self.args.turn_timeout)
+            if any(not isinstance(event, dict) for event in self.events(message)):
+                return received_at
+
+    async def wait_reply(self, spoke_at: float):
+        # A short reply can finish generating before its first audio arrives.
+        first_audio = reply_done = None
+        deadline = time.perf_counter() + self.args.turn_timeout
+        while first_audio is None or reply_done is None:
+            received_at, message = await asyncio.wait_for(self.inbox.get(), max(0.0, deadline - time.perf_counter()))
+            for event in self.events(message):
+                if not isinstance(event, dict):
+                    first_audio = first_audio or received_at
+                elif event.get("data", "").startswith("Alex:"):
+                    reply_done = received_at
+        self.results.turn_latencies.append(first_audio - spoke_at)
+        self.results.reply_latencies.append(reply_done - spoke_at)
+
+    async def speak_blob(self, ws, blob: bytes) -> float:
+        # One complete utterance per frame, like the browser recorder.
+        await ws.send(blob)
+        return time.perf_counter()
+
+    async def speak_pcm(self, ws) -> float:
+        pcm, speech_end = self.fixtures.pcm, self.fixtures.speech_end
+        frame_bytes = SPEECH_SAMPLE_RATE * self.args.frame_ms // 1000 * 2
+        started = time.perf_counter()
+        spoke_at = started
+        for n, offset in enumerate(range(0, len(pcm), frame_bytes)):
+            # Paced against the wall clock so a lagging loop doesn't slow the candidate down.
+            await asyncio.sleep(max(0.0, started + n * self.args.frame_ms / 1000 - time.perf_counter()))
+            await ws.send(pcm[offset:offset + frame_bytes])
+            if offset <= speech_end < offset + frame_bytes:
+                spoke_at = time.perf_counter()
+        return spoke_at
+
+    async def run(self, start_delay: float):
+        await asyncio.sleep(start_delay)
+        resume = self.fixtures.resumes[self.index % len(self.fixtures.resumes)]
+
+        async with websockets.connect(f"{self.ws_url}/ws/{self.client_id}", max_size=None) as ws:
+            reader = asyncio.create_task(self.read(ws))
+            try:
+                if self.args.protocol != protocol.LEGACY:
+                    await ws.send(json.dumps({"type": "hello", "protocol": self.args.protocol}))
+                    await self.wait_control("hello")
+                if self.args.audio == "pcm":
+                    await ws.send(json.dumps({"type": "start_stream", "sample_rate": SPEECH_SAMPLE_RATE}))
+
+                start = time.perf_counter()
+                response = await self.http.post(
+                    f"{self.base_url}/setup-interview/{self.client_id}",
+                    files={"resume": ("resume.pdf", resume, "application/pdf")},
+                    data={"skills": ", ".join(SKILLS[: 3 + self.index % 5])},
+                )
+                body = response.json()
+                if body.get("status") != "success":
+                    raise RuntimeError(f"setup failed: {body}")
+                self.results.setup_latencies.append(time.perf_counter() - start)
+                self.results.opening_latencies.append(await self.wait_audio() - start)
+
+                for _ in range(self.args.turns):
+                    await self.wait_quiet(self.args.think_ms / 1000)
+                    self.drain()
+                    if self.args.audio == "pcm":
+                        spoke_at = await self.speak_pcm(ws)
+                    else:
+                        spoke_at = await self.speak_blob(ws, self.fixtures.blob)
+                    await self.wait_reply(spoke_at)
+                    self.results.turns += 1
+            finally:
+                reader.cancel()
+
+
+async def monitor_loop_lag(results: Results, interval: float = 0.01):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        results.loop_lag.append(time.perf_counter() - start - interval)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def run_load(args, results: Results) -> tuple[float, int, int]:
+    stubs.install(stubs.latencies_from_args(args))
+    fixtures = Fixtures(args)
+    from main import app
+    from connection_manager import manager
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", ws_max_size=16 * 1024 * 1024))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    base_url, ws_url = f"http://127.0.0.1:{port}", f"ws://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=args.sessions, max_keepalive_connections=args.sessions)
+    gc.collect()
+    rss_before = rss_bytes()
+    peak_sessions, peak_rss = 0, rss_before
+
+    async def sample_memory():
+        nonlocal peak_sessions, peak_rss
+        while True:
+            await asyncio.sleep(0.5)
+            if len(manager.active_connections) >= peak_sessions:
+                peak_sessions, peak_rss = len(manager.active_connections), rss_bytes()
+
+    async with httpx.AsyncClient(limits=limits, timeout=args.turn_timeout) as http:
+        candidates = [Candidate(i, args, fixtures, base_url, ws_url, http, results) for i in range(args.sessions)]
+        lag = asyncio.create_task(monitor_loop_lag(results))
+        memory = asyncio.create_task(sample_memory())
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(
+            *(c.run(args.ramp_s * i / args.sessions) for i, c in enumerate(candidates)), return_exceptions=True
+        )
+        elapsed = time.perf_counter() - start
+        lag.cancel()
+        memory.cancel()
+
+    results.errors = [f"{type(e).__name__}: {e}" for e in outcomes if isinstance(e, BaseException)]
+    server.should_exit = True
+    await serving
+    return elapsed, peak_sessions, peak_rss - rss_before
+
+
+async def main(args) -> int:
+    from interview_flow.state_manager import store
+
+    results = Results()
+    # The server prints a line or two per turn; keep only the report.
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+        elapsed, peak_sessions, rss_growth = await run_load(args, results)
+
+    report(args, results, elapsed, peak_sessions, rss_growth, await store.count())
+    if results.errors:
+        return 1
+    if args.max_p95_ms and percentile(results.turn_latencies, 95) * 1e3 > args.max_p95_ms:
+        print(f"FAIL: p95 turn latency above {args.max_p95_ms:.0f} ms")
+        return 1
+    return 0
+
+
+def report(args, results: Results, elapsed: float, peak_sessions: int, rss_growth: int, leftover_sessions: int):
+    def line(name: str, values: list[float]):
+        if not values:
+            print(f"{name:<22} no samples")
+            return
+        print(
+            f"{name:<22} p50 {percentile(values, 50) * 1e3:8.1f} ms   p95 {percentile(values, 95) * 1e3:8.1f} ms   "
+            f"p99 {percentile(values, 99) * 1e3:8.1f} ms   max {max(values) * 1e3:8.1f} ms   n={len(values)}"
+        )
+
+    print(f"{args.sessions} sessions x {args.turns} turns, {args.audio} audio, protocol v{args.protocol}, {elapsed:.1f} s")
+    line("setup", results.setup_latencies)
+    line("opening (first audio)", results.opening_latencies)
+    line("turn (first audio)", results.turn_latencies)
+    line("reply (LLM done)", results.reply_latencies)
+    line("event loop lag", results.loop_lag)
+    print(f"{'throughput':<22} {results.turns / elapsed:8.1f} turns/s")
+    if peak_sessions:
+        print(f"{'memory':<22} {rss_growth / peak_sessions / 1024:8.1f} KiB/session RSS at {peak_sessions} open sessions")
+    if leftover_sessions:
+        print(f"{'leaked sessions':<22} {leftover_sessions}")
+    for error in results.errors[:10]:
+        print(f"error: {error}")
+    if len(results.errors) > 10:
+        print(f"... {len(results.errors) - 10} more errors")
+
+
+def add_arguments(parser):
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--audio", choices=["blob", "pcm"], default="blob")
+    parser.add_argument("--protocol", type=int, choices=protocol.SUPPORTED_VERSIONS, default=protocol.LEGACY, help="WebSocket protocol version to negotiate")
+    parser.add_argument("--words", type=int, default=8, help="words per spoken turn in pcm mode")
+    parser.add_argument("--frame-ms", type=int, default=20, help="PCM frame size in pcm mode")
+    parser.add_argument("--blob-kb", type=int, default=48, help="utterance size in blob mode")
+    parser.add_argument("--think-ms", type=float, default=500, help="silence after Alex stops before the next turn")
+    parser.add_argument("--ramp-s", type=float, default=5.0, help="spread session starts over this many seconds")
+    parser.add_argument("--turn-timeout", type=float, default=60.0)
+    parser.add_argument("--max-p95-ms", type=float, default=0, help="exit 1 if p95 turn latency exceeds this")
+    parser.add_argument("--verbose", action="store_true", help="keep the server's own log output")
+    stubs.add_arguments(parser)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    sys.exit(asyncio.run(main(parser.parse_args())))
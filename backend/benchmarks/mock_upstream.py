@@ -0,0 +1,238 @@
+"""
+Local mock of the Groq and ElevenLabs HTTP APIs, and a harness that drives
+the real SDK clients against it through services/upstream.py.
+
+The mock injects latency, rate-limit and server errors, and occasional
+stalls, and records how many requests it saw in flight on each route, so
+the concurrency limits, retries, hedged transcriptions and turn deadlines
+can be checked offline:
+
+    cd backend
+    python -m benchmarks.mock_upstream --turns 300 --concurrency 100 --error-rate 0.1 --stall-rate 0.05
+    python -m benchmarks.mock_upstream --serve --port 8900   # then GROQ_BASE_URL=http://127.0.0.1:8900 ...
+
+Each simulated turn transcribes an utterance, streams an LLM reply and
+synthesizes it, all under one turn deadline. The mock's in-flight peak also
+counts requests the client has already abandoned (cancelled hedges, expired
+deadlines), so it can exceed the configured limit by that many.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+REPLY = "Thanks, that is helpful. Which part of that system would you redesign first, and why?"
+
+
+class MockUpstream:
+    def __init__(self, args):
+        self.args = args
+        self.in_flight: dict[str, int] = {}
+        self.peak: dict[str, int] = {}
+        self.requests: dict[str, int] = {}
+        self.app = FastAPI()
+        self.app.post("/openai/v1/audio/transcriptions")(self.transcriptions)
+        self.app.post("/openai/v1/chat/completions")(self.chat_completions)
+        self.app.post("/v1/text-to-speech/{voice_id}/stream")(self.text_to_speech)
+
+    def enter(self, route: str):
+        self.in_flight[route] = self.in_flight.get(route, 0) + 1
+        self.peak[route] = max(self.peak.get(route, 0), self.in_flight[route])
+        self.requests[route] = self.requests.get(route, 0) + 1
+
+    def leave(self, route: str):
+        self.in_flight[route] -= 1
+
+    def failure(self) -> Response | None:
+        roll = random.random()
+        if roll < self.args.error_rate / 2:
+            return JSONResponse({"error": {"message": "rate limited"}}, status_code=429, headers={"retry-after": "0.1"})
+        if roll < self.args.error_rate:
+            return JSONResponse({"error": {"message": "unavailable"}}, status_code=503)
+        return None
+
+    async def delay(self, ms: float):
+        if random.random() < self.args.stall_rate:
+            ms = self.args.stall_ms
+        await asyncio.sleep(ms * random.uniform(0.75, 1.25) / 1000)
+
+    async def transcriptions(self, request: Request):
+        form = await request.form()
+        self.enter("stt")
+        try:
+            await self.delay(self.args.stt_ms if "turbo" not in form.get("model", "") else self.args.stt_ms / 2)
+            return self.failure() or {"text": "I led the migration of our billing system to event sourcing."}
+        finally:
+            self.leave("stt")
+
+    async def chat_completions(self, request: Request):
+        body = await request.json()
+        self.enter("llm")
+        leaving = True
+        try:
+            await self.delay(self.args.llm_first_token_ms)
+            failed = self.failure()
+            if failed:
+                return failed
+            model = body.get("model", "mock")
+            if not body.get("stream"):
+                return {
+                    "id": "mock", "object": "chat.completion", "created": int(time.time()), "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": REPLY}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": 10, "completion_tokens": 20, "total_tokens": 30},
+                }
+
+            async def events():
+                try:
+                    for word in REPLY.split(" "):
+                        chunk = {
+                            "id": "mock", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                            "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+                        }
+                        yield f"data: {json.dumps(chunk)}\n\n"
+                        await asyncio.sleep(self.args.llm_token_ms / 1000)
+                    done = {
+                        "id": "mock", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                    }
+                    yield f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n"
+                finally:
+                    self.leave("llm")
+
+            leaving = False
+            return StreamingResponse(events(), media_type="text/event-stream")
+        finally:
+            if leaving:
+                self.leave("llm")
+
+    async def text_to_speech(self, voice_id: str, request: Request):
+        await request.json()
+        self.enter("tts")
+        leaving = True
+        try:
+            await self.delay(self.args.tts_first_chunk_ms)
+            failed = self.failure()
+            if failed:
+                return failed
+
+            async def audio():
+                try:
+                    for _ in range(4):
+                        yield bytes(4096)
+                        await asyncio.sleep(self.args.tts_chunk_ms / 1000)
+                finally:
+                    self.leave("tts")
+
+            leaving = False
+            return StreamingResponse(audio(), media_type="audio/mpeg")
+        finally:
+            if leaving:
+                self.leave("tts")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def serve(mock: MockUpstream, port: int):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(mock.app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    return server, task
+
+
+async def run_harness(args):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    # Settings are read at import, so point the clients at the mock first.
+    os.environ.update({
+        "GROQ_API_KEY": "mock", "ELEVENLABS_API_KEY": "mock",
+        "GROQ_BASE_URL": base_url, "ELEVENLABS_BASE_URL": base_url,
+        "TURN_BUDGET_SECONDS": str(args.turn_budget),
+    })
+    import metrics
+    from config import settings
+    from interview_flow.langchain_chain import llm
+    from services import upstream
+    from services.elevenlabs_service import stream_audio
+    from services.groq_service import speech_to_text
+
+    mock = MockUpstream(args)
+    server, serving = await serve(mock, port)
+    turn_times, failures = [], []
+    slots = asyncio.Semaphore(args.concurrency)
+
+    async def turn(i: int):
+        async with slots:
+            start = time.perf_counter()
+            try:
+                with upstream.deadline(settings.turn_budget_seconds):
+                    text = await speech_to_text(os.urandom(16 * 1024))
+                    reply = "".join([chunk.content async for chunk in llm.astream(text)])
+                    async for _ in stream_audio(reply):
+                        pass
+                turn_times.append(time.perf_counter() - start)
+            except Exception as e:
+                failures.append(f"{type(e).__name__}: {e}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(turn(i) for i in range(args.turns)))
+    elapsed = time.perf_counter() - start
+    server.should_exit = True
+    await serving
+    await upstream.aclose()
+
+    print(f"{args.turns} turns, {args.concurrency} concurrent, {elapsed:.1f} s, {len(turn_times) / elapsed:.1f} turns/s")
+    if turn_times:
+        quantiles = statistics.quantiles(turn_times, n=100, method="inclusive") if len(turn_times) > 1 else turn_times * 99
+        print(f"turn latency  p50 {quantiles[49] * 1e3:7.0f} ms   p95 {quantiles[94] * 1e3:7.0f} ms   failed {len(failures)}")
+    for name in upstream.limiters:
+        series = metrics.upstream_queue_seconds._series.get((name,))
+        queued = f"mean queue {series[1] / series[2] * 1e3:7.1f} ms" if series else "no requests"
+        outcomes = {labels[1]: int(count) for labels, count in metrics.upstream_requests._values.items() if labels[0] == name}
+        retries = int(metrics.upstream_retries._values.get((name,), 0))
+        hedges = int(metrics.upstream_hedges._values.get((name,), 0))
+        limit = getattr(settings, f"{name}_max_concurrency")
+        print(
+            f"{name:<4} {queued}   peak in flight at mock {mock.peak.get(name, 0):4d} (limit {limit})   "
+            f"requests {mock.requests.get(name, 0):5d}   retries {retries:4d}   hedges {hedges:4d}   outcomes {outcomes}"
+        )
+    for failure in failures[:5]:
+        print(f"failure: {failure}")
+
+
+async def serve_forever(args):
+    await serve(MockUpstream(args), args.port)
+    print(f"Mock upstream listening on http://127.0.0.1:{args.port}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--serve", action="store_true", help="only run the mock server")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--turn-budget", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.05, help="fraction of requests answered 429/503")
+    parser.add_argument("--stall-rate", type=float, default=0.02, help="fraction of requests that stall")
+    parser.add_argument("--stall-ms", type=float, default=4000)
+    parser.add_argument("--stt-ms", type=float, default=300)
+    parser.add_argument("--llm-first-token-ms", type=float, default=250)
+    parser.add_argument("--llm-token-ms", type=float, default=10)
+    parser.add_argument("--tts-first-chunk-ms", type=float, default=200)
+    parser.add_argument("--tts-chunk-ms", type=float, default=30)
+    args = parser.parse_args()
+    asyncio.run(serve_forever(args) if args.serve else run_harness(args))
@@ -0,0 +1,159 @@
+"""
+Load test across several worker processes sharing sessions and sockets
+through Redis, with WebSockets and /setup-interview on different workers.
+
+    cd backend
+    python -m benchmarks.multi_worker --workers 4 --sessions 200
+    python -m benchmarks.multi_worker --workers 2 --redis-url redis://localhost:6379/15   # a real Redis
+
+Each worker is its own process serving the app with the stubs from
+benchmarks/stubs.py, with SESSION_STORE=redis and CONNECTION_REGISTRY=redis.
+Unless --redis-url is given, Redis is a fakeredis server (the Redis protocol
+over TCP) started by this harness. Candidate i keeps its WebSocket on worker
+i mod N but posts /setup-interview to the next worker, like a load balancer
+without sticky HTTP routing would, so every first question reaches its
+candidate through the relay. A candidate that never hears it fails the run.
+
+Takes the same options as benchmarks.load_test.
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks import load_test, stubs
+from benchmarks.load_test import Candidate, Fixtures, Results, free_port, monitor_loop_lag, report
+
+RELAY_RE = re.compile(r'^interview_relay_frames_total\{outcome="(\w+)"\} ([0-9.e+]+)$', re.M)
+
+
+def serve_redis(port: int):
+    from fakeredis import TcpFakeServer
+
+    server = TcpFakeServer(("127.0.0.1", port), server_type="redis")
+    server.serve_forever()
+
+
+def serve_worker(port: int, args):
+    import uvicorn
+
+    stubs.install(stubs.latencies_from_args(args))
+    from main import app
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+        uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", ws_max_size=16 * 1024 * 1024)
+
+
+async def wait_ready(http: httpx.AsyncClient, url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if (await http.get(url)).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{url} did not come up")
+        await asyncio.sleep(0.2)
+
+
+async def relay_counts(http: httpx.AsyncClient, ports: list[int]) -> dict[str, int]:
+    counts: dict[str, int] = {}
+    for port in ports:
+        text = (await http.get(f"http://127.0.0.1:{port}/metrics")).text
+        for outcome, value in RELAY_RE.findall(text):
+            counts[outcome] = counts.get(outcome, 0) + int(float(value))
+    return counts
+
+
+async def run(args) -> int:
+    scratch = tempfile.TemporaryDirectory()
+    children: list[subprocess.Popen] = []
+    redis_url = args.redis_url
+    if not redis_url:
+        redis_port = free_port()
+        children.append(subprocess.Popen([sys.executable, "-m", "benchmarks.multi_worker", "--serve-redis", str(redis_port)]))
+        redis_url = f"redis://127.0.0.1:{redis_port}/0"
+    env = {
+        **os.environ,
+        "GROQ_API_KEY": "benchmark",
+        "ELEVENLABS_API_KEY": "benchmark",
+        "SESSION_STORE": "redis",
+        "CONNECTION_REGISTRY": "redis",
+        "REDIS_URL": redis_url,
+        "TRANSCRIPT_LOG_PATH": os.path.join(scratch.name, "interviews.db"),
+    }
+    ports = [free_port() for _ in range(args.workers)]
+    for port in ports:
+        children.append(subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.multi_worker", "--serve-worker", str(port), *sys.argv[1:]], env=env,
+        ))
+
+    results = Results()
+    fixtures = Fixtures(args)
+    try:
+        limits = httpx.Limits(max_connections=args.sessions, max_keepalive_connections=args.sessions)
+        async with httpx.AsyncClient(limits=limits, timeout=args.turn_timeout) as http:
+            await asyncio.gather(*(wait_ready(http, f"http://127.0.0.1:{port}/metrics") for port in ports))
+            candidates = []
+            for i in range(args.sessions):
+                ws_port = ports[i % len(ports)]
+                setup_port = ports[(i + args.setup_offset) % len(ports)]
+                candidates.append(Candidate(
+                    i, args, fixtures, f"http://127.0.0.1:{setup_port}", f"ws://127.0.0.1:{ws_port}", http, results,
+                ))
+            lag = asyncio.create_task(monitor_loop_lag(results))
+            start = time.perf_counter()
+            outcomes = await asyncio.gather(
+                *(c.run(args.ramp_s * i / args.sessions) for i, c in enumerate(candidates)), return_exceptions=True
+            )
+            elapsed = time.perf_counter() - start
+            lag.cancel()
+            relayed = await relay_counts(http, ports)
+    finally:
+        for child in reversed(children):
+            child.terminate()
+        for child in children:
+            try:
+                child.wait(10)
+            except subprocess.TimeoutExpired:
+                child.kill()
+        scratch.cleanup()
+
+    results.errors = [f"{type(e).__name__}: {e}" for e in outcomes if isinstance(e, BaseException)]
+    print(f"{args.workers} workers, Redis at {redis_url}{'' if args.redis_url else ' (fakeredis)'}")
+    report(args, results, elapsed, 0, 0, 0)
+    print(f"{'relayed frames':<22} {relayed}")
+    if results.errors:
+        return 1
+    if args.max_p95_ms and load_test.percentile(results.turn_latencies, 95) * 1e3 > args.max_p95_ms:
+        print(f"FAIL: p95 turn latency above {args.max_p95_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    load_test.add_arguments(parser)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--redis-url", help="use this Redis instead of a fakeredis server")
+    parser.add_argument(
+        "--setup-offset", type=int, default=1,
+        help="post /setup-interview to worker i + offset (0 keeps it on the socket's worker)",
+    )
+    parser.add_argument("--serve-worker", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    parser.add_argument("--serve-redis", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve_redis:
+        serve_redis(args.serve_redis)
+    elif args.serve_worker:
+        serve_worker(args.serve_worker, args)
+    else:
+        sys.exit(asyncio.run(run(args)))
@@ -0,0 +1,159 @@
+"""
+How long candidates wait for the interview to start and for each new phase
+to open, with and without speculative pre-generation.
+
+    cd backend
+    python -m benchmarks.phase_transitions --sessions 20
+    python -m benchmarks.phase_transitions --llm-first-token-ms 600 --llm-token-ms 30
+
+The app is served in-process with the stubs from benchmarks/stubs.py. The
+stub interviewer ends every answer to the candidate with its phase's end
+token, so each candidate walks through every phase in as many turns. Both
+modes run in the same process, one after the other.
+
+"opening" is measured on the server: the time from the transition line
+being queued to the first audio of the next phase's opening question. With
+speculation it is usually already synthesized by then. "turn" is measured
+on the client: from the end of the candidate's answer until the opening
+question has finished arriving. "setup" is the /setup-interview request,
+which now generates the first question while the resume is parsed.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("ELEVENLABS_API_KEY", "benchmark")
+scratch = tempfile.TemporaryDirectory()
+os.environ.setdefault("TRANSCRIPT_LOG_PATH", os.path.join(scratch.name, "interviews.db"))
+
+import httpx
+import uvicorn
+import websockets
+
+from benchmarks import stubs
+from benchmarks.fixtures import SKILLS, make_resume_pdf
+from benchmarks.load_test import free_port
+
+PHASE_RE = re.compile(r"You are in the (\w+) phase")
+
+
+class PhaseEndingChatModel(stubs.StubChatModel):
+    """Answers to the candidate end the phase; opening lines don't."""
+
+    def _reply(self, messages) -> str:
+        from interview_flow.prompt_factory import PHASE_OPENING_INPUTS
+
+        reply = super()._reply(messages)
+        phase = PHASE_RE.search(messages[0].content)
+        if phase and phase.group(1) != "FEEDBACK" and messages[-1].content not in PHASE_OPENING_INPUTS.values():
+            reply += f" [END_{phase.group(1)}]"
+        return reply
+
+
+def summary(values: list[float]) -> str:
+    if not values:
+        return "no samples"
+    p95 = statistics.quantiles(values, n=20)[18] if len(values) > 1 else values[0]
+    return f"p50 {statistics.median(values) * 1e3:7.1f} ms   p95 {p95 * 1e3:7.1f} ms   n={len(values)}"
+
+
+async def candidate(index: int, mode: str, args, base_url: str, ws_url: str, http: httpx.AsyncClient, results: dict):
+    client_id = f"phases_{mode}_{index}"
+    inbox: asyncio.Queue = asyncio.Queue()
+
+    async def read(ws):
+        with contextlib.suppress(websockets.ConnectionClosed):
+            async for message in ws:
+                inbox.put_nowait(message)
+
+    async def wait_quiet() -> float:
+        """When the last message arrived before `quiet_ms` of silence."""
+        last = time.perf_counter()
+        while True:
+            try:
+                await asyncio.wait_for(inbox.get(), args.quiet_ms / 1000)
+                last = time.perf_counter()
+            except asyncio.TimeoutError:
+                return last
+
+    async with websockets.connect(f"{ws_url}/ws/{client_id}", max_size=None) as ws:
+        reader = asyncio.create_task(read(ws))
+        try:
+            start = time.perf_counter()
+            response = await http.post(
+                f"{base_url}/setup-interview/{client_id}",
+                files={"resume": ("resume.pdf", make_resume_pdf(index, pages=2), "application/pdf")},
+                data={"skills": ", ".join(SKILLS[:4])},
+            )
+            if response.json().get("status") != "success":
+                raise RuntimeError(f"setup failed: {response.json()}")
+            results["setup"].append(time.perf_counter() - start)
+            await wait_quiet()
+            # BEHAVIORAL, TECHNICAL, CODING and CONCLUSION each end after one answer.
+            for _ in range(4):
+                spoke_at = time.perf_counter()
+                await ws.send(os.urandom(2048))
+                results["turn"].append(await wait_quiet() - spoke_at)
+        finally:
+            reader.cancel()
+
+
+async def run(args) -> int:
+    stubs.install(stubs.latencies_from_args(args))
+    from interview_flow import langchain_chain
+
+    latencies = stubs.latencies_from_args(args)
+    langchain_chain.llm = PhaseEndingChatModel(first_token=latencies.llm_first_token, per_token=latencies.llm_per_token)
+    import metrics
+    from interview_flow.speculation import speculator
+    from main import app
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    report = {}
+    async with httpx.AsyncClient(timeout=60) as http:
+        for mode, enabled in (("live", False), ("speculative", True)):
+            speculator.enabled = enabled
+            metrics.recent_spans.clear()
+            results = {"setup": [], "turn": []}
+            await asyncio.gather(*(
+                candidate(i, mode, args, f"http://127.0.0.1:{port}", f"ws://127.0.0.1:{port}", http, results)
+                for i in range(args.sessions)
+            ))
+            results["opening"] = [
+                seconds for _, stage, phase, _, seconds in metrics.recent_spans
+                if stage == "phase_opening" and phase != "BEHAVIORAL"
+            ]
+            report[mode] = results
+
+    server.should_exit = True
+    await serving
+    outcomes = {labels[0]: int(count) for labels, count in metrics.speculations._values.items()}
+    for mode, results in report.items():
+        for name in ("setup", "opening", "turn"):
+            print(f"{mode:<12} {name:<8} {summary(results[name])}", file=sys.__stdout__)
+    print(f"speculations {outcomes}", file=sys.__stdout__)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--quiet-ms", type=float, default=1500, help="silence that ends a turn")
+    parser.add_argument("--verbose", action="store_true", help="show the server's log")
+    stubs.add_arguments(parser)
+    args = parser.parse_args()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+        sys.exit(asyncio.run(run(args)))
@@ -0,0 +1,102 @@
+"""
+Per-turn CPU cost of building the prompt and chain, before and after the
+per-phase chain cache.
+
+"rebuild" reproduces the previous path: render the system prompt for the
+session, compile a new ChatPromptTemplate from the rendered text and
+compose a new runnable pipeline on every turn. "cached" looks up the
+phase chain compiled at startup and only fills in template variables.
+Both run the chain end to end against a stub chat model, for many
+simulated sessions in parallel:
+
+    cd backend
+    python -m benchmarks.prompt_chain_build --sessions 500 --turns 4
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("ELEVENLABS_API_KEY", "benchmark")
+
+from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain.schema.output_parser import StrOutputParser
+from langchain.schema.runnable import RunnablePassthrough
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from interview_flow import langchain_chain
+from interview_flow.prompt_factory import get_system_prompt
+from models.session import InterviewSession, InterviewPhase
+
+PHASES = [InterviewPhase.BEHAVIORAL, InterviewPhase.TECHNICAL, InterviewPhase.CODING, InterviewPhase.CONCLUSION]
+SKILLS = ["Python", "Go", "Kubernetes", "PostgreSQL", "React", "Kafka", "AWS", "Redis"]
+
+
+def make_session(i: int) -> InterviewSession:
+    rng = random.Random(i)
+    resume = " ".join(f"Worked on project {rng.randint(0, 10**6)} using {rng.choice(SKILLS)}." for _ in range(150))
+    session = InterviewSession(
+        phase=rng.choice(PHASES),
+        resume_text=resume,
+        skills=rng.sample(SKILLS, 3),
+        target_role="Senior Backend Engineer",
+    )
+    for turn in range(3):
+        session.chat_memory.save_context({"input": f"answer {turn}"}, {"output": f"question {turn}"})
+    return session
+
+
+def rebuild_chain(session: InterviewSession):
+    system_prompt = get_system_prompt(session)
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", system_prompt),
+        MessagesPlaceholder(variable_name="history"),
+        ("human", "{input}"),
+    ])
+    memory = session.chat_memory
+    chain = (
+        RunnablePassthrough.assign(history=lambda x: memory.load_memory_variables(x)["history"])
+        | prompt
+        | langchain_chain.llm
+        | StrOutputParser()
+    )
+    return chain, {"input": "Here is my answer."}
+
+
+def cached_chain(session: InterviewSession):
+    return langchain_chain.get_phase_chain(session.phase), langchain_chain.chain_inputs(session, "Here is my answer.")
+
+
+async def run(build, sessions, turns: int) -> float:
+    async def one(session):
+        for _ in range(turns):
+            chain, inputs = build(session)
+            await chain.ainvoke(inputs)
+
+    start = time.process_time()
+    # The cached chains log their prompt size every turn; keep that cost but not the output.
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*(one(session) for session in sessions))
+    return time.process_time() - start
+
+
+async def main(args):
+    langchain_chain.llm = FakeListChatModel(responses=["Good answer. Next question?"])
+    langchain_chain.build_phase_chains()
+    sessions = [make_session(i) for i in range(args.sessions)]
+    total_turns = args.sessions * args.turns
+
+    for name, build in (("rebuild every turn", rebuild_chain), ("cached per phase", cached_chain)):
+        cpu = await run(build, sessions, args.turns)
+        print(f"{name:<20} {cpu / total_turns * 1e6:9.1f} us CPU/turn   ({total_turns} turns, {args.sessions} sessions)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--turns", type=int, default=4)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,83 @@
+"""
+Event-loop lag while several resumes are being parsed at once.
+
+A ticker coroutine wakes up every --tick-ms and records how late it was;
+that lateness is what every other connected candidate experiences as
+stalled audio. Three modes are compared:
+
+- inline:  the old path, parse_resume called directly in the handler
+- pool:    parse_resume_async with distinct files (process pool)
+- cached:  parse_resume_async re-uploading files that were seen before
+
+    cd backend
+    python -m benchmarks.resume_upload_lag --uploads 16 --pages 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("ELEVENLABS_API_KEY", "benchmark")
+
+from benchmarks.fixtures import make_resume_pdf
+from services import resume_parser
+
+
+async def measure_lag(work, tick: float) -> tuple[float, list[float]]:
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            expected = time.perf_counter() + tick
+            await asyncio.sleep(tick)
+            lags.append(max(0.0, time.perf_counter() - expected))
+
+    ticker_task = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticker_task
+    return elapsed, lags
+
+
+async def main(args):
+    files = [make_resume_pdf(seed, pages=args.pages) for seed in range(args.uploads)]
+
+    async def inline_upload(data):
+        # The old handler awaited the upload and then parsed synchronously.
+        await asyncio.sleep(0)
+        resume_parser.parse_resume(data, "resume.pdf")
+
+    async def pool_upload(data):
+        await resume_parser.parse_resume_async(data, "resume.pdf")
+
+    # Start the worker processes up front so the pool numbers don't include
+    # interpreter start-up.
+    await asyncio.gather(*(
+        asyncio.get_running_loop().run_in_executor(resume_parser.get_executor(), time.sleep, 0.01)
+        for _ in range(resume_parser.settings.resume_parser_workers)
+    ))
+
+    modes = (("inline", inline_upload), ("pool", pool_upload), ("cached", pool_upload))
+    for name, upload in modes:
+        elapsed, lags = await measure_lag(
+            lambda: asyncio.gather(*(upload(data) for data in files)), args.tick_ms / 1000
+        )
+        lags = lags or [0.0]
+        print(
+            f"{name:<7} {args.uploads} uploads in {elapsed * 1000:8.1f} ms   "
+            f"loop lag max {max(lags) * 1000:8.1f} ms   median {statistics.median(lags) * 1000:6.1f} ms"
+        )
+    resume_parser.shutdown_executor()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=16)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--tick-ms", type=float, default=5.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,130 @@
+"""
+Offline harness for server-side VAD and windowed streaming ASR.
+
+Audio is fed to StreamingTranscriber in small frames, paced like a live
+microphone. A local stub transcriber stands in for Whisper. Its latency
+grows with the length of the audio it is given, and on the tone-coded
+fixture it returns the exact words, so stitching can be checked.
+
+For each utterance the harness reports the transcript, whether it matches
+the script, and the turn latency: the time from end-of-speech to the final
+transcript. That is compared with transcribing the whole utterance after
+end-of-speech, which is what the blob-per-utterance path does. Any
+mismatch makes the exit status non-zero.
+
+    cd backend
+    python -m benchmarks.streaming_asr_harness --realtime
+    python -m benchmarks.streaming_asr_harness --wav recording.wav   # 16 kHz mono 16-bit
+"""
+import argparse
+import asyncio
+import time
+import wave
+
+from benchmarks.fixtures import SPEECH_SAMPLE_RATE, decode_tone_speech, make_tone_speech
+from services.streaming_asr import StreamingTranscriber
+from services.vad import EnergyVAD
+
+SCRIPTS = [
+    "i have spent five years building backend services in python and go",
+    "mostly on payments where latency and reliability matter a lot",
+    "i have spent five years building backend services in python and go mostly on payments where latency "
+    "and reliability matter a lot and i have spent five years building backend services",
+]
+
+
+class StubTranscriber:
+    def __init__(self, base_latency: float, per_second: float, decode):
+        self.base_latency = base_latency
+        self.per_second = per_second
+        self.decode = decode
+        self.calls = 0
+
+    async def __call__(self, pcm: bytes) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.base_latency + self.per_second * len(pcm) / 2 / SPEECH_SAMPLE_RATE)
+        return self.decode(pcm)
+
+
+async def run_streaming(pcm: bytes, args, transcriber) -> tuple[list[str], list[float]]:
+    streaming = StreamingTranscriber(
+        transcriber, window_s=args.window, overlap_s=args.overlap,
+        vad=EnergyVAD(end_silence_ms=args.end_silence_ms),
+    )
+    frame_bytes = SPEECH_SAMPLE_RATE * args.frame_ms // 1000 * 2
+    transcripts, latencies = [], []
+    for offset in range(0, len(pcm), frame_bytes):
+        if args.realtime:
+            await asyncio.sleep(args.frame_ms / 1000)
+        was_speaking = streaming.vad.in_speech
+        frame_start = time.perf_counter()
+        results = await streaming.feed(pcm[offset:offset + frame_bytes])
+        if was_speaking and results:
+            latencies.append(time.perf_counter() - frame_start)
+            transcripts.extend(results)
+    return transcripts, latencies
+
+
+async def run_whole(pcm: bytes, args, transcriber) -> tuple[list[str], list[float]]:
+    """Baseline: the same VAD, but the full utterance is transcribed at end-of-speech."""
+    vad = EnergyVAD(end_silence_ms=args.end_silence_ms)
+    frame_bytes = SPEECH_SAMPLE_RATE * args.frame_ms // 1000 * 2
+    transcripts, latencies, start = [], [], None
+    for offset in range(0, len(pcm), frame_bytes):
+        if args.realtime:
+            await asyncio.sleep(args.frame_ms / 1000)
+        for event, position in vad.process(pcm[offset:offset + frame_bytes]):
+            if event == "start":
+                start = position
+            elif event == "end" and start is not None:
+                began = time.perf_counter()
+                transcripts.append(await transcriber(pcm[start:position]))
+                latencies.append(time.perf_counter() - began)
+    return transcripts, latencies
+
+
+def load_wav(path: str) -> bytes:
+    with wave.open(path, "rb") as f:
+        if f.getnchannels() != 1 or f.getsampwidth() != 2 or f.getframerate() != SPEECH_SAMPLE_RATE:
+            raise SystemExit("Expected a 16 kHz mono 16-bit WAV file.")
+        return f.readframes(f.getnframes())
+
+
+async def main(args):
+    if args.wav:
+        # A real recording can't be decoded by the stub; report word-count
+        # placeholders and focus on VAD and latency.
+        cases = [(load_wav(args.wav), None)]
+        decode = lambda pcm: " ".join(f"w{i}" for i in range(len(pcm) // (SPEECH_SAMPLE_RATE // 2)))
+    else:
+        cases = [(make_tone_speech(script.split(), seed=i), script) for i, script in enumerate(SCRIPTS)]
+        decode = decode_tone_speech
+
+    mismatches = 0
+    for pcm, script in cases:
+        seconds = len(pcm) / 2 / SPEECH_SAMPLE_RATE
+        for name, run in (("whole utterance", run_whole), ("streaming windows", run_streaming)):
+            transcriber = StubTranscriber(args.stt_base, args.stt_per_second, decode)
+            transcripts, latencies = await run(pcm, args, transcriber)
+            text = " ".join(transcripts)
+            verdict = "" if script is None else ("  OK" if text == script else "  MISMATCH")
+            latency = f"{max(latencies) * 1000:7.1f} ms" if latencies else "    n/a"
+            print(f"{seconds:5.1f}s audio  {name:<18} turn latency {latency}  {transcriber.calls} STT calls{verdict}")
+            if script is not None and text != script:
+                mismatches += 1
+                print(f"    expected: {script}\n    got:      {text}")
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wav", help="recorded 16 kHz mono 16-bit WAV to use instead of the tone fixture")
+    parser.add_argument("--frame-ms", type=int, default=40)
+    parser.add_argument("--window", type=float, default=4.0)
+    parser.add_argument("--overlap", type=float, default=0.75)
+    parser.add_argument("--end-silence-ms", type=int, default=600)
+    parser.add_argument("--stt-base", type=float, default=0.15, help="stub STT fixed latency (s)")
+    parser.add_argument("--stt-per-second", type=float, default=0.08, help="stub STT latency per audio second (s)")
+    parser.add_argument("--realtime", action="store_true", help="pace frames like a live microphone")
+    if asyncio.run(main(parser.parse_args())):
+        raise SystemExit(1)
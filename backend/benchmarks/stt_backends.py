@@ -0,0 +1,113 @@
+"""
+Throughput and latency of the speech-to-text backends under concurrent
+utterances from many sessions.
+
+    cd backend
+    python -m benchmarks.stt_backends                          # groq (stubbed) vs simulated local, batched and not
+    python -m benchmarks.stt_backends --local-model tiny.en    # also the real faster-whisper backend (pip install faster-whisper)
+
+"groq" is GroqSTT with the Groq client replaced by a stub with network-like
+latency, so it measures our side plus that latency. "simulated" runs the
+local backend's MicroBatcher with a synthetic batch cost model (a fixed
+cost per batch plus a smaller cost per utterance, releasing the GIL like
+CTranslate2), with and without batching. The real local backend runs when
+--local-model is given and faster-whisper is installed. It transcribes the
+tone-coded fixture speech, so its transcripts are meaningless, but its
+timings are real.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("ELEVENLABS_API_KEY", "benchmark")
+
+from benchmarks import stubs
+from benchmarks.fixtures import TONE_WORDS, make_tone_speech
+from services import groq_service
+from services.streaming_asr import pcm_to_wav
+from services.stt import GroqSTT, LocalWhisperSTT, MicroBatcher
+
+
+class SimulatedLocal:
+    def __init__(self, batch_ms: float, per_item_ms: float, workers: int, max_batch: int, window_ms: float):
+        self.batch_s = batch_ms / 1000
+        self.per_item_s = per_item_ms / 1000
+        self.batcher = MicroBatcher(self.run_batch, workers=workers, max_batch=max_batch, window=window_ms / 1000)
+
+    def run_batch(self, items: list) -> list[str]:
+        time.sleep(self.batch_s + self.per_item_s * len(items))
+        return ["simulated"] * len(items)
+
+    async def transcribe(self, audio: bytes, filename: str = "audio.wav") -> str:
+        return await self.batcher.submit((audio, filename))
+
+    def close(self):
+        self.batcher.close()
+
+
+async def measure(backend, audio: bytes, concurrency: int, utterances: int) -> tuple[float, list[float]]:
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with slots:
+            start = time.perf_counter()
+            await backend.transcribe(audio, "audio.wav")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(utterances)))
+    return time.perf_counter() - start, latencies
+
+
+async def main(args):
+    audio = pcm_to_wav(make_tone_speech(list(TONE_WORDS)[:8], lead_silence_ms=200, trail_silence_ms=200))
+    groq_service.client = stubs.StubGroq(stubs.Latency(args.groq_ms / 1000, args.groq_ms / 1000 * 0.25), "stub")
+
+    backends = {
+        "groq (stubbed network)": lambda: GroqSTT(),
+        "simulated, no batching": lambda: SimulatedLocal(args.batch_ms, args.per_item_ms, args.workers, 1, 0),
+        "simulated, batched": lambda: SimulatedLocal(args.batch_ms, args.per_item_ms, args.workers, args.max_batch, args.window_ms),
+    }
+    if args.local_model:
+        try:
+            import faster_whisper  # noqa: F401
+        except ImportError:
+            print("faster-whisper is not installed; skipping the real local backend.")
+        else:
+            for max_batch in (1, args.max_batch):
+                backends[f"local {args.local_model}, max_batch {max_batch}"] = (
+                    lambda max_batch=max_batch: LocalWhisperSTT(args.local_model, workers=args.workers, max_batch=max_batch)
+                )
+
+    print(f"{len(audio) / 32000:.1f} s utterances, {args.utterances} per run")
+    for name, build in backends.items():
+        backend = build()
+        if isinstance(backend, LocalWhisperSTT):
+            await backend.start()
+            await backend.transcribe(audio, "audio.wav")  # warm up
+        for concurrency in args.concurrency:
+            elapsed, latencies = await measure(backend, audio, concurrency, args.utterances)
+            print(
+                f"{name:<34} concurrency {concurrency:4d}   {args.utterances / elapsed:8.1f} utt/s   "
+                f"p50 {statistics.median(latencies) * 1e3:8.1f} ms   "
+                f"p95 {statistics.quantiles(latencies, n=20)[18] * 1e3:8.1f} ms"
+            )
+        backend.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--utterances", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--groq-ms", type=float, default=350, help="stubbed Groq round trip")
+    parser.add_argument("--batch-ms", type=float, default=120, help="simulated fixed cost of one model call")
+    parser.add_argument("--per-item-ms", type=float, default=25, help="simulated extra cost per batched utterance")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--window-ms", type=float, default=20)
+    parser.add_argument("--local-model", help="faster-whisper model to benchmark, e.g. tiny.en or base.en")
+    asyncio.run(main(parser.parse_args()))
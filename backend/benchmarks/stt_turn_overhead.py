@@ -0,0 +1,88 @@
+"""
+Per-turn overhead of handing a received WebSocket audio frame to
+speech_to_text, comparing the old temp-file round trip (aiofiles write,
+read back, os.remove) with the in-memory path.
+
+The Groq client is replaced by a stub that returns immediately, so only the
+server-side overhead is measured:
+
+    cd backend
+    python -m benchmarks.stt_turn_overhead --turns 2000 --concurrency 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("ELEVENLABS_API_KEY", "benchmark")
+
+import aiofiles
+
+from services import groq_service
+
+
+class StubTranscriptions:
+    async def create(self, file, model):
+        filename, audio = file
+        return type("Transcription", (), {"text": f"{len(audio)} bytes"})()
+
+
+class StubGroq:
+    def __init__(self):
+        self.audio = type("Audio", (), {"transcriptions": StubTranscriptions()})()
+
+
+async def old_turn(data: bytes, client_id: str, upload_dir: str):
+    audio_path = os.path.join(upload_dir, f"{client_id}_audio.webm")
+    async with aiofiles.open(audio_path, "wb") as f:
+        await f.write(data)
+    async with aiofiles.open(audio_path, "rb") as f:
+        audio_data = await f.read()
+    await groq_service.client.audio.transcriptions.create(file=(audio_path, audio_data), model="whisper-large-v3")
+    os.remove(audio_path)
+
+
+async def new_turn(data: bytes, client_id: str, upload_dir: str):
+    await groq_service.speech_to_text(data)
+
+
+async def run(turn, args, frame: bytes, upload_dir: str) -> list[float]:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    timings = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            # Unique ids: the old path races when two turns share a client_id.
+            await turn(frame, f"client_{i}", upload_dir)
+            timings.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(args.turns)))
+    return timings
+
+
+async def main(args):
+    groq_service.client = StubGroq()
+    frame = os.urandom(args.frame_kb * 1024)
+
+    with tempfile.TemporaryDirectory() as upload_dir:
+        for name, turn in (("temp file round trip", old_turn), ("in-memory buffer", new_turn)):
+            start = time.perf_counter()
+            timings = await run(turn, args, frame, upload_dir)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{name:<22} median {statistics.median(timings) * 1e3:8.3f} ms/turn   "
+                f"p99 {statistics.quantiles(timings, n=100)[98] * 1e3:8.3f} ms   "
+                f"{args.turns / elapsed:9.0f} turns/s"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--frame-kb", type=int, default=64, help="size of one utterance blob")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,153 @@
+"""
+Local stand-ins for Groq Whisper, ChatGroq and ElevenLabs, with configurable
+latency and jitter, so the whole backend can be exercised offline.
+
+Call install() before the app starts: the phase chains are compiled at
+startup from langchain_chain.llm.
+"""
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterator
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain.schema.output_parser import StrOutputParser
+
+REPLIES = [
+    "Thanks for walking me through that. What was the hardest trade-off you had to make on that project, "
+    "and how did you decide?",
+    "That makes sense. How did you measure whether the change actually improved things for your users?",
+    "Interesting. Can you tell me about a time a production incident forced you to rethink your design?",
+    "Got it. If you had to build that again today, what would you do differently and why?",
+]
+
+
+@dataclass
+class Latency:
+    """A delay of `base` seconds plus uniform jitter of up to `jitter` seconds."""
+
+    base: float
+    jitter: float = 0.0
+
+    def sample(self) -> float:
+        return max(0.0, self.base + random.uniform(-self.jitter, self.jitter))
+
+    async def sleep(self):
+        delay = self.sample()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+@dataclass
+class StubLatencies:
+    stt: Latency
+    llm_first_token: Latency
+    llm_per_token: Latency
+    tts_first_chunk: Latency
+    tts_per_chunk: Latency
+    tts_chunks: int = 4
+    tts_chunk_bytes: int = 4096
+
+
+class StubTranscriptions:
+    def __init__(self, latency: Latency, text: str):
+        self.latency = latency
+        self.text = text
+
+    async def create(self, file, model):
+        await self.latency.sleep()
+        return type("Transcription", (), {"text": self.text})()
+
+
+class StubGroq:
+    def __init__(self, latency: Latency, text: str):
+        self.audio = type("Audio", (), {"transcriptions": StubTranscriptions(latency, text)})()
+
+
+class StubChatModel(BaseChatModel):
+    """Streams a canned interviewer reply word by word."""
+
+    first_token: Latency
+    per_token: Latency
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _reply(self, messages: list[BaseMessage]) -> str:
+        return REPLIES[len(messages) % len(REPLIES)]
+
+    def _generate(self, messages, stop=None, run_manager: CallbackManagerForLLMRun | None = None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(messages)))])
+
+    async def _agenerate(self, messages, stop=None, run_manager: AsyncCallbackManagerForLLMRun | None = None, **kwargs) -> ChatResult:
+        text = "".join([chunk.text async for chunk in self._astream(messages)])
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        for word in self._reply(messages).split(" "):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+
+    async def _astream(
+        self, messages, stop=None, run_manager: AsyncCallbackManagerForLLMRun | None = None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await self.first_token.sleep()
+        for i, word in enumerate(self._reply(messages).split(" ")):
+            if i:
+                await self.per_token.sleep()
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+def stub_tts(latencies: StubLatencies):
+    async def stream_audio(text: str, *args, **kwargs):
+        await latencies.tts_first_chunk.sleep()
+        for i in range(latencies.tts_chunks):
+            if i:
+                await latencies.tts_per_chunk.sleep()
+            yield bytes(latencies.tts_chunk_bytes)
+    return stream_audio
+
+
+def install(latencies: StubLatencies, transcript: str = "I built a payments service in Go and scaled it to a million users."):
+    """Replaces every upstream client the backend talks to."""
+    from config import settings
+    from interview_flow import langchain_chain
+    from services import groq_service, tts_cache
+
+    groq_service.client = StubGroq(latencies.stt, transcript)
+    langchain_chain.llm = StubChatModel(first_token=latencies.llm_first_token, per_token=latencies.llm_per_token)
+    langchain_chain.summary_chain = langchain_chain.summary_prompt | langchain_chain.llm | StrOutputParser()
+    langchain_chain.phase_chains.clear()
+    tts_cache.stream_audio = stub_tts(latencies)
+    # There is nothing to connect to.
+    settings.upstream_prewarm = False
+
+
+def add_arguments(parser):
+    """Latency knobs shared by the benchmarks that run the full backend, in milliseconds."""
+    group = parser.add_argument_group("stub latencies (ms)")
+    group.add_argument("--stt-ms", type=float, default=300)
+    group.add_argument("--llm-first-token-ms", type=float, default=250)
+    group.add_argument("--llm-token-ms", type=float, default=15)
+    group.add_argument("--tts-first-chunk-ms", type=float, default=200)
+    group.add_argument("--tts-chunk-ms", type=float, default=40)
+    group.add_argument("--jitter", type=float, default=0.25, help="jitter as a fraction of each latency")
+
+
+def latencies_from_args(args) -> StubLatencies:
+    def latency(ms: float) -> Latency:
+        return Latency(ms / 1000, ms / 1000 * args.jitter)
+
+    return StubLatencies(
+        stt=latency(args.stt_ms),
+        llm_first_token=latency(args.llm_first_token_ms),
+        llm_per_token=latency(args.llm_token_ms),
+        tts_first_chunk=latency(args.tts_first_chunk_ms),
+        tts_per_chunk=latency(args.tts_chunk_ms),
+    )
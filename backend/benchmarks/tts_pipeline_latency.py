@@ -0,0 +1,106 @@
+"""
+Time-to-first-audio for a single interviewer reply, comparing the old
+"generate everything, then synthesize everything" path with the
+sentence-pipelined path in interview_flow.streaming.
+
+The LLM and TTS clients are local stubs with configurable latency, so this
+runs offline:
+
+    cd backend
+    python -m benchmarks.tts_pipeline_latency --runs 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from interview_flow.streaming import PHASE_TOKEN_RE, SentenceSplitter, iter_sentences, stream_speech
+
+REPLY = (
+    "Thanks, that's a really clear overview of your background. "
+    "I noticed you led the migration of a monolith to microservices at your last company. "
+    "Could you walk me through the biggest technical risk in that project and how you mitigated it? "
+    "[END_BEHAVIORAL]"
+)
+
+
+class StubLLM:
+    """Emits the reply word by word after a time-to-first-token delay."""
+
+    def __init__(self, ttft: float, per_token: float):
+        self.ttft = ttft
+        self.per_token = per_token
+
+    async def astream(self, text: str):
+        await asyncio.sleep(self.ttft)
+        for word in text.split(" "):
+            await asyncio.sleep(self.per_token)
+            yield word + " "
+
+    async def ainvoke(self, text: str) -> str:
+        return "".join([token async for token in self.astream(text)])
+
+
+class StubTTS:
+    """Yields MP3-sized chunks after a connection/startup delay."""
+
+    def __init__(self, startup: float, per_chunk: float, chars_per_chunk: int = 40):
+        self.startup = startup
+        self.per_chunk = per_chunk
+        self.chars_per_chunk = chars_per_chunk
+
+    async def stream(self, text: str):
+        await asyncio.sleep(self.startup)
+        for _ in range(max(1, len(text) // self.chars_per_chunk)):
+            await asyncio.sleep(self.per_chunk)
+            yield "audio", b"\xff" * 4096
+
+
+async def old_path(llm: StubLLM, tts: StubTTS) -> tuple[float, float]:
+    start = time.perf_counter()
+    first_audio = None
+    response = await llm.ainvoke(REPLY)
+    response = PHASE_TOKEN_RE.sub("", response).strip()
+    async for _ in tts.stream(response):
+        if first_audio is None:
+            first_audio = time.perf_counter() - start
+    return first_audio, time.perf_counter() - start
+
+
+async def pipelined_path(llm: StubLLM, tts: StubTTS) -> tuple[float, float]:
+    start = time.perf_counter()
+    first_audio = None
+
+    async def emit(stream_type, data):
+        nonlocal first_audio
+        if first_audio is None:
+            first_audio = time.perf_counter() - start
+
+    await stream_speech(iter_sentences(llm.astream(REPLY), SentenceSplitter()), tts.stream, emit)
+    return first_audio, time.perf_counter() - start
+
+
+async def main(args):
+    llm = StubLLM(args.llm_ttft, args.llm_per_token)
+    tts = StubTTS(args.tts_startup, args.tts_per_chunk)
+
+    for name, path in (("old (ainvoke + one TTS call)", old_path), ("pipelined (astream + per-sentence TTS)", pipelined_path)):
+        firsts, totals = [], []
+        for _ in range(args.runs):
+            first, total = await path(llm, tts)
+            firsts.append(first)
+            totals.append(total)
+        print(
+            f"{name:<40} time-to-first-audio {statistics.median(firsts) * 1000:7.1f} ms   "
+            f"last audio {statistics.median(totals) * 1000:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--llm-ttft", type=float, default=0.25, help="seconds before the first LLM token")
+    parser.add_argument("--llm-per-token", type=float, default=0.02, help="seconds between LLM tokens")
+    parser.add_argument("--tts-startup", type=float, default=0.35, help="seconds before the first TTS chunk")
+    parser.add_argument("--tts-per-chunk", type=float, default=0.03, help="seconds between TTS chunks")
+    asyncio.run(main(parser.parse_args()))
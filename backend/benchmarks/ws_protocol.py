@@ -0,0 +1,140 @@
+"""
+Server-side cost of the candidate WebSocket's outbound path, in the legacy
+format (version 1) and the binary framing (version 2, see protocol.py).
+
+    cd backend
+    python -m benchmarks.ws_protocol --sessions 200 --utterances 20
+    python -m benchmarks.ws_protocol --send-delay-ms 2     # a client that can't keep up
+
+Each session is a real Connection behind a ConnectionManager, writing to a
+stand-in socket that only counts what it is given. A session speaks a
+number of utterances, each a transcript message followed by its MP3 chunks
+(memoryview slices of one buffer, like cached TTS audio) and, in version 2,
+an end-of-utterance frame. With --send-delay-ms the socket takes that long
+per message, so queued chunks get coalesced.
+
+Reported per version: wall time, audio throughput, messages handed to the
+socket and framing overhead; then what the client spends taking version 2
+messages apart, and JSON encoding with the standard library and with orjson
+(protocol.dumps uses orjson when it is installed).
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import timeit
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("ELEVENLABS_API_KEY", "benchmark")
+
+import protocol
+from connection_manager import ConnectionManager
+from connection_registry import LocalRegistry
+
+
+class CountingSocket:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.messages: list[bytes | str] = []
+        self.bytes = 0
+
+    async def accept(self):
+        pass
+
+    async def send_bytes(self, data: bytes):
+        self.messages.append(data)
+        self.bytes += len(data)
+        await asyncio.sleep(self.delay)
+
+    async def send_text(self, data: str):
+        self.messages.append(data)
+        self.bytes += len(data.encode())
+        await asyncio.sleep(self.delay)
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+async def session(manager: ConnectionManager, client_id: str, version: int, audio: memoryview, args) -> CountingSocket:
+    socket = CountingSocket(args.send_delay_ms / 1000)
+    await manager.connect(socket, client_id)
+    manager.negotiate(client_id, version)
+    chunk = args.chunk_kb * 1024
+    for _ in range(args.utterances):
+        utterance = manager.utterance(client_id)
+        await manager.send_json({"type": "transcript", "data": "Alex: " + "word " * 40, "utterance": utterance.id}, client_id)
+        for offset in range(0, len(audio), chunk):
+            await utterance.audio(audio[offset:offset + chunk])
+            # TTS chunks arrive over the network, not all at once.
+            await asyncio.sleep(0)
+        await utterance.end()
+    await manager.drain(client_id)
+    await manager.disconnect(client_id)
+    return socket
+
+
+async def measure(version: int, audio: memoryview, args) -> tuple[float, list[CountingSocket]]:
+    manager = ConnectionManager(LocalRegistry())
+    start = time.perf_counter()
+    sockets = await asyncio.gather(*(session(manager, f"bench_{i}", version, audio, args) for i in range(args.sessions)))
+    return time.perf_counter() - start, sockets
+
+
+def client_decode(messages: list[bytes | str]) -> int:
+    """Takes version 2 messages apart the way a client would; returns the audio bytes found."""
+    audio = 0
+    for message in messages:
+        if isinstance(message, str):
+            json.loads(message)
+            continue
+        for frame in protocol.parse(message):
+            if frame.type == protocol.AUDIO:
+                audio += len(frame.payload)
+            else:
+                json.loads(bytes(frame.payload))
+    return audio
+
+
+async def main(args):
+    audio = memoryview(os.urandom(args.audio_kb * 1024))
+    audio_total = len(audio) * args.utterances * args.sessions
+    print(
+        f"{args.sessions} sessions x {args.utterances} utterances of {args.audio_kb} KiB "
+        f"in {args.chunk_kb} KiB chunks, {args.send_delay_ms} ms per send"
+    )
+    for version in protocol.SUPPORTED_VERSIONS:
+        elapsed, sockets = await measure(version, audio, args)
+        messages = sum(len(socket.messages) for socket in sockets)
+        sent = sum(socket.bytes for socket in sockets)
+        print(
+            f"v{version}  {elapsed:7.2f} s   {audio_total / elapsed / 2**20:8.1f} MiB/s audio   "
+            f"{messages:8d} messages   {(sent - audio_total) / messages:6.1f} bytes overhead/message"
+        )
+        if version == protocol.BINARY:
+            messages = [message for socket in sockets for message in socket.messages]
+            start = time.perf_counter()
+            found = client_decode(messages)
+            elapsed = time.perf_counter() - start
+            assert found == audio_total, (found, audio_total)
+            print(f"v{version}  client parse {elapsed / len(messages) * 1e6:6.2f} us/message")
+
+    message = {"type": "transcript", "data": "Alex: " + "word " * 40, "utterance": 123456789}
+    runs = 100_000
+    stdlib = timeit.timeit(lambda: json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode(), number=runs)
+    print(f"json.dumps      {stdlib / runs * 1e6:6.2f} us/message")
+    if protocol.orjson is not None:
+        fast = timeit.timeit(lambda: protocol.orjson.dumps(message), number=runs)
+        print(f"orjson.dumps    {fast / runs * 1e6:6.2f} us/message")
+    else:
+        print("orjson.dumps    not installed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--utterances", type=int, default=20)
+    parser.add_argument("--audio-kb", type=int, default=64, help="MP3 bytes per utterance (64 KiB is about 4 s)")
+    parser.add_argument("--chunk-kb", type=int, default=4, help="size of one TTS chunk")
+    parser.add_argument("--send-delay-ms", type=float, default=0, help="time the socket takes per message")
+    asyncio.run(main(parser.parse_args()))
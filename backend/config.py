@@ -4,7 +4,95 @@ class Settings(BaseSettings):
     groq_api_key: str
     elevenlabs_api_key: str
 
+    # Session storage: "memory" keeps sessions in this process, "redis"
+    # shares them between uvicorn workers.
+    session_store: str = "memory"
+    redis_url: str = "redis://localhost:6379/0"
+    # Which worker holds each WebSocket: "local" for a single worker, "redis"
+    # to relay frames to the owning worker (use with session_store=redis).
+    connection_registry: str = "local"
+    connection_registry_ttl_seconds: int = 60
+    session_ttl_seconds: int = 3600
+    max_sessions: int = 10000
+
+    resume_parser_workers: int = 2
+    resume_cache_size: int = 256
+
+    # Outbound WebSocket queue, per connection. When it is full, audio frames
+    # are handled by send_queue_policy: "block" (wait for the client),
+    # "drop_oldest", "drop_newest" or "disconnect".
+    send_queue_max_frames: int = 512
+    send_queue_policy: str = "block"
+    send_coalesce_bytes: int = 32768
+    send_late_after_ms: int = 500
+
+    # Cache for synthesized fixed phrases. Setting tts_cache_dir adds an
+    # on-disk tier that survives restarts.
+    tts_cache_max_bytes: int = 32 * 1024 * 1024
+    tts_cache_dir: str | None = None
+
+    # Streaming speech-to-text (clients that send raw PCM frames)
+    asr_window_seconds: float = 4.0
+    asr_overlap_seconds: float = 0.75
+    vad_end_silence_ms: int = 600
+
+    # Upstream APIs (Groq, ElevenLabs). The base URLs can point at a local
+    # mock server. Concurrency and rate limits apply per upstream: "stt",
+    # "llm" and "tts"; a requests_per_second of 0 means no rate limit.
+    groq_base_url: str | None = None
+    elevenlabs_base_url: str | None = None
+    upstream_http2: bool = True
+    upstream_max_connections: int = 100
+    upstream_max_keepalive: int = 20
+    upstream_connect_timeout: float = 5.0
+    upstream_read_timeout: float = 30.0
+    upstream_max_retries: int = 2
+    upstream_backoff_base_ms: int = 200
+    upstream_backoff_cap_ms: int = 2000
+    stt_max_concurrency: int = 16
+    stt_requests_per_second: float = 0
+    llm_max_concurrency: int = 32
+    llm_requests_per_second: float = 0
+    tts_max_concurrency: int = 8
+    tts_requests_per_second: float = 0
+    # Whisper model, and the one raced against it when a transcription is
+    # slow (after stt_hedge_after_ms) or fails. Empty disables hedging.
+    stt_model: str = "whisper-large-v3"
+    stt_hedge_model: str = "whisper-large-v3-turbo"
+    stt_hedge_after_ms: int = 1500
+    # Every upstream call made for one turn shares this deadline.
+    turn_budget_seconds: float = 30.0
+
+    # Speech-to-text backend: "groq" (hosted Whisper) or "local"
+    # (faster-whisper on this machine's CPU, pip install faster-whisper).
+    stt_backend: str = "groq"
+    local_stt_model: str = "base.en"
+    local_stt_device: str = "cpu"
+    local_stt_compute_type: str = "int8"
+    local_stt_language: str = "en"
+    local_stt_workers: int = 2
+    local_stt_cpu_threads: int = 0
+    local_stt_max_batch: int = 8
+    local_stt_batch_window_ms: int = 20
+
+    # Append-only SQLite log of interview turns and session snapshots,
+    # written in the background; reconnecting clients are restored from it.
+    transcript_log_path: str = "interviews.db"
+    transcript_flush_interval_ms: int = 500
+    transcript_flush_max_batch: int = 256
+    # Feedback re-scored offline from the transcript log
+    # (python -m interview_flow.batch_eval), cached by conversation and prompt.
+    feedback_cache_path: str = "feedback_cache.db"
+
+    # Alex's first line in a phase is generated (and synthesized) while the
+    # previous reply is still playing. At startup, connections to the
+    # upstream APIs are opened before the first candidate arrives.
+    speculation_enabled: bool = True
+    speculation_synthesize: bool = True
+    upstream_prewarm: bool = True
+    startup_warmup_timeout_seconds: float = 5.0
+
     class Config:
         env_file = ".env"
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -1,23 +1,414 @@
+import asyncio
+import time
+from collections import deque
+from typing import Callable
+
 from fastapi import WebSocket
 
+from config import settings
+from connection_registry import ConnectionRegistry, build_connection_registry
+import metrics
+import protocol
+from services.elevenlabs_service import OUTPUT_BYTES_PER_MS
+
+# Queue entries, rendered for the connection's protocol version when sent:
+# AUDIO is (header, MP3 chunk), FRAME is any other (type, header, payload)
+# frame, CONTROL is a JSON-encoded message. HELLO switches the protocol
+# version after answering the client's hello. MARK entries are not sent;
+# their callback runs once every frame queued before them has been written
+# to the socket.
+AUDIO, FRAME, CONTROL, HELLO, MARK = "audio", "frame", "control", "hello", "mark"
+
+class Connection:
+    """
+    One client socket with a bounded outbound queue drained by a writer task.
+    Producers (TTS, LLM) only enqueue, so a slow client doesn't stall them.
+    """
+
+    def __init__(self, client_id: str, websocket: WebSocket, max_frames: int, policy: str, coalesce_bytes: int, late_after: float):
+        self.client_id = client_id
+        self.websocket = websocket
+        self.max_frames = max_frames
+        self.policy = policy
+        self.coalesce_bytes = coalesce_bytes
+        self.late_after = late_after
+        self.frames: deque[tuple[str, object, float]] = deque()
+        self.not_empty = asyncio.Event()
+        self.not_full = asyncio.Event()
+        self.not_full.set()
+        self.drained = asyncio.Event()
+        self.drained.set()
+        self.closed = False
+        self.sending = False
+        self.protocol = protocol.LEGACY
+        # Frames can be queued before the socket is accepted; they go out once start() is called.
+        self.writer: asyncio.Task | None = None
+
+    def start(self):
+        self.writer = asyncio.create_task(self._write_loop())
+
+    def _update_events(self):
+        depth = len(self.frames)
+        if depth:
+            self.not_empty.set()
+            self.drained.clear()
+        else:
+            self.not_empty.clear()
+        if depth < self.max_frames:
+            self.not_full.set()
+        else:
+            self.not_full.clear()
+
+    def _drop_oldest_audio(self) -> bool:
+        for i, frame in enumerate(self.frames):
+            if frame[0] == AUDIO:
+                del self.frames[i]
+                return True
+        return False
+
+    async def put(self, kind: str, data):
+        if self.closed:
+            return
+        # Control messages (transcripts, visemes) are never dropped; the
+        # overflow policy only applies to audio.
+        if kind == AUDIO and len(self.frames) >= self.max_frames:
+            if self.policy == "block":
+                while len(self.frames) >= self.max_frames and not self.closed:
+                    await self.not_full.wait()
+            elif self.policy == "drop_newest":
+                metrics.send_frames_dropped.inc()
+                return
+            elif self.policy == "drop_oldest":
+                metrics.send_frames_dropped.inc()
+                if not self._drop_oldest_audio():
+                    # Nothing older to drop (the queue is all control
+                    # messages); drop this frame instead.
+                    return
+            elif self.policy == "disconnect":
+                print(f"[{self.client_id}] Send queue full, closing slow connection.")
+                self.close()
+                await self.websocket.close(code=1013)
+                return
+            if self.closed:
+                return
+        self.frames.append((kind, data, time.monotonic()))
+        self._update_events()
+
+    def hello(self, version: int):
+        """
+        Queues the switch to a protocol version. Frames queued before it
+        still go out in the version they were queued for.
+        """
+        if self.closed:
+            return
+        self.frames.append((HELLO, version, time.monotonic()))
+        self._update_events()
+
+    def _render(self, kind: str, data) -> bytes | str | None:
+        """The message for a queue entry in this connection's protocol version (None: nothing to send)."""
+        binary = self.protocol == protocol.BINARY
+        if kind == AUDIO:
+            # The client is behind: coalesce the queued MP3 chunks into one
+            # larger message instead of paying per-message overhead for each.
+            parts = [*data] if binary else [data[1]]
+            size = len(data[1])
+            coalesced = 0
+            while self.frames and self.frames[0][0] == AUDIO and size + len(self.frames[0][1][1]) <= self.coalesce_bytes:
+                head, payload = self.frames.popleft()[1]
+                size += len(payload)
+                parts += (head, payload) if binary else (payload,)
+                coalesced += 1
+            if coalesced:
+                metrics.send_frames_coalesced.inc(coalesced)
+            # One copy, straight out of the (often memory-mapped) payloads;
+            # ASGI servers expect bytes for binary messages.
+            return b"".join(parts)
+        if kind == CONTROL:
+            return b"".join((protocol.header(protocol.CONTROL, 0, 0, 0, len(data)), data)) if binary else data.decode()
+        if kind == FRAME:
+            type, head, payload = data
+            if binary:
+                return b"".join((head, payload))
+            if type == protocol.VISEME:
+                return '{"type":"viseme","data":' + bytes(payload).decode() + "}"
+        return None
+
+    def _next_frame(self) -> tuple[str, object, float]:
+        kind, data, enqueued_at = self.frames.popleft()
+        if kind in (MARK, HELLO):
+            return kind, data, enqueued_at
+        return kind, self._render(kind, data), enqueued_at
+
+    async def _write_loop(self):
+        try:
+            while True:
+                await self.not_empty.wait()
+                kind, data, enqueued_at = self._next_frame()
+                self._update_events()
+                if kind in (HELLO, MARK) or data is None:
+                    if kind == HELLO:
+                        # Answered in the old version; everything after it uses the new one.
+                        await self.websocket.send_text(protocol.dumps({"type": "hello", "protocol": data}).decode())
+                        self.protocol = data
+                    elif kind == MARK:
+                        data()
+                    if not self.frames:
+                        self.drained.set()
+                    continue
+                started = time.monotonic()
+                if started - enqueued_at > self.late_after:
+                    metrics.send_frames_late.inc()
+                self.sending = True
+                if isinstance(data, str):
+                    await self.websocket.send_text(data)
+                else:
+                    await self.websocket.send_bytes(data)
+                self.sending = False
+                metrics.observe("ws_send", time.monotonic() - started, self.client_id)
+                if not self.frames:
+                    self.drained.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The socket is gone; the receive loop will notice and clean up.
+            print(f"[{self.client_id}] Error writing to WebSocket: {e}")
+            self.close()
+
+    def clear_audio(self):
+        """
+        Drops all queued audio, e.g. when the reply is no longer wanted,
+        with the visemes that went with it. Marks are dropped too, since the
+        audio they vouch for won't be sent.
+        """
+        kept = [frame for frame in self.frames if frame[0] not in (AUDIO, FRAME, MARK)]
+        dropped = sum(1 for frame in self.frames if frame[0] == AUDIO)
+        metrics.send_frames_dropped.inc(dropped)
+        self.frames = deque(kept)
+        self._update_events()
+        if not self.frames and not self.sending:
+            self.drained.set()
+
+    def close(self):
+        self.closed = True
+        self.frames.clear()
+        self.drained.set()
+        # Wake producers blocked on a full queue.
+        self.not_full.set()
+        if self.writer is not None and self.writer is not asyncio.current_task():
+            self.writer.cancel()
+
+class Utterance:
+    """
+    One line of Alex's speech. Its frames share an utterance id and are
+    numbered in order; audio timestamps are the playback offset of each
+    chunk at the constant output bitrate.
+
+    The server can't see the client's playback, so it is estimated: the
+    client starts playing an utterance when its first chunk has been
+    written (or when the previous utterance ends, if that is later) and
+    plays in real time from there. Sentences marked with mark() count as
+    heard once the estimate has passed their end.
+    """
+
+    def __init__(self, manager: "ConnectionManager", client_id: str):
+        self.manager = manager
+        self.client_id = client_id
+        self.id = protocol.new_utterance_id()
+        self.seq = 0
+        self.audio_bytes = 0
+        # Estimated playback start (monotonic), once audio has been sent.
+        self.starts_at: float | None = None
+        # Where playback was cut off by a barge-in.
+        self.stopped_ms: float | None = None
+        self.sentences: list[tuple[int, str]] = []
+
+    def _header(self, type: int, timestamp_ms: int, length: int, flags: int = 0) -> bytes:
+        self.seq += 1
+        return protocol.header(type, self.id, self.seq, timestamp_ms, length, flags)
+
+    @property
+    def elapsed_ms(self) -> int:
+        return int(self.audio_bytes / OUTPUT_BYTES_PER_MS)
+
+    @property
+    def ends_at(self) -> float:
+        return (self.starts_at or time.monotonic()) + self.elapsed_ms / 1000
+
+    @property
+    def played_ms(self) -> float:
+        if self.stopped_ms is not None:
+            return self.stopped_ms
+        if self.starts_at is None:
+            return 0
+        return min(self.elapsed_ms, max(0.0, (time.monotonic() - self.starts_at) * 1000))
+
+    @property
+    def playing(self) -> bool:
+        """Whether the client may still be playing (or yet to play) some of it."""
+        return self.starts_at is not None and self.played_ms < self.elapsed_ms
+
+    @property
+    def text(self) -> str:
+        return " ".join(sentence for _, sentence in self.sentences)
+
+    def played_text(self) -> str:
+        played = self.played_ms
+        return " ".join(sentence for end_ms, sentence in self.sentences if end_ms <= played)
+
+    def mark(self, sentence: str):
+        """Notes that the audio sent so far ends with `sentence`."""
+        self.sentences.append((self.elapsed_ms, sentence))
+
+    async def audio(self, chunk: bytes | memoryview):
+        head = self._header(protocol.AUDIO, self.elapsed_ms, len(chunk))
+        self.audio_bytes += len(chunk)
+        first = self.starts_at is None
+        if first:
+            self.manager._start_playback(self)
+        await self.manager.send_frame(protocol.AUDIO, head, chunk, self.client_id)
+        if first:
+            await self.manager.on_sent(lambda: self.manager._start_playback(self), self.client_id)
+
+    async def viseme(self, data: dict):
+        payload = protocol.dumps(data)
+        head = self._header(protocol.VISEME, self.elapsed_ms, len(payload))
+        await self.manager.send_frame(protocol.VISEME, head, payload, self.client_id)
+
+    async def end(self):
+        """Marks the end of the utterance's audio (version 2 only)."""
+        head = self._header(protocol.AUDIO, self.elapsed_ms, 0, protocol.FLAG_END)
+        await self.manager.send_frame(protocol.AUDIO, head, b"", self.client_id)
+
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: dict[str, WebSocket] = {}
+    """
+    The sockets of this worker. Frames for a client whose socket is held by
+    another worker are relayed to it through the connection registry.
+    """
+
+    def __init__(self, registry: ConnectionRegistry):
+        self.registry = registry
+        self.active_connections: dict[str, Connection] = {}
+        # client_id -> utterances the client may still be playing, in order.
+        self.playback: dict[str, list[Utterance]] = {}
+
+    async def start(self):
+        await self.registry.start(self._deliver)
+
+    async def close(self):
+        await self.registry.close()
 
     async def connect(self, websocket: WebSocket, client_id: str):
-        await websocket.accept()
-        self.active_connections[client_id] = websocket
+        connection = Connection(
+            client_id,
+            websocket,
+            max_frames=settings.send_queue_max_frames,
+            policy=settings.send_queue_policy,
+            coalesce_bytes=settings.send_coalesce_bytes,
+            late_after=settings.send_late_after_ms / 1000,
+        )
+        # Registered before the handshake completes: other workers may relay
+        # frames as soon as the client knows it is connected.
+        self.active_connections[client_id] = connection
+        try:
+            await self.registry.register(client_id)
+            await websocket.accept()
+        except BaseException:
+            await self.disconnect(client_id)
+            raise
+        connection.start()
 
-    def disconnect(self, client_id: str):
+    async def disconnect(self, client_id: str):
+        self.playback.pop(client_id, None)
         if client_id in self.active_connections:
-            del self.active_connections[client_id]
+            self.active_connections.pop(client_id).close()
+            await self.registry.unregister(client_id)
+
+    async def _deliver(self, client_id: str, kind: str, payload: bytes):
+        if client_id not in self.active_connections:
+            return
+        if kind == CONTROL:
+            await self.active_connections[client_id].put(CONTROL, payload)
+        else:
+            view = memoryview(payload)
+            head, body = view[:protocol.HEADER.size], view[protocol.HEADER.size:]
+            await self._put_frame(self.active_connections[client_id], head[0], head, body)
+
+    async def _put_frame(self, connection: Connection, type: int, head: bytes, payload: bytes | memoryview):
+        if type == protocol.AUDIO and len(payload):
+            await connection.put(AUDIO, (head, payload))
+        else:
+            await connection.put(FRAME, (type, head, payload))
+
+    def utterance(self, client_id: str) -> Utterance:
+        return Utterance(self, client_id)
 
-    async def send_text(self, message: str, client_id: str):
+    def _start_playback(self, utterance: Utterance):
+        """(Re)estimates when the client starts playing `utterance`: now, or after what it is still playing."""
+        now = time.monotonic()
+        queue = self.playback.setdefault(utterance.client_id, [])
+        queue[:] = [other for other in queue if other is not utterance and other.ends_at > now]
+        if utterance.stopped_ms is None:
+            utterance.starts_at = max([now, *(other.ends_at for other in queue)])
+            queue.append(utterance)
+
+    async def stop_speaking(self, client_id: str) -> list[Utterance]:
+        """
+        Barge-in: drops the audio still queued for the client and, if it may
+        still be playing some, tells it to flush. Returns the utterances that
+        were cut short, with their playback position frozen.
+        """
+        cut = []
+        for utterance in self.playback.pop(client_id, []):
+            if utterance.playing:
+                utterance.stopped_ms = utterance.played_ms
+                cut.append(utterance)
+        self.clear_audio(client_id)
+        if cut:
+            await self.send_json({"type": "flush", "utterance": cut[0].id}, client_id)
+        return cut
+
+    def negotiate(self, client_id: str, requested) -> int:
+        """Handles the client's hello; returns the protocol version it will get."""
+        version = protocol.negotiate(requested)
+        if client_id in self.active_connections:
+            self.active_connections[client_id].hello(version)
+        return version
+
+    async def send_json(self, message: dict, client_id: str):
+        """A control message, encoded once whichever protocol version the client speaks."""
+        payload = protocol.dumps(message)
+        if client_id in self.active_connections:
+            await self.active_connections[client_id].put(CONTROL, payload)
+        else:
+            await self.registry.forward(client_id, CONTROL, payload)
+
+    async def send_frame(self, type: int, head: bytes, payload: bytes | memoryview, client_id: str):
         if client_id in self.active_connections:
-            await self.active_connections[client_id].send_text(message)
+            await self._put_frame(self.active_connections[client_id], type, head, payload)
+        else:
+            await self.registry.forward(client_id, FRAME, b"".join((head, payload)))
 
-    async def send_bytes(self, data: bytes, client_id: str):
+    async def on_sent(self, callback: Callable[[], None], client_id: str):
+        """
+        Runs `callback` once everything queued so far has been sent. For a
+        socket on another worker, once it has been handed to that worker.
+        """
         if client_id in self.active_connections:
-            await self.active_connections[client_id].send_bytes(data)
+            await self.active_connections[client_id].put(MARK, callback)
+        else:
+            callback()
+
+    async def drain(self, client_id: str):
+        """Waits until everything queued for the client has been written."""
+        if client_id in self.active_connections:
+            await self.active_connections[client_id].drained.wait()
+
+    def clear_audio(self, client_id: str):
+        if client_id in self.active_connections:
+            self.active_connections[client_id].clear_audio()
+
+    def queue_depths(self) -> list[int]:
+        """Frames waiting in each connection's send queue."""
+        return [len(connection.frames) for connection in self.active_connections.values()]
 
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager(build_connection_registry(settings))
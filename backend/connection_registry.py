@@ -0,0 +1,203 @@
+import asyncio
+import os
+import socket
+import time
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable
+from uuid import uuid4
+
+import metrics
+
+# Frames handed to the owning worker; see ConnectionManager for their meaning.
+KIND_CODES = {"frame": 0, "control": 1}
+KINDS = {code: kind for kind, code in KIND_CODES.items()}
+
+Deliver = Callable[[str, str, bytes], Awaitable[None]]
+
+
+def encode_frame(client_id: str, kind: str, payload: bytes) -> bytes:
+    return bytes((KIND_CODES[kind],)) + client_id.encode() + b"\0" + payload
+
+
+def decode_frame(message: bytes) -> tuple[str, str, bytes]:
+    end = message.index(b"\0", 1)
+    return message[1:end].decode(), KINDS[message[0]], message[end + 1:]
+
+
+class ConnectionRegistry(ABC):
+    """
+    Which worker holds each client's WebSocket, and a relay that hands
+    frames to it. Lets a worker that didn't accept the socket (e.g. the one
+    serving /setup-interview) still talk to the client.
+    """
+
+    worker_id: str = ""
+
+    async def start(self, deliver: Deliver) -> None:
+        """`deliver(client_id, kind, payload)` receives frames relayed to this worker."""
+
+    async def register(self, client_id: str) -> None:
+        pass
+
+    async def unregister(self, client_id: str) -> None:
+        pass
+
+    @abstractmethod
+    async def forward(self, client_id: str, kind: str, payload: bytes) -> bool:
+        """Relays a frame to the client's worker. Returns whether one took it."""
+
+    async def close(self) -> None:
+        pass
+
+
+class LocalRegistry(ConnectionRegistry):
+    """A single worker: every open socket is in this process."""
+
+    worker_id = "local"
+
+    async def forward(self, client_id: str, kind: str, payload: bytes) -> bool:
+        return False
+
+
+class RedisRegistry(ConnectionRegistry):
+    """
+    Registry and relay for several workers, over Redis keys and pub/sub.
+    Works with any client that speaks the redis.asyncio API, including a
+    fakeredis server standing in for Redis.
+
+    Each socket is a key naming its worker, with a TTL that a heartbeat
+    refreshes, so the sockets of a crashed worker are forgotten. Each
+    worker subscribes to its own channel. Frames relayed to one client are
+    delivered in order, without holding up the other clients' frames.
+    """
+
+    def __init__(self, client, ttl: int = 60, owner_cache_seconds: float = 1.0, prefix: str = "interview:"):
+        self.client = client
+        self.ttl = ttl
+        self.owner_cache_seconds = owner_cache_seconds
+        self.prefix = prefix
+        self.local: set[str] = set()
+        # client_id -> (worker_id, expires_at); spares a GET per audio chunk.
+        self.owners: dict[str, tuple[str, float]] = {}
+        self.inbound: dict[str, asyncio.Queue] = {}
+        self.delivering: dict[str, asyncio.Task] = {}
+        self.deliver: Deliver | None = None
+        self.tasks: list[asyncio.Task] = []
+
+    def _key(self, client_id: str) -> str:
+        return f"{self.prefix}conn:{client_id}"
+
+    def _channel(self, worker_id: str) -> str:
+        return f"{self.prefix}worker:{worker_id}"
+
+    async def start(self, deliver: Deliver):
+        # Decided here rather than at import, in case workers are forked
+        # from a parent that already imported the app.
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:6]}"
+        self.deliver = deliver
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(self._channel(self.worker_id))
+        self.tasks = [asyncio.create_task(self._listen(pubsub)), asyncio.create_task(self._heartbeat())]
+
+    async def register(self, client_id: str):
+        self.local.add(client_id)
+        await self.client.set(self._key(client_id), self.worker_id, ex=self.ttl)
+
+    async def unregister(self, client_id: str):
+        self.local.discard(client_id)
+        queue = self.inbound.pop(client_id, None)
+        if queue is not None:
+            self.delivering.pop(client_id).cancel()
+        # The client may have reconnected to another worker in the meantime.
+        if await self.client.get(self._key(client_id)) == self.worker_id.encode():
+            await self.client.delete(self._key(client_id))
+
+    async def _owner(self, client_id: str) -> str | None:
+        cached = self.owners.get(client_id)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        owner = await self.client.get(self._key(client_id))
+        if owner is None:
+            self.owners.pop(client_id, None)
+            return None
+        owner = owner.decode()
+        self.owners[client_id] = (owner, time.monotonic() + self.owner_cache_seconds)
+        return owner
+
+    async def forward(self, client_id: str, kind: str, payload: bytes) -> bool:
+        owner = await self._owner(client_id)
+        if owner is None or owner == self.worker_id:
+            # Not connected anywhere, or a stale entry for a socket this worker already closed.
+            metrics.relay_frames.inc(1, "dropped")
+            return False
+        receivers = await self.client.publish(self._channel(owner), encode_frame(client_id, kind, payload))
+        if not receivers:
+            self.owners.pop(client_id, None)
+            metrics.relay_frames.inc(1, "dropped")
+            return False
+        metrics.relay_frames.inc(1, "sent")
+        return True
+
+    async def _listen(self, pubsub):
+        while True:
+            try:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error reading relayed frames, retrying: {e}")
+                await asyncio.sleep(1)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+            try:
+                client_id, kind, payload = decode_frame(message["data"])
+            except Exception as e:
+                # Not from a worker of this version; skip it rather than stop relaying.
+                print(f"Skipping a malformed relayed frame: {e!r}")
+                metrics.relay_frames.inc(1, "malformed")
+                continue
+            if client_id not in self.local:
+                metrics.relay_frames.inc(1, "dropped")
+                continue
+            metrics.relay_frames.inc(1, "received")
+            queue = self.inbound.get(client_id)
+            if queue is None:
+                queue = self.inbound[client_id] = asyncio.Queue()
+                self.delivering[client_id] = asyncio.create_task(self._deliver_to(client_id, queue))
+            queue.put_nowait((kind, payload))
+
+    async def _deliver_to(self, client_id: str, queue: asyncio.Queue):
+        while True:
+            kind, payload = await queue.get()
+            try:
+                await self.deliver(client_id, kind, payload)
+            except Exception as e:
+                print(f"[{client_id}] Error delivering relayed frame: {e}")
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                async with self.client.pipeline(transaction=False) as pipe:
+                    for client_id in self.local:
+                        pipe.set(self._key(client_id), self.worker_id, ex=self.ttl)
+                    await pipe.execute()
+            except Exception as e:
+                print(f"Error refreshing connection registry: {e}")
+
+    async def close(self):
+        for task in [*self.tasks, *self.delivering.values()]:
+            task.cancel()
+        await asyncio.gather(*self.tasks, *self.delivering.values(), return_exceptions=True)
+        if self.local:
+            await self.client.delete(*(self._key(client_id) for client_id in self.local))
+        await self.client.aclose()
+
+
+def build_connection_registry(settings) -> ConnectionRegistry:
+    if settings.connection_registry == "redis":
+        import redis.asyncio
+
+        return RedisRegistry(redis.asyncio.Redis.from_url(settings.redis_url), ttl=settings.connection_registry_ttl_seconds)
+    return LocalRegistry()
@@ -0,0 +1,324 @@
+"""
+Offline re-scoring of recorded interviews: runs the FEEDBACK chain over
+the completed interviews in the transcript log, e.g. with a new rubric.
+
+    cd backend
+    python -m interview_flow.batch_eval feedback.jsonl
+    python -m interview_flow.batch_eval feedback.jsonl --prompt rubric.txt --concurrency 32
+    python -m interview_flow.batch_eval feedback.jsonl --stub     # no Groq calls
+
+Each interview's session is rebuilt from its turns, up to where the live
+feedback started, and the whole conversation goes to the chain verbatim
+(the running summary is not used, so no summarizer calls are made). The
+FEEDBACK chain runs in batches of --batch-size through the chain's abatch,
+with at most --concurrency calls in flight.
+
+Results are appended to the output file as JSON lines as each batch
+finishes. Rerunning with the same output file skips the interviews already
+in it, so an interrupted run picks up where it stopped. Feedback is also
+cached by a hash of the prompt, the model and the conversation, so a rerun
+into another file only calls the LLM for what changed. --prompt replaces
+the FEEDBACK system prompt; it may use {resume_text}, {target_role} and
+{skills}, and any other braces in it are sent as they are.
+
+For a quick try without an archive, fill a log with the stub interviews of
+TRANSCRIPT_LOG_PATH=/tmp/interviews.db python -m benchmarks.phase_transitions
+and pass --db /tmp/interviews.db --stub.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from typing import Iterator
+
+from langchain.schema import BaseMessage
+from langchain.schema.runnable import Runnable
+
+from config import settings
+from models.session import InterviewPhase, InterviewSession
+from interview_flow import langchain_chain
+from interview_flow.prompt_factory import PHASE_OPENING_INPUTS, get_prompt_variables, get_system_prompt_template
+from interview_flow.transcript_log import iter_interviews
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback (
+    key TEXT PRIMARY KEY,
+    feedback TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def rebuild_session(interview: dict) -> tuple[InterviewSession, str | None]:
+    """
+    The session as it was when the FEEDBACK phase began, and the feedback
+    Alex gave live. Alex's lines without a candidate turn before them (a
+    transition and the next phase's opening) become one exchange, answering
+    the phase's opening input like they do in the live chat memory.
+    """
+    session = InterviewSession(
+        interview_id=interview["interview_id"],
+        phase=InterviewPhase.FEEDBACK,
+        skills=interview["skills"],
+        target_role=interview["target_role"],
+        resume_text=interview["resume_text"],
+    )
+    exchanges: list[list[str]] = []
+    feedback = []
+    opening = False
+    for turn in interview["turns"]:
+        if turn["phase"] == InterviewPhase.FEEDBACK.value:
+            feedback.append(turn["alex"] or "")
+            continue
+        if turn["user"] is None:
+            if opening:
+                exchanges[-1][1] += " " + (turn["alex"] or "")
+            else:
+                opening_input = PHASE_OPENING_INPUTS.get(InterviewPhase(turn["phase"]), "")
+                exchanges.append([opening_input, turn["alex"] or ""])
+            opening = True
+        else:
+            exchanges.append([turn["user"], turn["alex"] or ""])
+            opening = False
+    for text, reply in exchanges:
+        session.chat_memory.save_context({"input": text}, {"output": reply})
+    # The transition line into FEEDBACK is recorded in that phase too.
+    return session, feedback[-1] if feedback else None
+
+
+def prompt_template(text: str) -> str:
+    """
+    A rubric file as a prompt template: braces are escaped, except around
+    the prompt variables, so that a rubric with JSON examples in it works.
+    """
+    names = "|".join(get_prompt_variables(InterviewSession()))
+    escaped = text.replace("{", "{{").replace("}", "}}")
+    return re.sub(r"\{\{(" + names + r")\}\}", r"{\1}", escaped)
+
+
+def feedback_inputs(session: InterviewSession) -> dict:
+    return {
+        "input": PHASE_OPENING_INPUTS[InterviewPhase.FEEDBACK],
+        "history": session.chat_memory.load_memory_variables({})["history"],
+        **get_prompt_variables(session),
+    }
+
+
+def cache_key(template: str, model: str, inputs: dict) -> str:
+    history: list[BaseMessage] = inputs["history"]
+    payload = {
+        "template": template,
+        "model": model,
+        "inputs": {name: value for name, value in inputs.items() if name != "history"},
+        "history": [[message.type, message.content] for message in history],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class FeedbackCache:
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(CACHE_SCHEMA)
+
+    def get(self, key: str) -> str | None:
+        row = self.connection.execute("SELECT feedback FROM feedback WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put_many(self, items: list[tuple[str, str]]):
+        now = time.time()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO feedback (key, feedback, created_at) VALUES (?, ?, ?)",
+                [(key, feedback, now) for key, feedback in items],
+            )
+
+    def close(self):
+        self.connection.close()
+
+
+def done_interviews(path: str) -> set[str]:
+    """Interviews already written to an output file by an earlier run."""
+    if path == "-" or not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path) as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["interview_id"])
+            except (ValueError, KeyError):
+                # A line cut short when the last run was interrupted.
+                continue
+    return done
+
+
+def batches(items: Iterator[dict], size: int) -> Iterator[list[dict]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class BatchEvaluator:
+    def __init__(self, chain: Runnable, template: str, model: str, cache: FeedbackCache, out, concurrency: int, batch_size: int):
+        self.chain = chain
+        self.template = template
+        self.model = model
+        self.cache = cache
+        self.out = out
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        # Whole batches in flight, so the next one is read and prepared
+        # while the LLM is working on the others.
+        self.slots = asyncio.Semaphore(max(1, concurrency // batch_size))
+        self.stats = {"evaluated": 0, "cached": 0, "skipped": 0, "failed": 0, "llm_seconds": 0.0}
+
+    def _write(self, record: dict):
+        self.out.write(json.dumps(record) + "\n")
+
+    def prepare(self, interview: dict) -> dict:
+        session, previous = rebuild_session(interview)
+        inputs = feedback_inputs(session)
+        return {
+            "interview": interview,
+            "inputs": inputs,
+            "key": cache_key(self.template, self.model, inputs),
+            "previous": previous,
+        }
+
+    def _record(self, job: dict, feedback: str, cached: bool) -> dict:
+        interview = job["interview"]
+        return {
+            "interview_id": interview["interview_id"],
+            "client_id": interview["client_id"],
+            "completed_at": interview["completed_at"],
+            "key": job["key"],
+            "cached": cached,
+            "feedback": feedback,
+            "previous_feedback": job["previous"],
+        }
+
+    async def _evaluate(self, jobs: list[dict]):
+        try:
+            start = time.perf_counter()
+            results = await self.chain.abatch(
+                [job["inputs"] for job in jobs],
+                config=[{"metadata": {"client_id": job["interview"]["client_id"]}} for job in jobs],
+                return_exceptions=True,
+                max_concurrency=min(self.batch_size, self.concurrency),
+            )
+            self.stats["llm_seconds"] += time.perf_counter() - start
+            fresh = []
+            for job, result in zip(jobs, results):
+                if isinstance(result, Exception):
+                    # Not written, so the next run tries it again.
+                    print(f"[{job['interview']['interview_id']}] Feedback failed: {result}", file=sys.stderr)
+                    self.stats["failed"] += 1
+                    continue
+                fresh.append((job["key"], result))
+                self._write(self._record(job, result, cached=False))
+                self.stats["evaluated"] += 1
+            self.cache.put_many(fresh)
+            self.out.flush()
+        finally:
+            self.slots.release()
+
+    async def run(self, interviews: Iterator[dict], done: set[str]):
+        tasks = []
+        for batch in batches(interviews, self.batch_size):
+            jobs = []
+            for interview in batch:
+                if interview["interview_id"] in done:
+                    self.stats["skipped"] += 1
+                    continue
+                job = self.prepare(interview)
+                feedback = self.cache.get(job["key"])
+                if feedback is not None:
+                    self._write(self._record(job, feedback, cached=True))
+                    self.stats["cached"] += 1
+                else:
+                    jobs.append(job)
+            if not jobs:
+                continue
+            await self.slots.acquire()
+            tasks.append(asyncio.create_task(self._evaluate(jobs)))
+            tasks = [task for task in tasks if not task.done()]
+        await asyncio.gather(*tasks)
+
+
+async def evaluate(args, out) -> dict:
+    if args.stub:
+        from benchmarks.stubs import Latency, StubChatModel
+
+        langchain_chain.llm = StubChatModel(
+            first_token=Latency(args.stub_first_token_ms / 1000), per_token=Latency(args.stub_token_ms / 1000)
+        )
+    if args.prompt:
+        with open(args.prompt) as f:
+            template = prompt_template(f.read())
+    else:
+        template = get_system_prompt_template(InterviewPhase.FEEDBACK)
+    llm = langchain_chain.llm
+    model = getattr(llm, "model_name", None) or type(llm).__name__
+    chain = langchain_chain.create_interview_chain(template)
+
+    cache = FeedbackCache(args.cache)
+    evaluator = BatchEvaluator(chain, template, model, cache, out, args.concurrency, args.batch_size)
+    start = time.perf_counter()
+    try:
+        await evaluator.run(iter_interviews(args.db, completed_only=not args.all), done_interviews(args.out))
+    finally:
+        cache.close()
+    evaluator.stats["elapsed"] = time.perf_counter() - start
+    return evaluator.stats
+
+
+def report(stats: dict):
+    written = stats["evaluated"] + stats["cached"]
+    elapsed = stats["elapsed"]
+    print(
+        f"{written} interviews in {elapsed:.1f} s ({written / elapsed if elapsed else 0:.1f}/s): "
+        f"{stats['evaluated']} evaluated, {stats['cached']} from cache, {stats['skipped']} already done, "
+        f"{stats['failed']} failed",
+        file=sys.stderr,
+    )
+    if stats["evaluated"]:
+        print(f"LLM: {stats['evaluated'] / elapsed:.1f} evaluations/s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    import argparse
+    import contextlib
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out", help="output file (JSON lines, appended to), or - for stdout")
+    parser.add_argument("--db", default=settings.transcript_log_path)
+    parser.add_argument("--all", action="store_true", help="include unfinished interviews")
+    parser.add_argument("--prompt", help="file with the FEEDBACK system prompt to use instead of the built-in one")
+    parser.add_argument("--cache", default=settings.feedback_cache_path)
+    parser.add_argument("--concurrency", type=int, default=settings.llm_max_concurrency, help="LLM calls in flight")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--verbose", action="store_true", help="show the chain's log")
+    stub = parser.add_argument_group("stub LLM")
+    stub.add_argument("--stub", action="store_true", help="use the canned LLM from benchmarks/stubs.py")
+    stub.add_argument("--stub-first-token-ms", type=float, default=250)
+    stub.add_argument("--stub-token-ms", type=float, default=15)
+    args = parser.parse_args()
+
+    # The chain prints a line per call; keep stdout for the results.
+    out = sys.stdout if args.out == "-" else open(args.out, "a")
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stderr if args.verbose else devnull):
+            stats = asyncio.run(evaluate(args, out))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    report(stats)
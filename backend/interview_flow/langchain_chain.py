@@ -1,9 +1,13 @@
 from langchain_groq import ChatGroq
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.schema.runnable import RunnablePassthrough
+from langchain.schema import BaseMessage
+from langchain.schema.runnable import Runnable, RunnableConfig, RunnableLambda
 from langchain.schema.output_parser import StrOutputParser
-from langchain.memory import ConversationBufferMemory
 from config import settings
+from services import upstream
+from models.session import InterviewSession, InterviewPhase
+from interview_flow.memory import count_message_tokens
+from interview_flow.prompt_factory import get_prompt_variables, get_system_prompt_template
 
 # Initialize the Groq Chat client instead of Ollama
 # Llama3-8b-8192 is one of the fastest and most capable models available on Groq
@@ -11,24 +15,69 @@ llm = ChatGroq(
     temperature=0.7,
     model_name="llama3-8b-8192",
     api_key=settings.groq_api_key,
+    base_url=settings.groq_base_url,
+    max_retries=0,
+    timeout=upstream.timeout,
+    http_async_client=upstream.client("llm"),
 )
 
-def create_interview_chain(system_prompt: str, memory: ConversationBufferMemory):
+def log_prompt_tokens(prompt_value, config: RunnableConfig):
+    """Logs the size of the rendered prompt; passes it through unchanged."""
+    client_id = config.get("metadata", {}).get("client_id", "-")
+    print(f"[{client_id}] Prompt tokens: {count_message_tokens(prompt_value.to_messages())}")
+    return prompt_value
+
+def create_interview_chain(system_prompt_template: str):
     """
     Creates the LangChain conversation chain using the high-speed Groq model.
+    The chain holds no session state: chat history and the per-session
+    prompt variables are passed in at invoke time (see chain_inputs).
     """
     prompt = ChatPromptTemplate.from_messages([
-        ("system", system_prompt),
+        ("system", system_prompt_template),
         MessagesPlaceholder(variable_name="history"),
         ("human", "{input}"),
     ])
-    
+
     chain = (
-        RunnablePassthrough.assign(
-            history=lambda x: memory.load_memory_variables(x)["history"]
-        )
-        | prompt
+        prompt
+        | RunnableLambda(log_prompt_tokens)
         | llm
         | StrOutputParser()
     )
-    return chain
\ No newline at end of file
+    return chain
+
+# One compiled chain per phase, shared by all sessions.
+phase_chains: dict[InterviewPhase, Runnable] = {}
+
+def build_phase_chains():
+    """Compiles the chain for every phase. Called once at startup."""
+    for phase in InterviewPhase:
+        phase_chains[phase] = create_interview_chain(get_system_prompt_template(phase))
+
+def get_phase_chain(phase: InterviewPhase) -> Runnable:
+    if phase not in phase_chains:
+        phase_chains[phase] = create_interview_chain(get_system_prompt_template(phase))
+    return phase_chains[phase]
+
+def chain_inputs(session: InterviewSession, text: str) -> dict:
+    return {
+        "input": text,
+        "history": session.chat_memory.load_memory_variables({})["history"],
+        **get_prompt_variables(session),
+    }
+
+summary_prompt = ChatPromptTemplate.from_messages([
+    ("system",
+     "You maintain a running summary of a mock job interview between the interviewer Alex and a candidate. "
+     "Update the summary with the new lines. Keep every fact about the candidate's answers, skills and "
+     "projects, and which questions were already asked. Reply with the updated summary only, under 150 words."),
+    ("human", "Current summary:\n{summary}\n\nNew lines:\n{new_lines}"),
+])
+summary_chain = summary_prompt | llm | StrOutputParser()
+
+async def summarize_history(summary: str, messages: list[BaseMessage]) -> str:
+    """Folds new conversation turns into an existing summary."""
+    speakers = {"human": "Candidate", "ai": "Alex"}
+    new_lines = "\n".join(f"{speakers.get(m.type, m.type)}: {m.content}" for m in messages)
+    return await summary_chain.ainvoke({"summary": summary or "(empty)", "new_lines": new_lines})
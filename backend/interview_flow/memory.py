@@ -0,0 +1,101 @@
+from functools import lru_cache
+from typing import Any
+
+from langchain.memory.chat_memory import BaseChatMemory
+from langchain.schema import BaseMessage, SystemMessage
+from pydantic import Field
+
+# Rough per-message overhead of the chat template (role markers etc.).
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    # Llama 3 uses a tiktoken-style BPE vocabulary, so cl100k_base gives a
+    # close estimate without shipping the model's own tokenizer. If tiktoken
+    # (or its vocabulary file) isn't available we fall back to ~4 chars/token.
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(messages: list[BaseMessage]) -> int:
+    return sum(count_tokens(message.content) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    encoding = _encoding()
+    if encoding is None:
+        return text[: max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+class TokenBudgetMemory(BaseChatMemory):
+    """
+    Chat memory with a bounded prompt footprint.
+
+    The last `max_recent_turns` turns are kept verbatim as long as they fit in
+    `max_token_limit`. Older turns are moved to `pending`, and are sent
+    verbatim until a summary of them is ready. The caller makes that summary
+    in the background from the previous summary and the pending turns only
+    (not the whole conversation) and hands it to `apply_summary`.
+    """
+
+    memory_key: str = "history"
+    max_recent_turns: int = 6
+    max_token_limit: int = 1500
+    summary: str = ""
+    pending: list[BaseMessage] = Field(default_factory=list)
+
+    @property
+    def memory_variables(self) -> list[str]:
+        return [self.memory_key]
+
+    def load_memory_variables(self, inputs: dict[str, Any]) -> dict[str, Any]:
+        messages: list[BaseMessage] = []
+        if self.summary:
+            messages.append(SystemMessage(content=f"Summary of the earlier conversation:\n{self.summary}"))
+        # Turns waiting to be folded are still sent verbatim, so nothing is
+        # lost if the summarizer hasn't run yet.
+        messages.extend(self.pending)
+        messages.extend(self.chat_memory.messages)
+        return {self.memory_key: messages}
+
+    def save_context(self, inputs: dict[str, Any], outputs: dict[str, str]) -> None:
+        super().save_context(inputs, outputs)
+        self._prune()
+
+    def _prune(self):
+        messages = self.chat_memory.messages
+        while len(messages) > 2 and (
+            len(messages) > 2 * self.max_recent_turns or count_message_tokens(messages) > self.max_token_limit
+        ):
+            self.pending.extend(messages[:2])
+            del messages[:2]
+
+    def apply_summary(self, based_on: str, folded: list[BaseMessage], summary: str) -> bool:
+        """
+        Applies a summary of `based_on` plus the `folded` turns, made while
+        the conversation went on. Returns False, leaving the memory as it
+        is, if another fold got there first.
+        """
+        pending = self.pending[: len(folded)]
+        if self.summary != based_on or [(m.type, m.content) for m in pending] != [(m.type, m.content) for m in folded]:
+            return False
+        self.summary = summary
+        del self.pending[: len(folded)]
+        return True
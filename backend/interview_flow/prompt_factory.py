@@ -1,21 +1,46 @@
 
+from functools import lru_cache
+
 from models.session import InterviewSession, InterviewPhase
+from interview_flow.memory import truncate_to_tokens
 
-def get_system_prompt(session: InterviewSession) -> str:
-    base_prompt = """
+# The resume is part of every BEHAVIORAL prompt; cap its share of the
+# 8192-token context so that long CVs can't crowd out the conversation.
+RESUME_TOKEN_BUDGET = 1500
+
+# Fixed lines the interviewer is told to say verbatim. They are also
+# pre-synthesized into the TTS cache.
+OPENING_LINE = "Alright, let's begin. Could you please tell me a little bit about yourself and walk me through your experience?"
+CONCLUSION_LINE = "That concludes our interview. Do you have any questions for me?"
+
+# What the candidate side of the conversation "says" to get the first line of
+# a phase out of its chain. Alex opens each phase without waiting for the
+# candidate, so these turns are never spoken.
+PHASE_OPENING_INPUTS: dict[InterviewPhase, str] = {
+    InterviewPhase.BEHAVIORAL: "Start the interview now.",
+    InterviewPhase.TECHNICAL: "Start the technical questions now.",
+    InterviewPhase.CODING: "Start the coding round now.",
+    InterviewPhase.CONCLUSION: "Start the conclusion now.",
+    InterviewPhase.FEEDBACK: "Give me your feedback now.",
+}
+
+BASE_PROMPT = """
 You are 'Alex', an expert AI mock interviewer. Your persona is professional, encouraging, and concise.
 You are conducting a live voice interview, so keep your responses brief and conversational.
 You must follow a strict turn-by-turn conversation. Ask ONE question at a time and then WAIT for the user's response before proceeding.
 Never break character. You are not a language model.
 """
 
-    match session.phase:
-        case InterviewPhase.BEHAVIORAL:
-            return base_prompt + f"""
+# Static system prompt templates, one per phase. Per-session values are
+# template variables ({resume_text}, {target_role}, {skills}) filled in at
+# invoke time, so the templates and the chains built from them can be
+# shared by every session.
+PHASE_PROMPTS: dict[InterviewPhase, str] = {
+    InterviewPhase.BEHAVIORAL: BASE_PROMPT + """
             You are in the BEHAVIORAL phase. Your goal is to get the candidate's introduction.
 
             **Your instructions are very strict:**
-            1.  Your FIRST and ONLY task is to say: "Alright, let's begin. Could you please tell me a little bit about yourself and walk me through your experience?"
+            1.  Your FIRST and ONLY task is to say: """ + f'"{OPENING_LINE}"' + """
             2.  After the user responds, you MUST evaluate their answer for relevance.
             3.  **IF the response is a relevant introduction** (discussing their professional background, skills, or work experience), THEN your next response must do two things:
                 a. Ask ONE relevant follow-up question about a specific project or role.
@@ -24,40 +49,55 @@ Never break character. You are not a language model.
 
             Resume Context (use this for your follow-up question AFTER a successful introduction):
             ---
-            {session.resume_text}
+            {resume_text}
             ---
-            """
-        case InterviewPhase.TECHNICAL:
-            return base_prompt + f"""
-            You are in the TECHNICAL phase. Your goal is to assess technical knowledge for a '{session.target_role}' role, focusing on: {', '.join(session.skills)}.
+            """,
+    InterviewPhase.TECHNICAL: BASE_PROMPT + """
+            You are in the TECHNICAL phase. Your goal is to assess technical knowledge for a '{target_role}' role, focusing on: {skills}.
             - Ask ONE technical question related to these skills.
             - WAIT for the user's answer.
             - After they answer, provide brief, positive feedback (e.g., "Good, that's correct.") and then ask the NEXT single question.
             - Ask a total of 2-3 questions in this phase.
             - After the final question is answered, your response MUST end with the special token: [END_TECHNICAL]
-            """
-        case InterviewPhase.CODING:
-            return base_prompt + f"""
+            """,
+    InterviewPhase.CODING: BASE_PROMPT + """
             You are in the CODING phase. Your goal is to assess problem-solving skills verbally.
             - First, introduce a common coding problem (e.g., Two Sum, FizzBuzz, Reverse a String).
             - Then, ask the user to explain their logic and approach. Do not ask for code.
             - WAIT for their explanation.
             - After they explain their solution, ask about the time and space complexity.
             - After discussing complexity, your response MUST end with the special token: [END_CODING]
-            """
-        case InterviewPhase.CONCLUSION:
-            return base_prompt + """
+            """,
+    InterviewPhase.CONCLUSION: BASE_PROMPT + """
             You are in the CONCLUSION phase.
-            - Your first and only task is to ask: "That concludes our interview. Do you have any questions for me?"
+            - Your first and only task is to ask: """ + f'"{CONCLUSION_LINE}"' + """
             - If they ask questions, provide brief, generic answers.
             - After addressing their questions (or if they have none), your response MUST end with the special token: [END_CONCLUSION]
-            """
-        case InterviewPhase.FEEDBACK:
-            return base_prompt + f"""
+            """,
+    InterviewPhase.FEEDBACK: BASE_PROMPT + """
             You are in the FEEDBACK phase. Your goal is to provide a final summary based on the entire conversation.
             - Provide brief, constructive feedback.
             - Structure it into three short points: 1) What they did well, 2) An area for improvement, 3) A final encouraging remark.
             - This is your final message. Keep it concise.
-            """
-        case _:
-            return base_prompt
\ No newline at end of file
+            """,
+}
+
+def get_system_prompt_template(phase: InterviewPhase) -> str:
+    return PHASE_PROMPTS.get(phase, BASE_PROMPT)
+
+@lru_cache(maxsize=1024)
+def render_resume_excerpt(resume_text: str | None) -> str:
+    # Tokenizing a resume is the only non-trivial per-session rendering
+    # step; it is cached so it runs once per resume rather than every turn.
+    return truncate_to_tokens(resume_text or "", RESUME_TOKEN_BUDGET)
+
+def get_prompt_variables(session: InterviewSession) -> dict[str, str]:
+    return {
+        "resume_text": render_resume_excerpt(session.resume_text),
+        "target_role": str(session.target_role),
+        "skills": ", ".join(session.skills),
+    }
+
+def get_system_prompt(session: InterviewSession) -> str:
+    """Renders the full system prompt for a session (outside of a chain)."""
+    return get_system_prompt_template(session.phase).format(**get_prompt_variables(session))
@@ -0,0 +1,169 @@
+import json
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from langchain.schema import AIMessage, HumanMessage, SystemMessage
+
+from models.session import InterviewSession, InterviewPhase
+
+# Chat history is stored as [type, content] pairs rather than full message
+# dicts, which carry a lot of empty metadata per message.
+MESSAGE_TYPES = {"human": HumanMessage, "ai": AIMessage, "system": SystemMessage}
+
+
+def dump_session(session: InterviewSession) -> bytes:
+    """Serializes a session into a compact, compressed JSON blob."""
+    payload = {
+        "i": session.interview_id,
+        "p": session.phase.value,
+        "s": session.skills,
+        "r": session.resume_text,
+        "t": session.target_role,
+        "h": [[message.type, message.content] for message in session.chat_memory.chat_memory.messages],
+        "q": [[message.type, message.content] for message in session.chat_memory.pending],
+        "u": session.chat_memory.summary,
+    }
+    return zlib.compress(json.dumps(payload, separators=(",", ":")).encode(), 1)
+
+
+def load_session(blob: bytes) -> InterviewSession:
+    payload = json.loads(zlib.decompress(blob))
+    session = InterviewSession(
+        phase=InterviewPhase(payload["p"]),
+        skills=payload["s"],
+        resume_text=payload["r"],
+        target_role=payload["t"],
+    )
+    if "i" in payload:
+        session.interview_id = payload["i"]
+    memory = session.chat_memory
+    memory.chat_memory.messages = [MESSAGE_TYPES[kind](content=content) for kind, content in payload["h"]]
+    memory.pending = [MESSAGE_TYPES[kind](content=content) for kind, content in payload["q"]]
+    memory.summary = payload["u"]
+    return session
+
+
+class SessionStore(ABC):
+    """Storage backend for interview sessions, keyed by client_id."""
+
+    @abstractmethod
+    async def get(self, client_id: str) -> InterviewSession | None:
+        ...
+
+    @abstractmethod
+    async def set(self, client_id: str, session: InterviewSession) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, client_id: str) -> None:
+        ...
+
+    @abstractmethod
+    async def count(self) -> int:
+        """How many sessions are stored. Cheap enough to call on every metrics scrape."""
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Process-local store with LRU and idle-TTL eviction.
+    Sessions are kept in access order, so expired entries are always at the
+    front and eviction is amortized O(1).
+    """
+
+    def __init__(self, max_sessions: int = 10000, idle_ttl: float = 3600):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._sessions: OrderedDict[str, tuple[float, InterviewSession]] = OrderedDict()
+
+    def _evict(self):
+        deadline = time.monotonic() - self.idle_ttl
+        while self._sessions:
+            client_id, (last_access, _) = next(iter(self._sessions.items()))
+            if last_access > deadline and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[client_id]
+
+    async def get(self, client_id: str) -> InterviewSession | None:
+        self._evict()
+        entry = self._sessions.get(client_id)
+        if entry is None:
+            return None
+        self._sessions[client_id] = (time.monotonic(), entry[1])
+        self._sessions.move_to_end(client_id)
+        return entry[1]
+
+    async def set(self, client_id: str, session: InterviewSession) -> None:
+        self._sessions[client_id] = (time.monotonic(), session)
+        self._sessions.move_to_end(client_id)
+        self._evict()
+
+    async def delete(self, client_id: str) -> None:
+        self._sessions.pop(client_id, None)
+
+    async def count(self) -> int:
+        self._evict()
+        return len(self._sessions)
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Shared store for running several workers. Works with any client that
+    speaks the redis.asyncio API, including fakeredis.FakeAsyncRedis.
+    Idle sessions expire through the Redis key TTL, which is refreshed on
+    every read and write.
+
+    Next to the sessions, a sorted set holds each client_id with the time
+    its session expires, so counting them doesn't scan the keyspace.
+    """
+
+    def __init__(self, client, idle_ttl: int = 3600, prefix: str = "interview:session:"):
+        self.client = client
+        self.idle_ttl = idle_ttl
+        self.prefix = prefix
+        self.index = prefix + "expiry"
+
+    async def get(self, client_id: str) -> InterviewSession | None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.getex(self.prefix + client_id, ex=self.idle_ttl)
+            pipe.zadd(self.index, {client_id: time.time() + self.idle_ttl}, xx=True)
+            blob, _ = await pipe.execute()
+        if blob is None:
+            # Expired (or never stored); don't let the refresh above keep counting it.
+            await self.client.zrem(self.index, client_id)
+            return None
+        return load_session(blob)
+
+    async def set(self, client_id: str, session: InterviewSession) -> None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(self.prefix + client_id, dump_session(session), ex=self.idle_ttl)
+            pipe.zadd(self.index, {client_id: time.time() + self.idle_ttl})
+            await pipe.execute()
+
+    async def delete(self, client_id: str) -> None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.delete(self.prefix + client_id)
+            pipe.zrem(self.index, client_id)
+            await pipe.execute()
+
+    async def count(self) -> int:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(self.index, "-inf", time.time())
+            pipe.zcard(self.index)
+            _, count = await pipe.execute()
+        return count
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def build_session_store(settings) -> SessionStore:
+    if settings.session_store == "redis":
+        import redis.asyncio
+
+        return RedisSessionStore(redis.asyncio.Redis.from_url(settings.redis_url), idle_ttl=settings.session_ttl_seconds)
+    return InMemorySessionStore(max_sessions=settings.max_sessions, idle_ttl=settings.session_ttl_seconds)
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from typing import AsyncIterable, Awaitable, Callable
+
+from config import settings
+import metrics
+
+
+class Speculation:
+    """
+    One interviewer line prepared ahead of time: generated by the LLM and,
+    optionally, synthesized, while the conversation is still busy with
+    something else. `key` names the conversation state it was prepared for.
+    """
+
+    def __init__(
+        self,
+        key: tuple,
+        generate: Callable[[], Awaitable[str]],
+        synthesize: Callable[[str], AsyncIterable[tuple[str, object]]] | None = None,
+    ):
+        self.key = key
+        self.text: str | None = None
+        # (stream_type, data) items, appended as they are synthesized.
+        self.audio: list[tuple[str, object]] = []
+        self.synthesizing = synthesize is not None
+        self._changed = asyncio.Event()
+        self.task = asyncio.create_task(self._run(generate, synthesize))
+        # A discarded speculation's error is never awaited; retrieve it so
+        # asyncio doesn't log it.
+        self.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+    async def _run(self, generate, synthesize):
+        try:
+            self.text = await generate()
+            self._changed.set()
+            if synthesize is not None:
+                async for item in synthesize(self.text):
+                    self.audio.append(item)
+                    self._changed.set()
+        finally:
+            self._changed.set()
+
+    async def _wait(self):
+        await self._changed.wait()
+        self._changed.clear()
+
+    async def result(self) -> str:
+        """The generated text, once it is ready. Raises if generation failed."""
+        while self.text is None and not self.task.done():
+            await self._wait()
+        if self.text is None:
+            # Surfaces the generation error (or CancelledError).
+            await self.task
+        return self.text
+
+    async def stream(self) -> AsyncIterable[tuple[str, object]]:
+        """Replays the synthesized audio, following along if it isn't finished yet."""
+        sent = 0
+        while True:
+            if sent < len(self.audio):
+                sent += 1
+                yield self.audio[sent - 1]
+            elif self.task.done():
+                return
+            else:
+                await self._wait()
+
+    def cancel(self):
+        self.task.cancel()
+
+
+class Speculator:
+    """
+    At most one speculation per client. Whoever needs the line asks for it
+    with the key of the current conversation state; a speculation prepared
+    for a different state (the candidate spoke again, a reply was
+    interrupted, the phase didn't change after all) is discarded rather
+    than used.
+    """
+
+    def __init__(self, enabled: bool = True, synthesize: bool = True):
+        self.enabled = enabled
+        self.synthesize = synthesize
+        self.pending: dict[str, Speculation] = {}
+
+    def start(
+        self,
+        client_id: str,
+        key: tuple,
+        generate: Callable[[], Awaitable[str]],
+        synthesize: Callable[[str], AsyncIterable[tuple[str, object]]],
+    ):
+        if not self.enabled:
+            return
+        self.discard(client_id)
+        self.pending[client_id] = Speculation(key, generate, synthesize if self.synthesize else None)
+
+    async def take(self, client_id: str, key: tuple) -> Speculation | None:
+        """
+        The speculation for `key` with its text ready, or None if there is
+        none, it was for another state, or it failed.
+        """
+        speculation = self.pending.pop(client_id, None)
+        if speculation is None:
+            return None
+        if speculation.key != key:
+            speculation.cancel()
+            metrics.speculations.inc(1, "diverged")
+            return None
+        start = time.perf_counter()
+        try:
+            await speculation.result()
+        except asyncio.CancelledError:
+            speculation.cancel()
+            raise
+        except Exception as e:
+            print(f"[{client_id}] Speculative generation failed, generating again: {e}")
+            metrics.speculations.inc(1, "failed")
+            return None
+        metrics.speculations.inc(1, "used")
+        metrics.observe("speculation_wait", time.perf_counter() - start, client_id)
+        return speculation
+
+    def discard(self, client_id: str):
+        speculation = self.pending.pop(client_id, None)
+        if speculation is not None:
+            speculation.cancel()
+            metrics.speculations.inc(1, "discarded")
+
+
+speculator = Speculator(settings.speculation_enabled, settings.speculation_synthesize)
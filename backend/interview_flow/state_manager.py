@@ -1,14 +1,23 @@
+from config import settings
 from models.session import InterviewSession, InterviewPhase
+from interview_flow.session_store import build_session_store
 
-# In a real app, this would be a database or Redis cache
-sessions: dict[str, InterviewSession] = {}
+store = build_session_store(settings)
 
-def create_session(client_id: str) -> InterviewSession:
-    sessions[client_id] = InterviewSession()
-    return sessions[client_id]
+async def create_session(client_id: str) -> InterviewSession:
+    session = InterviewSession()
+    await store.set(client_id, session)
+    return session
 
-def get_session(client_id: str) -> InterviewSession:
-    return sessions.get(client_id)
+async def get_session(client_id: str) -> InterviewSession:
+    return await store.get(client_id)
+
+async def save_session(client_id: str, session: InterviewSession):
+    """Persists changes made to a session (required for shared stores)."""
+    await store.set(client_id, session)
+
+async def delete_session(client_id: str):
+    await store.delete(client_id)
 
 def get_initial_message(phase: InterviewPhase) -> str:
     messages = {
@@ -23,8 +32,8 @@ def get_initial_message(phase: InterviewPhase) -> str:
     }
     return messages.get(phase, "")
 
-def advance_phase(client_id: str) -> InterviewPhase:
-    session = get_session(client_id)
+async def advance_phase(client_id: str) -> InterviewPhase:
+    session = await get_session(client_id)
     current_phase = session.phase
     
     phase_order = list(InterviewPhase)
@@ -32,6 +41,7 @@ def advance_phase(client_id: str) -> InterviewPhase:
         current_index = phase_order.index(current_phase)
         next_phase = phase_order[current_index + 1]
         session.phase = next_phase
+        await save_session(client_id, session)
         return next_phase
     except (ValueError, IndexError):
         return current_phase # Or handle end of interview
\ No newline at end of file
@@ -0,0 +1,136 @@
+import asyncio
+import re
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable
+
+# Phase tokens look like [END_BEHAVIORAL]; they are control signals for the
+# server and must never reach the TTS engine.
+PHASE_TOKEN_RE = re.compile(r"\[END_[A-Z_]+\]")
+
+# A sentence ends at ., ! or ? (optionally followed by closing quotes or
+# brackets) and then whitespace. Requiring the whitespace keeps "3.5" or
+# "node.js" in one piece.
+SENTENCE_END_RE = re.compile(r"[.!?]+[\"')\]]*\s+")
+
+
+class SentenceSplitter:
+    """
+    Incrementally splits streamed LLM output into speakable sentences and
+    removes phase tokens as they appear.
+    """
+
+    def __init__(self, min_chars: int = 20):
+        # Very short fragments ("Great.") are merged into the next sentence so
+        # that we don't open a TTS request for a single word.
+        self.min_chars = min_chars
+        self.phase_tokens: list[str] = []
+        self._buffer = ""
+
+    def _strip_tokens(self):
+        for match in PHASE_TOKEN_RE.finditer(self._buffer):
+            self.phase_tokens.append(match.group(0))
+        self._buffer = PHASE_TOKEN_RE.sub("", self._buffer)
+
+    def feed(self, text: str) -> list[str]:
+        self._buffer += text
+        self._strip_tokens()
+
+        sentences = []
+        start = 0
+        for match in SENTENCE_END_RE.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            if len(candidate) >= self.min_chars:
+                sentences.append(candidate)
+                start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> list[str]:
+        self._strip_tokens()
+        remainder = self._buffer.strip()
+        self._buffer = ""
+        return [remainder] if remainder else []
+
+
+async def iter_sentences(token_stream: AsyncIterable[str], splitter: SentenceSplitter) -> AsyncIterator[str]:
+    """Yields complete sentences from a stream of LLM tokens."""
+    async for token in token_stream:
+        for sentence in splitter.feed(token):
+            yield sentence
+    for sentence in splitter.flush():
+        yield sentence
+
+
+async def stream_speech(
+    sentences: AsyncIterable[str],
+    synthesize: Callable[[str], AsyncIterable[tuple[str, object]]],
+    emit: Callable[[str, object], Awaitable[None]],
+    max_inflight: int = 2,
+    sentence_done: Callable[[str], Awaitable[None]] | None = None,
+) -> list[str]:
+    """
+    Starts TTS for every sentence as soon as it is available, while later
+    sentences are still being generated, and emits the resulting
+    (stream_type, data) items strictly in sentence order.
+
+    `max_inflight` bounds how many TTS requests run at once (the sentence
+    being sent plus the ones synthesized ahead of it) so that a long reply
+    doesn't open a burst of concurrent upstream connections.
+    `sentence_done` is awaited after each sentence's audio has been emitted.
+    Returns the sentences that were spoken.
+
+    If the caller is cancelled, the LLM stream and every TTS stream are
+    cancelled and awaited before the CancelledError propagates, so no
+    upstream request outlives the turn.
+    """
+    slots = asyncio.Semaphore(max_inflight)
+    pending: asyncio.Queue = asyncio.Queue()
+    tasks: list[asyncio.Task] = []
+    spoken: list[str] = []
+
+    async def synthesize_into(sentence: str, out: asyncio.Queue):
+        await slots.acquire()
+        try:
+            async for item in synthesize(sentence):
+                await out.put(item)
+        finally:
+            await out.put(None)
+
+    async def produce():
+        try:
+            # The LLM stream is drained as fast as it arrives; only the TTS
+            # requests wait for a free slot.
+            async for sentence in sentences:
+                out: asyncio.Queue = asyncio.Queue()
+                task = asyncio.create_task(synthesize_into(sentence, out))
+                tasks.append(task)
+                await pending.put((sentence, out, task))
+        finally:
+            await pending.put(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            entry = await pending.get()
+            if entry is None:
+                break
+            sentence, out, task = entry
+            try:
+                while True:
+                    item = await out.get()
+                    if item is None:
+                        break
+                    await emit(*item)
+            finally:
+                slots.release()
+            await task
+            spoken.append(sentence)
+            if sentence_done is not None:
+                await sentence_done(sentence)
+        # Surface errors raised while consuming the LLM stream.
+        await producer
+    finally:
+        unfinished = [task for task in [producer, *tasks] if not task.done()]
+        for task in unfinished:
+            task.cancel()
+        await asyncio.gather(*unfinished, return_exceptions=True)
+    return spoken
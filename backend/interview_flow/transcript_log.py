@@ -0,0 +1,288 @@
+"""
+Append-only log of interview turns, backed by SQLite in WAL mode.
+
+Turns are buffered in memory and written in batches by a background task,
+so the reply path never waits on disk. Each batch also stores the latest
+session snapshot per interview, which is what a reconnecting client is
+restored from. Completed interviews can be exported for offline analysis:
+
+    cd backend
+    python -m interview_flow.transcript_log export interviews.jsonl
+    python -m interview_flow.transcript_log export - --all
+"""
+import asyncio
+import json
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from config import settings
+import metrics
+from models.session import InterviewPhase, InterviewSession
+from interview_flow.session_store import dump_session, load_session
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS interviews (
+    interview_id TEXT PRIMARY KEY,
+    client_id TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    completed_at REAL,
+    phase TEXT NOT NULL,
+    snapshot BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS interviews_client ON interviews (client_id, updated_at);
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    interview_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    phase TEXT NOT NULL,
+    user_text TEXT,
+    alex_text TEXT,
+    interrupted INTEGER NOT NULL DEFAULT 0,
+    timings TEXT
+);
+CREATE INDEX IF NOT EXISTS turns_interview ON turns (interview_id, id);
+"""
+
+
+@dataclass
+class _Snapshot:
+    client_id: str
+    ts: float
+    phase: str
+    blob: bytes
+    completed: bool
+
+
+@dataclass
+class _Batch:
+    turns: list[tuple] = field(default_factory=list)
+    # Only the latest snapshot of each interview is worth writing.
+    snapshots: dict[str, _Snapshot] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.turns) + len(self.snapshots)
+
+
+class TranscriptLog:
+    def __init__(self, path: str, flush_interval: float = 0.5, max_batch: int = 256):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.pending = _Batch()
+        self.writing: _Batch | None = None
+        self.wakeup = asyncio.Event()
+        self.flusher: asyncio.Task | None = None
+        self.closing = False
+        self._writer: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only risks the last batches on power loss, not corruption.
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    async def start(self):
+        if self.flusher is None:
+            self.closing = False
+            self._writer = await asyncio.to_thread(self._connect)
+            self.flusher = asyncio.create_task(self._flush_loop())
+
+    def record_turn(
+        self,
+        client_id: str,
+        session: InterviewSession,
+        user_text: str | None,
+        alex_text: str | None,
+        timings: dict[str, float] | None = None,
+        interrupted: bool = False,
+        completed: bool | None = None,
+    ):
+        """
+        Buffers one exchange together with a snapshot of the session after
+        it. Either side may be None: Alex's opening lines and phase
+        transitions have no candidate text. `completed` marks the line that
+        finishes the interview; by default, any reply in the FEEDBACK phase.
+        """
+        now = time.time()
+        self.pending.turns.append((
+            session.interview_id, now, session.phase.value, user_text, alex_text,
+            int(interrupted), json.dumps(timings) if timings else None,
+        ))
+        metrics.transcript_turns.inc()
+        if completed is None:
+            # The transition line into FEEDBACK doesn't count.
+            completed = session.phase == InterviewPhase.FEEDBACK and user_text is not None
+        self._snapshot(client_id, session, now, completed)
+
+    def _snapshot(self, client_id: str, session: InterviewSession, now: float, completed: bool):
+        self.pending.snapshots[session.interview_id] = _Snapshot(
+            client_id, now, session.phase.value, dump_session(session), completed
+        )
+        if len(self.pending) >= self.max_batch:
+            self.wakeup.set()
+
+    async def _flush_loop(self):
+        while not self.closing:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        if not len(self.pending) or self._writer is None:
+            return
+        batch, self.pending = self.pending, _Batch()
+        self.writing = batch
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._write, batch)
+        except Exception as e:
+            print(f"Error writing transcript batch ({len(batch.turns)} turns), will retry: {e}")
+            # Put it back in front of anything recorded since; newer snapshots win.
+            self.pending.turns[:0] = batch.turns
+            self.pending.snapshots = {**batch.snapshots, **self.pending.snapshots}
+            return
+        finally:
+            self.writing = None
+        metrics.transcript_flush_seconds.observe(time.perf_counter() - start)
+
+    def _write(self, batch: _Batch):
+        with self._writer:
+            self._writer.executemany(
+                "INSERT INTO turns (interview_id, ts, phase, user_text, alex_text, interrupted, timings) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                batch.turns,
+            )
+            self._writer.executemany(
+                "INSERT INTO interviews (interview_id, client_id, started_at, updated_at, completed_at, phase, snapshot) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (interview_id) DO UPDATE SET updated_at = excluded.updated_at, phase = excluded.phase, "
+                "snapshot = excluded.snapshot, completed_at = COALESCE(interviews.completed_at, excluded.completed_at)",
+                [
+                    (interview_id, s.client_id, s.ts, s.ts, s.ts if s.completed else None, s.phase, s.blob)
+                    for interview_id, s in batch.snapshots.items()
+                ],
+            )
+
+    async def restore(self, client_id: str) -> InterviewSession | None:
+        """The latest unfinished interview of a client, if any, e.g. after a reconnect or restart."""
+        # Snapshots not yet on disk are newer than anything in the database.
+        batches = [self.pending] + ([self.writing] if self.writing else [])
+        buffered = [
+            s for batch in batches for s in batch.snapshots.values() if s.client_id == client_id and not s.completed
+        ]
+        if buffered:
+            return load_session(max(buffered, key=lambda s: s.ts).blob)
+        if self._writer is None:
+            return None
+        row = await asyncio.to_thread(self._latest_snapshot, client_id)
+        return load_session(row[0]) if row else None
+
+    def _latest_snapshot(self, client_id: str):
+        connection = sqlite3.connect(self.path)
+        try:
+            return connection.execute(
+                "SELECT snapshot FROM interviews WHERE client_id = ? AND completed_at IS NULL "
+                "ORDER BY updated_at DESC LIMIT 1",
+                (client_id,),
+            ).fetchone()
+        finally:
+            connection.close()
+
+    async def close(self):
+        if self.flusher is not None:
+            # Stop the loop rather than cancel it: cancelling doesn't stop a
+            # write already running on a worker thread, which would then race
+            # the final flush below on the connection.
+            self.closing = True
+            self.wakeup.set()
+            await self.flusher
+            self.flusher = None
+        await self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def iter_interviews(path: str, completed_only: bool = True) -> Iterator[dict]:
+    """Streams interviews with their turns, oldest first, without loading the whole log."""
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    try:
+        where = "WHERE completed_at IS NOT NULL" if completed_only else ""
+        interviews = connection.execute(
+            f"SELECT interview_id, client_id, started_at, completed_at, phase, snapshot FROM interviews {where} "
+            "ORDER BY started_at"
+        )
+        for interview in interviews:
+            turns = connection.execute(
+                "SELECT ts, phase, user_text, alex_text, interrupted, timings FROM turns "
+                "WHERE interview_id = ? ORDER BY id",
+                (interview["interview_id"],),
+            )
+            session = load_session(interview["snapshot"])
+            yield {
+                "interview_id": interview["interview_id"],
+                "client_id": interview["client_id"],
+                "started_at": interview["started_at"],
+                "completed_at": interview["completed_at"],
+                "phase": interview["phase"],
+                "skills": session.skills,
+                "target_role": session.target_role,
+                "resume_text": session.resume_text,
+                "turns": [
+                    {
+                        "ts": turn["ts"],
+                        "phase": turn["phase"],
+                        "user": turn["user_text"],
+                        "alex": turn["alex_text"],
+                        "interrupted": bool(turn["interrupted"]),
+                        "timings": json.loads(turn["timings"]) if turn["timings"] else {},
+                    }
+                    for turn in turns
+                ],
+            }
+    finally:
+        connection.close()
+
+
+def export(path: str, out, completed_only: bool = True) -> int:
+    count = 0
+    for interview in iter_interviews(path, completed_only):
+        out.write(json.dumps(interview) + "\n")
+        count += 1
+    return count
+
+
+transcript_log = TranscriptLog(
+    settings.transcript_log_path,
+    flush_interval=settings.transcript_flush_interval_ms / 1000,
+    max_batch=settings.transcript_flush_max_batch,
+)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="write interviews as JSON lines")
+    export_parser.add_argument("out", help="output file, or - for stdout")
+    export_parser.add_argument("--all", action="store_true", help="include unfinished interviews")
+    export_parser.add_argument("--db", default=settings.transcript_log_path)
+    args = parser.parse_args()
+
+    if args.out == "-":
+        count = export(args.db, sys.stdout, not args.all)
+    else:
+        with open(args.out, "w") as f:
+            count = export(args.db, f, not args.all)
+    print(f"Exported {count} interviews.", file=sys.stderr)
@@ -0,0 +1,77 @@
+import asyncio
+import traceback
+from typing import Awaitable, Callable
+
+class TurnScheduler:
+    """
+    Runs the interviewer's response to each user turn as its own task, so the
+    WebSocket receive loop keeps reading audio while Alex is talking.
+
+    Submitting a new turn cancels the response still in flight (barge-in).
+    Cancellation propagates into the LLM and TTS streams, which closes them
+    upstream; the responder is expected to clean up its own state. A reply
+    that has been fully sent can still be playing on the client, so
+    `interrupt` is awaited on every new turn, after any cancellation.
+    """
+
+    def __init__(
+        self,
+        client_id: str,
+        respond: Callable[..., Awaitable[None]],
+        interrupt: Callable[[str], Awaitable[None]] | None = None,
+    ):
+        self.client_id = client_id
+        self.respond = respond
+        self.interrupt = interrupt
+        self.current: asyncio.Task | None = None
+
+    async def submit(self, user_text: str, **context):
+        """Extra keyword arguments are passed on to `respond`."""
+        if await self.cancel():
+            print(f"[{self.client_id}] Candidate interrupted; cancelled the in-flight reply.")
+        if self.interrupt is not None:
+            await self.interrupt(self.client_id)
+        self.current = asyncio.create_task(self._run(user_text, context))
+
+    async def run(self, coroutine: Awaitable[None]) -> bool:
+        """
+        Runs a line Alex says unprompted (the interview's first question)
+        as the in-flight response, so the candidate's next turn cancels it
+        like a reply. Waits for it; returns False if it was cancelled that
+        way, and raises what it raised otherwise.
+        """
+        await self.cancel()
+        task = self.current = asyncio.create_task(coroutine)
+        try:
+            await asyncio.wait([task])
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        if task.cancelled():
+            return False
+        task.result()
+        return True
+
+    async def _run(self, user_text: str, context: dict):
+        try:
+            await self.respond(self.client_id, user_text, **context)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"ERROR while responding to {self.client_id}: {e}")
+            traceback.print_exc()
+
+    async def cancel(self) -> bool:
+        """Cancels the in-flight response, if any. Returns whether one was running."""
+        task, self.current = self.current, None
+        if task is None or task.done():
+            return False
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return True
+
+    async def close(self):
+        await self.cancel()
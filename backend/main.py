@@ -1,22 +1,84 @@
 
-import os
-import uuid
-import aiofiles
+import asyncio
+import json
+import time
 import traceback
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File, WebSocket, WebSocketDisconnect, Form
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from langchain.schema import AIMessage, BaseMessage, HumanMessage
 
-from connection_manager import manager
+from config import settings
+from connection_manager import Utterance, manager
+import metrics
 from models.session import InterviewPhase
-from interview_flow.state_manager import create_session, get_session
-from interview_flow.prompt_factory import get_system_prompt
-from interview_flow.langchain_chain import create_interview_chain
-from services.elevenlabs_service import text_to_speech_and_visemes_stream 
-from services.groq_service import speech_to_text
-from services.resume_parser import parse_resume
+from interview_flow.state_manager import create_session, get_session, save_session, delete_session, get_initial_message, store
+from interview_flow.memory import count_tokens
+from interview_flow.prompt_factory import OPENING_LINE, CONCLUSION_LINE, PHASE_OPENING_INPUTS
+from interview_flow.langchain_chain import build_phase_chains, chain_inputs, get_phase_chain, summarize_history
+from interview_flow.speculation import speculator
+from interview_flow.streaming import SentenceSplitter, iter_sentences, stream_speech
+from interview_flow.turn_scheduler import TurnScheduler
+from interview_flow.transcript_log import transcript_log
+from services import upstream
+from services.tts_cache import tts_cache
+from services.stt import stt
+from services.streaming_asr import StreamingTranscriber, pcm_to_wav
+from services.vad import EnergyVAD
+from services import resume_parser
+from services.resume_parser import parse_resume_async, shutdown_executor
 
-app = FastAPI()
-os.makedirs("uploads", exist_ok=True)
+# Hosts to open connections to at startup.
+WARM_URLS = [
+    settings.groq_base_url or "https://api.groq.com",
+    settings.elevenlabs_base_url or "https://api.elevenlabs.io",
+]
+
+background_tasks: set = set()
+
+def run_in_background(coroutine):
+    task = asyncio.create_task(coroutine)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def warm_up():
+    """
+    Gets ready for the first candidate: compiled chains, the tokenizer, the
+    STT backend, the resume parser processes and open connections to the
+    upstream APIs. Whatever isn't done within startup_warmup_timeout_seconds
+    finishes in the background; the TTS cache of fixed phrases always does.
+    """
+    start = time.perf_counter()
+    build_phase_chains()
+    await manager.start()
+    await transcript_log.start()
+    run_in_background(tts_cache.prewarm(fixed_phrases()))
+    steps = [stt.start(), asyncio.to_thread(count_tokens, OPENING_LINE), resume_parser.prewarm()]
+    if settings.upstream_prewarm:
+        steps.append(upstream.prewarm(WARM_URLS))
+    tasks = [asyncio.create_task(step) for step in steps]
+    done, pending = await asyncio.wait(tasks, timeout=settings.startup_warmup_timeout_seconds)
+    for task in done:
+        task.result()
+    for task in pending:
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+    print(f"Warmed up in {time.perf_counter() - start:.2f}s ({len(pending)} steps still running).")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_up()
+    yield
+    shutdown_executor()
+    stt.close()
+    await upstream.aclose()
+    await transcript_log.close()
+    await manager.close()
+    await store.close()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:5173",
@@ -31,113 +93,495 @@ app.add_middleware(
     allow_headers=["*"], # Allows all headers
 )
 
+metrics.registry.register(metrics.Gauge(
+    "interview_active_connections", "Open candidate WebSockets in this process.",
+    lambda: len(manager.active_connections),
+))
+metrics.registry.register(metrics.Gauge(
+    "interview_send_queue_frames", "Frames waiting in the send queues of this process's WebSockets.",
+    lambda: sum(manager.queue_depths()),
+))
+metrics.registry.register(metrics.Gauge(
+    "interview_send_queue_max_frames", "Frames waiting in the longest send queue in this process.",
+    lambda: max(manager.queue_depths(), default=0),
+))
+metrics.registry.register(metrics.Gauge(
+    "interview_tts_cache_bytes", "Audio held in the TTS cache's memory tier.", lambda: tts_cache.size,
+))
+metrics.registry.register(metrics.Gauge(
+    "interview_sessions", "Interview sessions in the session store.", lambda: session_count,
+))
+# Read from the store when /metrics is scraped; gauge callbacks can't await.
+session_count = 0
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus exposition of per-stage latency histograms and gauges."""
+    global session_count
+    try:
+        session_count = await store.count()
+    except Exception as e:
+        print(f"Error counting sessions: {e}")
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+async def emit_tts(utterance: Utterance, stream_type: str, data):
+    if stream_type == "audio":
+        await utterance.audio(data)
+    elif stream_type == "viseme":
+        await utterance.viseme(data)
+
 async def speak(client_id: str, text: str):
     """
-    Streams audio and viseme data over the WebSocket.
-    """
-    async for stream_type, data in text_to_speech_and_visemes_stream(text):
-        if stream_type == "audio":
-            await manager.send_bytes(data, client_id)
-        elif stream_type == "viseme":
-            # Send viseme data as a structured JSON message
-            await manager.send_json(
-                {"type": "viseme", "data": data},
-                client_id
-            )
+    Streams audio and viseme data over the WebSocket, as one utterance.
+    """
+    utterance = manager.utterance(client_id)
+    async for stream_type, data in tts_cache.stream(text):
+        await emit_tts(utterance, stream_type, data)
+    await utterance.end()
+
 @app.post("/setup-interview/{client_id}")
 async def setup_interview(client_id: str, resume: UploadFile = File(...), skills: str = Form(...)):
     """
     Handles the initial setup: receives resume and skills,
     then kicks off the interview by sending the first audio prompt.
+
+    The first question doesn't draw on the resume (the BEHAVIORAL prompt
+    keeps it for the follow-up), so it is generated and synthesized while
+    the resume is still being parsed.
     """
-    session = get_session(client_id)
+    session = await get_session(client_id)
     if not session:
         return {"status": "error", "message": "Invalid session. Please reconnect."}
 
     try:
-        # 1. Process Resume
-        file_path = f"uploads/{uuid.uuid4()}_{resume.filename}"
-        async with aiofiles.open(file_path, 'wb') as out_file:
+        with upstream.deadline(settings.turn_budget_seconds):
+            # 1. Process Skills and start preparing the first question
+            session.skills = [skill.strip() for skill in skills.split(',')]
+            session.phase = InterviewPhase.BEHAVIORAL
+            speculate_opening(client_id, session, session.phase)
+
+            # 2. Process Resume (in memory, off the event loop)
             content = await resume.read()
-            await out_file.write(content)
-        session.resume_text = parse_resume(file_path)
-        os.remove(file_path)
-
-        # 2. Process Skills
-        session.skills = [skill.strip() for skill in skills.split(',')]
-        
-        # 3. Advance state to the start of the actual interview
-        session.phase = InterviewPhase.BEHAVIORAL
-        
-        # 4. Kick off the interview with the first question
-        system_prompt = get_system_prompt(session)
-        chain = create_interview_chain(system_prompt, session.chat_memory)
-        first_question = await chain.ainvoke({"input": "Start the interview now."})
-        
-        await speak(client_id, first_question)
+            session.resume_text = await parse_resume_async(content, resume.filename or "", resume.content_type)
+            await save_session(client_id, session)
+
+            # 3. Kick off the interview with the first question, as the
+            # in-flight response so that the candidate can cut it off. The
+            # socket may be held by another worker; then nothing can.
+            scheduler = schedulers.get(client_id)
+            if scheduler is not None:
+                await scheduler.run(open_phase(client_id, session))
+            else:
+                await open_phase(client_id, session)
 
         return {"status": "success", "message": "Interview setup complete. Starting now."}
     except Exception as e:
         print(f"CRITICAL ERROR during setup for {client_id}: {e}")
         traceback.print_exc()
         return {"status": "error", "message": f"Failed to set up interview. Server error: {e}"}
+    finally:
+        speculator.discard(client_id)
 
 
-async def handle_llm_response(client_id: str, text: str):
-    session = get_session(client_id)
-    system_prompt = get_system_prompt(session)
-    chain = create_interview_chain(system_prompt, session.chat_memory)
-    
-    response = await chain.ainvoke({"input": text})
-    await manager.active_connections[client_id].send_json({"type": "transcript", "data": f"Alex: {response}"})
-
-    phase_end_tokens = {
-        "[END_BEHAVIORAL]": ("Great, let's move on to some technical questions.", InterviewPhase.TECHNICAL),
-        "[END_TECHNICAL]": ("Excellent. Now let's move on to our coding round.", InterviewPhase.CODING),
-        "[END_CODING]": ("Thanks for walking me through that. We're almost at the end.", InterviewPhase.CONCLUSION),
-        "[END_CONCLUSION]": ("Thank you for your questions. I can now provide some feedback.", InterviewPhase.FEEDBACK),
-    }
-    
-    next_phase_transition_message = ""
-    for token, (message, next_phase) in phase_end_tokens.items():
-        if token in response:
-            response = response.replace(token, "").strip()
-            session.phase = next_phase
-            next_phase_transition_message = message
-            break
-
-    if response:
-        await speak(client_id, response)
-    
-    if next_phase_transition_message:
-        await speak(client_id, next_phase_transition_message)
+PHASE_END_TOKENS = {
+    "[END_BEHAVIORAL]": ("Great, let's move on to some technical questions.", InterviewPhase.TECHNICAL),
+    "[END_TECHNICAL]": ("Excellent. Now let's move on to our coding round.", InterviewPhase.CODING),
+    "[END_CODING]": ("Thanks for walking me through that. We're almost at the end.", InterviewPhase.CONCLUSION),
+    "[END_CONCLUSION]": ("Thank you for your questions. I can now provide some feedback.", InterviewPhase.FEEDBACK),
+}
+
+def fixed_phrases() -> list[str]:
+    """
+    Lines the interviewer says verbatim, plus their sentence splits (the
+    streaming path synthesizes LLM replies one sentence at a time).
+    """
+    lines = [message for message, _ in PHASE_END_TOKENS.values()]
+    lines += [get_initial_message(phase) for phase in InterviewPhase]
+    lines += [OPENING_LINE, CONCLUSION_LINE]
+    phrases = set(lines)
+    for line in lines:
+        splitter = SentenceSplitter()
+        phrases.update(splitter.feed(line + " "))
+        phrases.update(splitter.flush())
+    return sorted(phrase for phrase in phrases if phrase)
+
+def phase_transition(phase_tokens: list[str]) -> tuple[str, InterviewPhase] | None:
+    """The transition line and next phase for the first phase token in a reply, if any."""
+    for token in phase_tokens:
+        if token in PHASE_END_TOKENS:
+            return PHASE_END_TOKENS[token]
+    return None
+
+def speculate_opening(client_id: str, session, phase: InterviewPhase, history_tail: list[BaseMessage] = ()):
+    """
+    Starts preparing Alex's first line in `phase` from the conversation so
+    far plus `history_tail`, the turns that will be in memory by the time
+    the line is spoken. open_phase uses it if nothing has changed by then.
+    """
+    if not speculator.enabled:
+        return
+    inputs = chain_inputs(session, PHASE_OPENING_INPUTS[phase])
+    inputs["history"] = [*inputs["history"], *history_tail]
+    chain = get_phase_chain(phase)
+    speculator.start(
+        client_id,
+        (session.interview_id, phase),
+        lambda: chain.ainvoke(inputs, config={"metadata": {"client_id": client_id}}),
+        tts_cache.stream,
+    )
+
+async def open_phase(client_id: str, session):
+    """
+    Speaks Alex's first line in the session's current phase without waiting
+    for the candidate. It is usually ready, prepared by speculate_opening
+    while the previous reply was playing; otherwise it is generated now.
+    Like a reply, it is recorded once sent; if it is cut off, only what the
+    candidate heard is recorded.
+    """
+    phase = session.phase
+    opening_input = PHASE_OPENING_INPUTS[phase]
+    start = time.perf_counter()
+    speculation = await speculator.take(client_id, (session.interview_id, phase))
+    if speculation is not None:
+        text = speculation.text
+        audio = speculation.stream() if speculation.synthesizing else tts_cache.stream(text)
+    else:
+        text = await get_phase_chain(phase).ainvoke(
+            chain_inputs(session, opening_input), config={"metadata": {"client_id": client_id}}
+        )
+        audio = tts_cache.stream(text)
+
+    utterance = manager.utterance(client_id)
+    try:
+        first = True
+        async for stream_type, data in audio:
+            if first:
+                metrics.observe("phase_opening", time.perf_counter() - start, client_id, phase.value)
+                first = False
+            await emit_tts(utterance, stream_type, data)
+        utterance.mark(text)
+        await utterance.end()
+    except asyncio.CancelledError:
+        if speculation is not None:
+            # take() handed it over, so speculator.discard() can't stop its TTS any more.
+            speculation.cancel()
+        await stop_speaking(client_id, session)
+        played = utterance.played_text()
+        session.chat_memory.save_context({"input": opening_input}, {"output": played})
+        await save_session(client_id, session)
+        transcript_log.record_turn(client_id, session, None, played, interrupted=True)
+        raise
+
+    # stop_speaking trims it if the candidate cuts in while it is playing.
+    session.chat_memory.save_context({"input": opening_input}, {"output": text})
+    await save_session(client_id, session)
+    transcript_log.record_turn(client_id, session, None, text, completed=phase == InterviewPhase.FEEDBACK)
+
+async def stop_speaking(client_id: str, session=None):
+    """
+    Cuts Alex off when the candidate takes the turn. If they may still be
+    hearing earlier lines, the client is told to flush, and chat memory
+    keeps only the sentences that were played before the cut.
+    """
+    cut = await manager.stop_speaking(client_id)
+    if not cut:
+        return
+    session = session or await get_session(client_id)
+    if session is None:
+        return
+    messages = session.chat_memory.chat_memory.messages
+    trimmed = False
+    for utterance in cut:
+        for i in range(len(messages) - 1, -1, -1):
+            if messages[i].type == "ai" and utterance.sentences and messages[i].content == utterance.text:
+                messages[i] = AIMessage(content=utterance.played_text())
+                trimmed = True
+                break
+    if trimmed:
+        await save_session(client_id, session)
+
+# client_id -> the summary fold running for that client; one at a time.
+folding: dict[str, asyncio.Task] = {}
+
+def fold_history_later(client_id: str, session):
+    """
+    Folds the turns that fell out of the verbatim window into the running
+    summary, in the background. The summary is an optimization: until it
+    is done (or if the summarizer fails), those turns are sent verbatim.
+    """
+    memory = session.chat_memory
+    if not memory.pending or client_id in folding:
+        return
+    based_on, folded = memory.summary, list(memory.pending)
+
+    async def fold():
+        try:
+            summary = await summarize_history(based_on, folded)
+        except Exception as e:
+            print(f"[{client_id}] Could not summarize earlier turns, keeping them verbatim: {e}")
+            return
+        finally:
+            folding.pop(client_id, None)
+        memory.apply_summary(based_on, folded, summary)
+        # A shared store hands out copies; the stored one may have moved on.
+        current = await get_session(client_id)
+        if current is not None and current.interview_id == session.interview_id:
+            if current is not session:
+                current.chat_memory.apply_summary(based_on, folded, summary)
+            await save_session(client_id, current)
+
+    folding[client_id] = run_in_background(fold())
+
+async def live_session(client_id: str):
+    """
+    The session of a connected client. The store may have dropped it while
+    the socket sat idle (LRU overflow or the idle TTL); it is then restored
+    from the transcript log if it can be. Otherwise the client is told, and
+    None is returned.
+    """
+    session = await get_session(client_id)
+    if session is not None:
+        return session
+    session = await transcript_log.restore(client_id)
+    if session is None:
+        print(f"[{client_id}] Session expired while connected.")
+        await manager.send_json({"type": "session_expired"}, client_id)
+        # The socket is closed next; let the message go out first.
+        await manager.drain(client_id)
+        return None
+    print(f"[{client_id}] Session expired while connected; restored it from the transcript log.")
+    await save_session(client_id, session)
+    return session
+
+async def handle_llm_response(client_id: str, text: str, timings: dict[str, float] | None = None):
+    """
+    Streams the LLM reply sentence by sentence into TTS so that the first
+    sentence is already playing while the rest is still being generated.
+    A reply that ends the phase is followed by the transition line and the
+    next phase's opening, which is prepared as soon as the reply is known.
+
+    If the candidate interrupts, the task is cancelled: queued audio is
+    dropped, the client is told to flush its playback buffer, and only the
+    sentences the candidate has heard are kept in chat memory (see
+    stop_speaking, which also covers a reply that has been fully sent but
+    is still playing).
+    """
+    session = await live_session(client_id)
+    if session is None:
+        return
+    phase = session.phase.value
+    # Anything prepared for the conversation before this turn is stale now.
+    speculator.discard(client_id)
+    # Stage durations of this turn, for the transcript log.
+    timings = dict(timings or {})
+    start = time.perf_counter()
+    with metrics.span("prompt_build", client_id, phase):
+        chain = get_phase_chain(session.phase)
+        inputs = chain_inputs(session, text)
+    timings["prompt_build"] = time.perf_counter() - start
+
+    splitter = SentenceSplitter()
+    utterance = manager.utterance(client_id)
+
+    async def timed_tokens():
+        start = time.perf_counter()
+        first = True
+        async for token in chain.astream(inputs, config={"metadata": {"client_id": client_id}}):
+            if first:
+                timings["llm_first_token"] = time.perf_counter() - start
+                metrics.observe("llm_first_token", timings["llm_first_token"], client_id, phase)
+                first = False
+            yield token
+        timings["llm_total"] = time.perf_counter() - start
+        metrics.observe("llm_total", timings["llm_total"], client_id, phase)
+
+    async def timed_tts(sentence: str):
+        start = time.perf_counter()
+        first = True
+        async for item in tts_cache.stream(sentence):
+            if first:
+                elapsed = time.perf_counter() - start
+                timings.setdefault("tts_first_chunk", elapsed)
+                metrics.observe("tts_first_chunk", elapsed, client_id, phase)
+                first = False
+            yield item
+
+    async def reply_sentences():
+        generated = []
+        async for sentence in iter_sentences(timed_tokens(), splitter):
+            generated.append(sentence)
+            yield sentence
+        transition = phase_transition(splitter.phase_tokens)
+        if transition is not None:
+            reply = [HumanMessage(content=text), AIMessage(content=" ".join(generated))]
+            speculate_opening(client_id, session, transition[1], reply)
+        # The full reply is known as soon as the LLM stream ends, which is
+        # usually well before the last sentence has finished playing.
+        await manager.send_json(
+            {"type": "transcript", "data": f"Alex: {' '.join(generated)}", "utterance": utterance.id}, client_id
+        )
+
+    async def sentence_done(sentence: str):
+        utterance.mark(sentence)
+
+    try:
+        spoken = await stream_speech(
+            reply_sentences(),
+            timed_tts,
+            lambda stream_type, data: emit_tts(utterance, stream_type, data),
+            sentence_done=sentence_done,
+        )
+        await utterance.end()
+    except asyncio.CancelledError:
+        speculator.discard(client_id)
+        await stop_speaking(client_id, session)
+        played = utterance.played_text()
+        session.chat_memory.save_context({"input": text}, {"output": played})
+        await save_session(client_id, session)
+        transcript_log.record_turn(client_id, session, text, played, timings, interrupted=True)
+        raise
+
+    session.chat_memory.save_context({"input": text}, {"output": " ".join(spoken)})
+    await save_session(client_id, session)
+    transcript_log.record_turn(client_id, session, text, " ".join(spoken), timings)
+
+    transition = phase_transition(splitter.phase_tokens)
+    if transition is not None:
+        next_phase_transition_message, session.phase = transition
+        await save_session(client_id, session)
+        transcript_log.record_turn(client_id, session, None, next_phase_transition_message)
+    # Older turns are folded into the running summary while the candidate is
+    # still listening, without holding up the transition or the turn.
+    fold_history_later(client_id, session)
+
+    if transition is not None:
+        try:
+            await speak(client_id, next_phase_transition_message)
+            await open_phase(client_id, session)
+        except asyncio.CancelledError:
+            speculator.discard(client_id)
+            await stop_speaking(client_id, session)
+            raise
+
+# client_id -> the turn scheduler of the client's socket on this worker.
+schedulers: dict[str, TurnScheduler] = {}
+
+async def handle_user_text(client_id: str, user_text: str, scheduler: TurnScheduler, stt_seconds: float):
+    print(f"[{client_id}] User said: {user_text}")
+    await manager.send_json({"type": "transcript", "data": f"You: {user_text}"}, client_id)
+
+    if user_text.strip():
+        await scheduler.submit(user_text, timings={"stt": stt_seconds})
 
 @app.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
+    """
+    Binary frames are audio. By default each frame is one complete webm
+    utterance. After a {"type": "start_stream", "sample_rate": 16000} text
+    message, binary frames are a continuous stream of 16-bit mono PCM; the
+    server finds end-of-speech itself and transcribes in overlapping windows
+    while the candidate is still talking.
+
+    A client that reconnects with the client_id of an unfinished interview
+    (after a dropped connection or a server restart) gets it back from the
+    transcript log, and is told so with {"type": "resumed", "phase": ...}.
+
+    If the session expires while the client is connected and can't be
+    restored, the client gets {"type": "session_expired"} and the socket is
+    closed.
+
+    Server messages use the legacy format unless the client asks for the
+    binary framing with {"type": "hello", "protocol": 2}; see protocol.py.
+    """
+    # The session must exist before the socket is accepted: clients post
+    # /setup-interview as soon as they are connected.
+    session = await get_session(client_id) or await transcript_log.restore(client_id)
+    resumed = session is not None
+    if resumed:
+        await save_session(client_id, session)
+    else:
+        session = await create_session(client_id)
     await manager.connect(websocket, client_id)
-    session = create_session(client_id)
+    if resumed:
+        print(f"[{client_id}] Resumed interview {session.interview_id} in phase {session.phase.value}.")
+        await manager.send_json({"type": "resumed", "phase": session.phase.value}, client_id)
+    # Phase label for metrics; refreshed once per utterance rather than per frame.
+    phase = session.phase.value
+    streaming: StreamingTranscriber | None = None
+    # Responses run in their own task so this loop keeps receiving audio
+    # while Alex is talking; a new turn cancels the reply in flight.
+    scheduler = schedulers[client_id] = TurnScheduler(client_id, handle_llm_response, interrupt=stop_speaking)
     
     try:
         while True:
-            data = await websocket.receive_bytes()
-            
-            audio_path = f"uploads/{client_id}_audio.webm"
-            async with aiofiles.open(audio_path, 'wb') as f:
-                await f.write(data)
-            
-            user_text = await speech_to_text(audio_path)
-            os.remove(audio_path)
-            
-            print(f"[{client_id}] User said: {user_text}")
-            await manager.active_connections[client_id].send_json({"type": "transcript", "data": f"You: {user_text}"})
-
-            if user_text.strip():
-                await handle_llm_response(client_id, user_text)
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            if message.get("text") is not None:
+                control = json.loads(message["text"])
+                if control.get("type") == "hello":
+                    version = manager.negotiate(client_id, control.get("protocol"))
+                    print(f"[{client_id}] Using WebSocket protocol version {version}.")
+                elif control.get("type") == "start_stream":
+                    sample_rate = int(control.get("sample_rate", 16000))
+
+                    async def transcribe_window(pcm: bytes, sample_rate=sample_rate) -> str:
+                        with metrics.span("stt_window", client_id, phase):
+                            return await stt.transcribe(pcm_to_wav(pcm, sample_rate), "audio.wav")
+
+                    streaming = StreamingTranscriber(
+                        transcribe_window,
+                        sample_rate=sample_rate,
+                        window_s=settings.asr_window_seconds,
+                        overlap_s=settings.asr_overlap_seconds,
+                        vad=EnergyVAD(sample_rate=sample_rate, end_silence_ms=settings.vad_end_silence_ms),
+                    )
+                continue
+
+            data = message["bytes"]
+            metrics.audio_received_bytes.inc(len(data))
+            # Every upstream call made for this utterance, including the
+            # reply task started from it, shares one turn deadline.
+            with upstream.deadline(settings.turn_budget_seconds):
+                if streaming is not None:
+                    start = time.perf_counter()
+                    transcripts = await streaming.feed(data)
+                    elapsed = time.perf_counter() - start
+                    # Frames that complete an utterance wait for the last STT
+                    # window; the others only cost VAD and buffering.
+                    metrics.observe("stt" if transcripts else "audio_receive", elapsed, client_id, phase)
+                    for user_text in transcripts:
+                        await handle_user_text(client_id, user_text, scheduler, elapsed)
+                    if transcripts:
+                        session = await live_session(client_id)
+                        if session is None:
+                            break
+                        phase = session.phase.value
+                else:
+                    session = await live_session(client_id)
+                    if session is None:
+                        break
+                    phase = session.phase.value
+                    # The frame is transcribed straight from memory; nothing touches disk.
+                    start = time.perf_counter()
+                    user_text = await stt.transcribe(data)
+                    elapsed = time.perf_counter() - start
+                    metrics.observe("stt", elapsed, client_id, phase)
+                    await handle_user_text(client_id, user_text, scheduler, elapsed)
 
     except WebSocketDisconnect:
-        manager.disconnect(client_id)
         print(f"Client {client_id} disconnected.")
     except Exception as e:
         print(f"CRITICAL ERROR in WebSocket loop for {client_id}: {e}")
         traceback.print_exc()
-        manager.disconnect(client_id)
\ No newline at end of file
+    finally:
+        # Stop the in-flight reply first; it still writes to the session.
+        if schedulers.get(client_id) is scheduler:
+            del schedulers[client_id]
+        await scheduler.close()
+        speculator.discard(client_id)
+        if streaming is not None:
+            streaming.close()
+        await manager.disconnect(client_id)
+        await delete_session(client_id)
\ No newline at end of file
@@ -0,0 +1,164 @@
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable
+
+# Latency buckets in seconds, from sub-frame sends up to full LLM replies.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Histogram:
+    """
+    Minimal Prometheus histogram. An observation is a bisect and three
+    increments, cheap enough to leave on in production.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            # [per-bucket counts (+Inf last), sum, count]
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, *labels):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+class Gauge:
+    """A gauge whose value is read from a callback at scrape time."""
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge", f"{self.name} {self.read()}"]
+
+class Registry:
+    def __init__(self):
+        self.metrics: list = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # A failing gauge callback (e.g. Redis down) shouldn't break the scrape.
+                print(f"Error rendering metric {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+stage_seconds = registry.register(Histogram(
+    "interview_stage_seconds",
+    "Duration of each stage of a conversational turn.",
+    ("stage", "phase"),
+))
+audio_received_bytes = registry.register(Counter(
+    "interview_audio_received_bytes_total", "Audio bytes received from candidates.",
+))
+send_frames_dropped = registry.register(Counter(
+    "interview_send_frames_dropped_total", "Outbound audio frames dropped by the send queue policy.",
+))
+send_frames_coalesced = registry.register(Counter(
+    "interview_send_frames_coalesced_total", "Outbound audio frames merged into the message before them.",
+))
+send_frames_late = registry.register(Counter(
+    "interview_send_frames_late_total", "Outbound frames that waited longer than send_late_after_ms.",
+))
+upstream_queue_seconds = registry.register(Histogram(
+    "interview_upstream_queue_seconds",
+    "Time upstream requests waited for a concurrency slot or rate-limit token.",
+    ("upstream",),
+))
+upstream_requests = registry.register(Counter(
+    "interview_upstream_requests_total", "Upstream HTTP requests by outcome.", ("upstream", "outcome"),
+))
+upstream_retries = registry.register(Counter(
+    "interview_upstream_retries_total", "Upstream requests retried after an error.", ("upstream",),
+))
+upstream_hedges = registry.register(Counter(
+    "interview_upstream_hedges_total", "Backup requests started because the first was slow or failed.", ("upstream",),
+))
+stt_batch_size = registry.register(Histogram(
+    "interview_stt_batch_size", "Utterances transcribed together by the local STT backend.",
+    buckets=(1, 2, 4, 8, 16, 32),
+))
+tts_cache_lookups = registry.register(Counter(
+    "interview_tts_cache_lookups_total", "TTS cache lookups, by outcome (hit or miss).", ("outcome",),
+))
+tts_cache_evictions = registry.register(Counter(
+    "interview_tts_cache_evictions_total", "Entries evicted from the TTS cache's memory tier.",
+))
+transcript_turns = registry.register(Counter(
+    "interview_transcript_turns_total", "Turns recorded in the transcript log.",
+))
+transcript_flush_seconds = registry.register(Histogram(
+    "interview_transcript_flush_seconds", "Time to write one batch of the transcript log to SQLite.",
+))
+speculations = registry.register(Counter(
+    "interview_speculations_total", "Interviewer lines prepared ahead of time, by outcome.", ("outcome",),
+))
+relay_frames = registry.register(Counter(
+    "interview_relay_frames_total", "Frames relayed to the worker holding a client's WebSocket.", ("outcome",),
+))
+
+# The most recent spans with their session, for debugging a single interview.
+recent_spans: deque[tuple[str, str, str, float, float]] = deque(maxlen=4096)
+
+def observe(stage: str, seconds: float, client_id: str = "-", phase: str = "-"):
+    stage_seconds.observe(seconds, stage, phase)
+    recent_spans.append((client_id, stage, phase, time.time(), seconds))
+
+@contextmanager
+def span(stage: str, client_id: str = "-", phase: str = "-"):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start, client_id, phase)
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from enum import Enum
-from langchain.memory import ConversationBufferMemory
+from uuid import uuid4
+from interview_flow.memory import TokenBudgetMemory
 
 class InterviewPhase(str, Enum):
     INTRODUCTION = "INTRODUCTION"
@@ -13,14 +14,13 @@ class InterviewPhase(str, Enum):
     FEEDBACK = "FEEDBACK"
 
 class InterviewSession(BaseModel):
+    # Identifies this interview in the transcript log; a client_id can be reused.
+    interview_id: str = Field(default_factory=lambda: uuid4().hex)
     phase: InterviewPhase = InterviewPhase.INTRODUCTION
     resume_text: str | None = None
     skills: list[str] = Field(default_factory=list)
     target_role: str | None = None
-    # Fix for the deprecation warning
-    chat_memory: ConversationBufferMemory = Field(
-        default_factory=lambda: ConversationBufferMemory(return_messages=True, memory_key="history")
-    )
+    chat_memory: TokenBudgetMemory = Field(default_factory=TokenBudgetMemory)
 
     class Config:
         arbitrary_types_allowed = True
\ No newline at end of file
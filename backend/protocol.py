@@ -0,0 +1,90 @@
+"""
+Wire format of the candidate WebSocket, server to client.
+
+Version 1 (legacy, the default): binary messages are raw MP3 chunks and
+text messages are JSON control messages.
+
+Version 2 is negotiated by sending {"type": "hello", "protocol": 2} as a
+text message. The server answers {"type": "hello", "protocol": n} (still as
+text) with the version it uses from then on; messages queued before the
+answer are sent in version 1. In version 2 every server message is binary
+and holds one or more frames, each a 20-byte little-endian header and a
+payload:
+
+    offset  size  field
+    0       1     type: 1 audio, 2 viseme, 3 control
+    1       1     flags: 1 = end of utterance (an empty audio frame)
+    2       2     reserved, 0
+    4       4     utterance id: one line of Alex's speech
+    8       4     sequence number within the utterance
+    12      4     timestamp: milliseconds into the utterance's audio
+    16      4     payload length
+    20            payload: MP3 bytes for audio, UTF-8 JSON otherwise
+
+Consecutive audio frames may share one message. Control payloads are the
+same JSON objects version 1 sends as text. Client-to-server messages are
+unchanged in both versions.
+"""
+import json
+import random
+import struct
+from typing import Iterator, NamedTuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LEGACY, BINARY = 1, 2
+SUPPORTED_VERSIONS = (LEGACY, BINARY)
+
+AUDIO, VISEME, CONTROL = 1, 2, 3
+FLAG_END = 1
+
+HEADER = struct.Struct("<BBHIIII")
+
+
+class Frame(NamedTuple):
+    type: int
+    flags: int
+    utterance: int
+    seq: int
+    timestamp_ms: int
+    payload: memoryview
+
+
+def header(type: int, utterance: int, seq: int, timestamp_ms: int, length: int, flags: int = 0) -> bytes:
+    return HEADER.pack(type, flags, 0, utterance, seq, timestamp_ms, length)
+
+
+def parse(message: bytes | memoryview) -> Iterator[Frame]:
+    """The frames in a version 2 message; payloads are views into `message`."""
+    view = memoryview(message)
+    offset = 0
+    while offset < len(view):
+        type, flags, _, utterance, seq, timestamp_ms, length = HEADER.unpack_from(view, offset)
+        offset += HEADER.size
+        yield Frame(type, flags, utterance, seq, timestamp_ms, view[offset:offset + length])
+        offset += length
+
+
+def dumps(message) -> bytes:
+    """Compact JSON, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(message)
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def negotiate(requested) -> int:
+    """The highest version we support that doesn't exceed the client's."""
+    try:
+        requested = int(requested)
+    except (TypeError, ValueError):
+        return LEGACY
+    return max((version for version in SUPPORTED_VERSIONS if version <= requested), default=LEGACY)
+
+
+def new_utterance_id() -> int:
+    # Random rather than counted, so that workers relaying frames for the
+    # same client don't need to agree on the next id.
+    return random.getrandbits(32) or 1
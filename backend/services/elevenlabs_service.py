@@ -2,36 +2,35 @@
 
 from elevenlabs.client import AsyncElevenLabs
 from config import settings
-import json
+from services import upstream
 
-client = AsyncElevenLabs(api_key=settings.elevenlabs_api_key)
+client = AsyncElevenLabs(
+    api_key=settings.elevenlabs_api_key,
+    base_url=settings.elevenlabs_base_url,
+    timeout=settings.upstream_read_timeout,
+    httpx_client=upstream.client("tts"),
+)
 
-async def text_to_speech_and_visemes_stream(text: str):
+VOICE_ID = "21m00Tcm4TlvDq8ikWAM"  # Rachel
+MODEL_ID = "eleven_multilingual_v2"
+OUTPUT_FORMAT = "mp3_44100_128"  # Standard MP3 format, supported by all plans
+# Constant bitrate, so a byte offset into the audio is a playback time.
+OUTPUT_BYTES_PER_MS = 128 / 8
+
+async def stream_audio(text: str, voice_id: str = VOICE_ID, model_id: str = MODEL_ID, output_format: str = OUTPUT_FORMAT):
     """
-    Generates a stream of audio data from ElevenLabs.
-    NOTE: Viseme streaming is commented out as it requires a specific subscription plan.
+    Yields raw MP3 chunks from ElevenLabs. Errors are raised to the caller.
+    Visemes need a plan with timestamped streaming; the TTS cache, which
+    callers go through, yields ("viseme", data) items alongside the audio
+    for when they are added.
     """
-    try:
-        # THE FIX: We are using a standard mp3 format that is supported by all plans.
-        # This will get the audio working again.
-        async for chunk in client.text_to_speech.stream(
-            text=text,
-            voice_id="21m00Tcm4TlvDq8ikWAM",  # Rachel
-            model_id="eleven_multilingual_v2",
-            output_format="mp3_44100_128",  # Standard, high-quality MP3 format
-        ):
-            # We only expect audio data now.
-            if chunk:
-                yield "audio", chunk
-
-            # The code below is for when you have a plan that supports visemes.
-            # if chunk.get("audio"):
-            #     yield "audio", chunk["audio"]
-            # if chunk.get("visemes"):
-            #     viseme_json_string = chunk["visemes"]
-            #     visemes = json.loads(viseme_json_string)
-            #     for viseme in visemes['viseme_chunks']:
-            #         yield "viseme", viseme
-
-    except Exception as e:
-        print(f"Error streaming from ElevenLabs: {e}")
\ No newline at end of file
+    async for chunk in client.text_to_speech.stream(
+        text=text,
+        voice_id=voice_id,
+        model_id=model_id,
+        output_format=output_format,
+        # Retries happen in the upstream transport, before the first byte.
+        request_options={"max_retries": 0},
+    ):
+        if chunk:
+            yield chunk
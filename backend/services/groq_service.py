@@ -1,16 +1,41 @@
 from groq import AsyncGroq
 from config import settings
-import aiofiles
+from services import upstream
 
-client = AsyncGroq(api_key=settings.groq_api_key)
+# Retries, timeouts and concurrency are handled by the upstream transport.
+client = AsyncGroq(
+    api_key=settings.groq_api_key,
+    base_url=settings.groq_base_url,
+    max_retries=0,
+    timeout=upstream.timeout,
+    http_client=upstream.client("stt"),
+)
 
-async def speech_to_text(audio_filepath: str) -> str:
-    """Transcribes audio using Groq Whisper API."""
-    async with aiofiles.open(audio_filepath, "rb") as f:
-        audio_data = await f.read()
-    
+async def transcribe(audio: bytes, filename: str, model: str) -> str:
     transcription = await client.audio.transcriptions.create(
-        file=(audio_filepath, audio_data),
-        model="whisper-large-v3",
+        file=(filename, audio),
+        model=model,
+    )
+    return transcription.text
+
+async def speech_to_text(audio: bytes | memoryview, filename: str = "audio.webm") -> str:
+    """
+    Transcribes an in-memory audio buffer using Groq Whisper API.
+    The filename is only used by the API to infer the container format.
+    """
+    if isinstance(audio, memoryview):
+        # The multipart encoder needs bytes. A view over a whole bytes object
+        # can hand back the original buffer; only slices have to be copied.
+        if isinstance(audio.obj, bytes) and audio.nbytes == len(audio.obj):
+            audio = audio.obj
+        else:
+            audio = audio.tobytes()
+
+    # A slow or failed transcription is raced against the hedge model; the
+    # candidate is waiting on this call.
+    models = [settings.stt_model] + ([settings.stt_hedge_model] if settings.stt_hedge_model else [])
+    return await upstream.hedged(
+        [lambda model=model: transcribe(audio, filename, model) for model in models],
+        settings.stt_hedge_after_ms / 1000,
+        "stt",
     )
-    return transcription.text
\ No newline at end of file
@@ -1,15 +1,102 @@
+import asyncio
+import hashlib
+import io
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
 import docx
 from pypdf import PdfReader
+from config import settings
+
+def detect_format(data: bytes, filename: str = "", content_type: str | None = None) -> str | None:
+    if data.startswith(b"%PDF") or content_type == "application/pdf" or filename.lower().endswith(".pdf"):
+        return "pdf"
+    if filename.lower().endswith(".docx") or (content_type or "").endswith("wordprocessingml.document"):
+        return "docx"
+    return None
+
+def parse_resume(data: bytes, filename: str = "", content_type: str | None = None) -> str:
+    """Extracts text from an in-memory PDF or DOCX file."""
+    match detect_format(data, filename, content_type):
+        case "pdf":
+            reader = PdfReader(io.BytesIO(data))
+            return "".join(page.extract_text() or "" for page in reader.pages)
+        case "docx":
+            doc = docx.Document(io.BytesIO(data))
+            return "".join(para.text + "\n" for para in doc.paragraphs)
+        case _:
+            # For simplicity, we only support PDF and DOCX.
+            return ""
+
+# Text extraction is CPU-bound, so it runs in a bounded process pool to keep
+# the event loop (and every other candidate's audio) responsive.
+_executor: ProcessPoolExecutor | None = None
+_slots = asyncio.Semaphore(settings.resume_parser_workers * 2)
+
+# Parsed text keyed by a hash of the file content, so re-uploading the same
+# resume returns immediately. Concurrent uploads of the same file share one
+# parse.
+_cache: OrderedDict[str, str] = OrderedDict()
+_in_flight: dict[str, asyncio.Future] = {}
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.resume_parser_workers)
+    return _executor
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+def _ready() -> bool:
+    return True
+
+async def prewarm():
+    """Starts the worker processes ahead of the first upload."""
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(
+        loop.run_in_executor(get_executor(), _ready) for _ in range(settings.resume_parser_workers)
+    ))
+
+async def parse_resume_async(data: bytes, filename: str = "", content_type: str | None = None) -> str:
+    key = hashlib.sha256(data).hexdigest()
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    if key in _in_flight:
+        pending = _in_flight[key]
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            # Either we were cancelled, or the upload that was parsing it was
+            # (see below); in that case, parse it ourselves.
+            if not pending.cancelled():
+                raise
+        return await parse_resume_async(data, filename, content_type)
 
-def parse_resume(file_path: str) -> str:
-    """Extracts text from a PDF or DOCX file."""
-    text = ""
-    if file_path.endswith(".pdf"):
-        reader = PdfReader(file_path)
-        for page in reader.pages:
-            text += page.extract_text() or ""
-    elif file_path.endswith(".docx"):
-        doc = docx.Document(file_path)
-        for para in doc.paragraphs:
-            text += para.text + "\n"
-    return text
\ No newline at end of file
+    future = asyncio.get_running_loop().create_future()
+    _in_flight[key] = future
+    try:
+        async with _slots:
+            text = await asyncio.get_running_loop().run_in_executor(
+                get_executor(), parse_resume, data, filename, content_type
+            )
+    except Exception as e:
+        future.set_exception(e)
+        # Mark the exception as retrieved in case nobody else was waiting.
+        future.exception()
+        raise
+    else:
+        future.set_result(text)
+        _cache[key] = text
+        if len(_cache) > settings.resume_cache_size:
+            _cache.popitem(last=False)
+        return text
+    finally:
+        if not future.done():
+            # Cancelled: release anyone waiting on this parse.
+            future.cancel()
+        del _in_flight[key]
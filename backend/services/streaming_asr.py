@@ -0,0 +1,152 @@
+import asyncio
+import re
+import struct
+from typing import Awaitable, Callable
+
+from services.vad import EnergyVAD
+
+def pcm_to_wav(pcm: bytes, sample_rate: int = 16000) -> bytes:
+    """Wraps 16-bit mono PCM in a WAV header so Whisper can decode it."""
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + len(pcm), b"WAVE", b"fmt ", 16, 1, 1,
+        sample_rate, sample_rate * 2, 2, 16, b"data", len(pcm),
+    )
+    return header + pcm
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+def stitch(previous: str, new: str, search_words: int = 12) -> str:
+    """
+    Joins the transcripts of two overlapping windows. The longest run of
+    words shared by the end of `previous` and the start of `new` is taken as
+    the overlap, the latest one if there are several (a short overlap is
+    often a single word, which may also occur earlier); from there on the
+    newer window wins, since it heard those words with more context.
+    """
+    prev_words, new_words = previous.split(), new.split()
+    if not prev_words:
+        return new
+    if not new_words:
+        return previous
+    tail = max(0, len(prev_words) - search_words)
+    a = [_normalize(w) for w in prev_words[tail:]]
+    b = [_normalize(w) for w in new_words[:search_words]]
+    # runs[i][j]: length of the shared run ending at a[i - 1] and b[j - 1].
+    runs = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    size = end_a = end_b = 0
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            if a[i - 1] == b[j - 1]:
+                runs[i][j] = runs[i - 1][j - 1] + 1
+                if runs[i][j] > size or (runs[i][j] == size and i > end_a):
+                    size, end_a, end_b = runs[i][j], i, j
+    if size == 0:
+        return previous + " " + new
+    return " ".join(prev_words[:tail + end_a - size] + new_words[end_b - size:])
+
+class StreamingTranscriber:
+    """
+    Turns a continuous stream of 16-bit mono PCM frames into utterance
+    transcripts.
+
+    While the candidate is speaking, every `window_s` of audio is sent to the
+    transcriber in the background, each window overlapping the previous one
+    by `overlap_s` so that words cut at a boundary are heard whole once. When
+    the VAD detects end-of-speech only the final window is left to
+    transcribe, and the window transcripts are stitched together. A window
+    whose transcription fails is tried once more, then left out, so one
+    upstream error costs a few words rather than the whole utterance.
+    """
+
+    def __init__(
+        self,
+        transcribe: Callable[[bytes], Awaitable[str]],
+        sample_rate: int = 16000,
+        window_s: float = 4.0,
+        overlap_s: float = 0.75,
+        preroll_s: float = 0.3,
+        tail_s: float = 0.2,
+        vad: EnergyVAD | None = None,
+    ):
+        self.transcribe = transcribe
+        self.sample_rate = sample_rate
+        self.vad = vad or EnergyVAD(sample_rate=sample_rate)
+        to_bytes = lambda seconds: int(seconds * sample_rate) * 2
+        self.window_bytes = to_bytes(window_s)
+        self.overlap_bytes = to_bytes(overlap_s)
+        self.preroll_bytes = to_bytes(preroll_s)
+        self.tail_bytes = to_bytes(tail_s)
+        # `audio` holds the stream from absolute byte offset `base` onwards.
+        self.audio = bytearray()
+        self.base = 0
+        self.window_start: int | None = None
+        self.windows: list[asyncio.Task] = []
+
+    @property
+    def end(self) -> int:
+        return self.base + len(self.audio)
+
+    def _segment(self, start: int, end: int) -> bytes:
+        return bytes(self.audio[start - self.base:end - self.base])
+
+    def _schedule(self, start: int, end: int):
+        self.windows.append(asyncio.create_task(self._transcribe_window(self._segment(start, end))))
+
+    async def _transcribe_window(self, pcm: bytes) -> str:
+        for attempt in (1, 2):
+            try:
+                return await self.transcribe(pcm)
+            except Exception as e:
+                seconds = len(pcm) / 2 / self.sample_rate
+                action = "retrying" if attempt == 1 else "leaving it out"
+                print(f"Transcription of a {seconds:.1f}s streaming window failed, {action}: {e}")
+        return ""
+
+    def _trim(self, keep_from: int):
+        keep_from = max(self.base, min(keep_from, self.end))
+        del self.audio[:keep_from - self.base]
+        self.base = keep_from
+
+    async def feed(self, pcm: bytes) -> list[str]:
+        """Adds audio and returns the transcripts of any utterances that ended."""
+        self.audio += pcm
+        transcripts = []
+        for event, offset in self.vad.process(pcm):
+            if event == "start":
+                self.window_start = max(self.base, offset - self.preroll_bytes)
+            elif event == "end" and self.window_start is not None:
+                end = min(self.end, offset + self.tail_bytes)
+                self._schedule_windows(end)
+                # Skip a final window that the previous one already covered.
+                if end - self.window_start > self.overlap_bytes or not self.windows:
+                    self._schedule(self.window_start, end)
+                transcripts.append(await self._finish())
+                self.window_start = None
+                self._trim(end)
+
+        if self.window_start is not None:
+            self._schedule_windows(self.end)
+        else:
+            self._trim(self.end - self.preroll_bytes)
+        return [text for text in transcripts if text]
+
+    def _schedule_windows(self, available_end: int):
+        while available_end - self.window_start >= self.window_bytes:
+            self._schedule(self.window_start, self.window_start + self.window_bytes)
+            self.window_start += self.window_bytes - self.overlap_bytes
+        # Audio before the next window is no longer needed.
+        self._trim(self.window_start)
+
+    async def _finish(self) -> str:
+        windows, self.windows = self.windows, []
+        text = ""
+        for part in await asyncio.gather(*windows):
+            text = stitch(text, part.strip())
+        return text.strip()
+
+    def close(self):
+        for task in self.windows:
+            task.cancel()
+        self.windows = []
@@ -0,0 +1,256 @@
+import asyncio
+import io
+import time
+import wave
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from config import settings
+import metrics
+from services import groq_service
+
+SAMPLE_RATE = 16000
+# Whisper's encoder sees 30 s windows; shorter utterances can share a batch.
+MAX_BATCHED_SECONDS = 30
+
+
+class STTBackend(ABC):
+    """Speech-to-text for one complete utterance (webm, or WAV from the streaming path)."""
+
+    async def start(self) -> None:
+        """Loads models or opens connections. Called once at startup."""
+
+    @abstractmethod
+    async def transcribe(self, audio: bytes | memoryview, filename: str = "audio.webm") -> str:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class GroqSTT(STTBackend):
+    """Groq's hosted Whisper, with hedging and retries from services.upstream."""
+
+    async def transcribe(self, audio: bytes | memoryview, filename: str = "audio.webm") -> str:
+        return await groq_service.speech_to_text(audio, filename)
+
+
+class MicroBatcher:
+    """
+    Runs `run_batch` on a pool of worker threads. Requests that arrive
+    within `window` seconds of each other, or while every worker is busy,
+    are handed to the next free worker as one batch of up to `max_batch`.
+    `run_batch` returns a result or an exception for each item, so one bad
+    request only fails its own caller.
+    """
+
+    def __init__(self, run_batch: Callable[[list], list], workers: int = 2, max_batch: int = 8, window: float = 0.02):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.window = window
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stt")
+        self.workers = workers
+        self.queue: asyncio.Queue | None = None
+        self.slots: asyncio.Semaphore | None = None
+        self.dispatcher: asyncio.Task | None = None
+        self.running: set[asyncio.Task] = set()
+
+    async def submit(self, item) -> Any:
+        if self.dispatcher is None:
+            self.queue = asyncio.Queue()
+            self.slots = asyncio.Semaphore(self.workers)
+            self.dispatcher = asyncio.create_task(self._dispatch())
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((item, future))
+        return await future
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            # Wait for a worker first: while all are busy, more requests queue
+            # up and go out together.
+            await self.slots.acquire()
+            closes_at = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                remaining = closes_at - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            task = asyncio.create_task(self._run(batch))
+            self.running.add(task)
+            task.add_done_callback(self.running.discard)
+
+    async def _run(self, batch: list):
+        metrics.stt_batch_size.observe(len(batch))
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.run_batch, [item for item, _ in batch]
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        finally:
+            self.slots.release()
+
+    def close(self):
+        if self.dispatcher is not None:
+            self.dispatcher.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class LocalWhisperSTT(STTBackend):
+    """
+    CPU transcription with faster-whisper (CTranslate2, int8 by default).
+
+    The model is loaded once and shared by the worker threads; CTranslate2
+    releases the GIL, so workers decode in parallel. Concurrent utterances
+    from different sessions are encoded and decoded as one batch, which
+    costs far less than running them one by one.
+    """
+
+    def __init__(
+        self,
+        model_size: str = "base.en",
+        device: str = "cpu",
+        compute_type: str = "int8",
+        language: str = "en",
+        workers: int = 2,
+        cpu_threads: int = 0,
+        max_batch: int = 8,
+        batch_window: float = 0.02,
+    ):
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        self.language = language
+        self.workers = workers
+        self.cpu_threads = cpu_threads
+        self.model = None
+        self.tokenizer = None
+        self._loading: asyncio.Task | None = None
+        self.batcher = MicroBatcher(self._run_batch, workers=workers, max_batch=max_batch, window=batch_window)
+
+    def _load(self):
+        from faster_whisper import WhisperModel
+        from faster_whisper.tokenizer import Tokenizer
+
+        start = time.perf_counter()
+        model = WhisperModel(
+            self.model_size,
+            device=self.device,
+            compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads,
+            num_workers=self.workers,
+        )
+        self.tokenizer = Tokenizer(model.hf_tokenizer, model.model.is_multilingual, task="transcribe", language=self.language)
+        print(f"Loaded faster-whisper {self.model_size} ({self.compute_type}) in {time.perf_counter() - start:.1f}s.")
+        return model
+
+    async def start(self):
+        if self.model is None:
+            if self._loading is None:
+                self._loading = asyncio.create_task(asyncio.to_thread(self._load))
+            self.model = await self._loading
+
+    async def transcribe(self, audio: bytes | memoryview, filename: str = "audio.webm") -> str:
+        await self.start()
+        return await self.batcher.submit((bytes(audio), filename))
+
+    def _decode(self, audio: bytes, filename: str):
+        import numpy as np
+
+        if filename.endswith(".wav"):
+            with wave.open(io.BytesIO(audio)) as wav:
+                if wav.getframerate() == SAMPLE_RATE and wav.getnchannels() == 1 and wav.getsampwidth() == 2:
+                    return np.frombuffer(wav.readframes(wav.getnframes()), np.int16).astype(np.float32) / 32768.0
+        from faster_whisper import decode_audio
+
+        # Other containers (webm/opus from the browser) go through PyAV.
+        return decode_audio(io.BytesIO(audio), sampling_rate=SAMPLE_RATE)
+
+    def _transcribe_one(self, audio) -> str:
+        segments, _ = self.model.transcribe(audio, language=self.language, beam_size=1, without_timestamps=True)
+        return " ".join(segment.text.strip() for segment in segments)
+
+    def _transcribe_batch(self, audios: list) -> list[str]:
+        import numpy as np
+        from faster_whisper.audio import pad_or_trim
+
+        model = self.model
+        features = np.stack([pad_or_trim(model.feature_extractor(audio)[..., :-1]) for audio in audios])
+        encoder_output = model.encode(features)
+        prompt = model.get_prompt(self.tokenizer, [], without_timestamps=True)
+        results = model.model.generate(
+            encoder_output,
+            [prompt] * len(audios),
+            beam_size=1,
+            max_length=model.max_length,
+            suppress_blank=True,
+            suppress_tokens=[-1],
+        )
+        return [self.tokenizer.decode(result.sequences_ids[0]).strip() for result in results]
+
+    def _run_batch(self, items: list[tuple[bytes, str]]) -> list[str | Exception]:
+        audios = []
+        texts: list[str | Exception | None] = [None] * len(items)
+        for i, (audio, filename) in enumerate(items):
+            try:
+                audios.append(self._decode(audio, filename))
+            except Exception as e:
+                print(f"Could not decode {filename}: {e}")
+                audios.append(None)
+                texts[i] = e
+        short = [
+            i for i, audio in enumerate(audios) if audio is not None and len(audio) <= MAX_BATCHED_SECONDS * SAMPLE_RATE
+        ]
+        if len(short) > 1:
+            try:
+                for i, text in zip(short, self._transcribe_batch([audios[i] for i in short])):
+                    texts[i] = text
+            except Exception as e:
+                print(f"Batched transcription failed, falling back to one at a time: {e}")
+        for i, audio in enumerate(audios):
+            if texts[i] is None:
+                try:
+                    texts[i] = self._transcribe_one(audio)
+                except Exception as e:
+                    texts[i] = e
+        return texts
+
+    def close(self):
+        self.batcher.close()
+
+
+def build_stt_backend(settings) -> STTBackend:
+    if settings.stt_backend == "local":
+        return LocalWhisperSTT(
+            model_size=settings.local_stt_model,
+            device=settings.local_stt_device,
+            compute_type=settings.local_stt_compute_type,
+            language=settings.local_stt_language,
+            workers=settings.local_stt_workers,
+            cpu_threads=settings.local_stt_cpu_threads,
+            max_batch=settings.local_stt_max_batch,
+            batch_window=settings.local_stt_batch_window_ms / 1000,
+        )
+    return GroqSTT()
+
+
+stt = build_stt_backend(settings)
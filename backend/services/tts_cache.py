@@ -0,0 +1,132 @@
+import asyncio
+import hashlib
+import mmap
+import os
+from collections import OrderedDict
+
+from config import settings
+import metrics
+from services.elevenlabs_service import MODEL_ID, OUTPUT_FORMAT, VOICE_ID, stream_audio
+
+class TTSCache:
+    """
+    Synthesized audio for fixed interviewer lines, keyed by
+    (text, voice_id, model_id, output_format).
+
+    The memory tier is an LRU bounded by total bytes. The optional disk tier
+    keeps one MP3 per key and serves it through a read-only memory map, so
+    hits are sliced out of the page cache without copying.
+    """
+
+    def __init__(self, max_bytes: int, disk_dir: str | None = None, chunk_size: int = 16384):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.chunk_size = chunk_size
+        self.known_phrases: set[str] = set()
+        self._entries: OrderedDict[str, bytes | memoryview] = OrderedDict()
+        self._size = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @property
+    def size(self) -> int:
+        """Bytes held in the memory tier."""
+        return self._size
+
+    @staticmethod
+    def key(text: str, voice_id: str = VOICE_ID, model_id: str = MODEL_ID, output_format: str = OUTPUT_FORMAT) -> str:
+        return hashlib.sha256("\x00".join((text, voice_id, model_id, output_format)).encode()).hexdigest()
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.mp3")
+
+    def _remember(self, key: str, audio: bytes | memoryview):
+        if len(audio) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._size -= len(self._entries.pop(key))
+        self._entries[key] = audio
+        self._size += len(audio)
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+            metrics.tts_cache_evictions.inc()
+
+    def get(self, key: str) -> bytes | memoryview | None:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        if self.disk_dir and os.path.exists(self._disk_path(key)):
+            with open(self._disk_path(key), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                audio = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            self._remember(key, audio)
+            return audio
+        return None
+
+    def _write_disk(self, key: str, audio: bytes):
+        # Write-then-rename so a concurrent reader never maps a partial file.
+        tmp_path = self._disk_path(key) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, self._disk_path(key))
+
+    async def put(self, key: str, audio: bytes):
+        self._remember(key, audio)
+        if self.disk_dir:
+            await asyncio.to_thread(self._write_disk, key, audio)
+
+    async def stream(self, text: str):
+        """
+        Yields (stream_type, data) items, "audio" or "viseme". Cached audio is
+        streamed straight from memory; misses go to ElevenLabs and are stored
+        only for known phrases, so one-off LLM replies don't churn the cache.
+        """
+        key = self.key(text)
+        audio = self.get(key)
+        if audio is not None:
+            metrics.tts_cache_lookups.inc(1, "hit")
+            view = memoryview(audio)
+            for offset in range(0, len(view), self.chunk_size):
+                yield "audio", view[offset:offset + self.chunk_size]
+            return
+
+        metrics.tts_cache_lookups.inc(1, "miss")
+        store = text in self.known_phrases
+        chunks = []
+        try:
+            async for chunk in stream_audio(text):
+                if store:
+                    chunks.append(chunk)
+                yield "audio", chunk
+        except Exception as e:
+            print(f"Error streaming from ElevenLabs: {e}")
+            return
+        if store:
+            await self.put(key, b"".join(chunks))
+
+    async def _synthesize(self, text: str):
+        key = self.key(text)
+        if self.get(key) is not None:
+            return
+        try:
+            chunks = [chunk async for chunk in stream_audio(text)]
+        except Exception as e:
+            print(f"Error pre-warming TTS cache for {text!r}: {e}")
+            return
+        await self.put(key, b"".join(chunks))
+
+    async def prewarm(self, phrases: list[str], concurrency: int = 2):
+        """Registers the fixed phrases and synthesizes any that aren't cached yet."""
+        self.known_phrases.update(phrases)
+        slots = asyncio.Semaphore(concurrency)
+
+        async def warm(text: str):
+            async with slots:
+                await self._synthesize(text)
+
+        await asyncio.gather(*(warm(text) for text in phrases))
+        print(f"TTS cache warm: {len(self._entries)} phrases, {self._size} bytes in memory.")
+
+tts_cache = TTSCache(settings.tts_cache_max_bytes, settings.tts_cache_dir)
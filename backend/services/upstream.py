@@ -0,0 +1,265 @@
+import asyncio
+import random
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, TypeVar
+
+import httpx
+
+from config import settings
+import metrics
+
+T = TypeVar("T")
+
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, httpx.RemoteProtocolError)
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+# Monotonic time by which every upstream call in the current turn must be
+# done. Tasks created inside a deadline() block inherit it.
+_deadline: ContextVar[float | None] = ContextVar("upstream_deadline", default=None)
+
+@contextmanager
+def deadline(seconds: float):
+    """Bounds upstream calls made in this context. Nested deadlines can only shorten it."""
+    at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(at if current is None else min(current, at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def time_left() -> float | None:
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+class Limiter:
+    """
+    Caps one upstream's concurrent requests, and optionally their rate with
+    a token bucket that allows bursts of up to `burst` requests.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, requests_per_second: float = 0, burst: int | None = None):
+        self.name = name
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.rate = requests_per_second
+        self.capacity = burst or max(1, int(requests_per_second))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    async def _take_token(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    async def acquire(self):
+        start = time.perf_counter()
+        await self.slots.acquire()
+        try:
+            if self.rate:
+                await self._take_token()
+        except BaseException:
+            self.slots.release()
+            raise
+        metrics.upstream_queue_seconds.observe(time.perf_counter() - start, self.name)
+
+    def release(self):
+        self.slots.release()
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Holds the limiter slot until the response body is closed, so streamed replies count as in flight."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self.stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self.stream.aclose()
+        finally:
+            if self._release:
+                self._release()
+                self._release = None
+
+class UpstreamTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps the shared connection pool for one upstream. Each request waits
+    for a limiter slot, has its timeouts cut to the current deadline, and is
+    retried with full-jitter backoff on connection errors and retryable
+    statuses (honouring Retry-After) while the deadline allows.
+    """
+
+    def __init__(self, limiter: Limiter, inner: httpx.AsyncBaseTransport):
+        self.limiter = limiter
+        self.inner = inner
+
+    def _backoff(self, attempt: int, response: httpx.Response | None) -> float:
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), settings.upstream_backoff_cap_ms / 1000)
+            except ValueError:
+                pass
+        cap = min(settings.upstream_backoff_cap_ms, settings.upstream_backoff_base_ms * 2 ** attempt)
+        return random.uniform(0, cap / 1000)
+
+    def _apply_deadline(self, request: httpx.Request) -> float | None:
+        left = time_left()
+        if left is None:
+            return None
+        if left <= 0:
+            raise DeadlineExceeded(f"{self.limiter.name}: turn deadline passed")
+        timeout = dict(request.extensions.get("timeout", {}))
+        for key in ("connect", "read", "write", "pool"):
+            timeout[key] = left if timeout.get(key) is None else min(timeout[key], left)
+        request.extensions["timeout"] = timeout
+        return left
+
+    def _can_retry(self, attempt: int, delay: float) -> bool:
+        left = time_left()
+        return attempt < settings.upstream_max_retries and (left is None or delay < left)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # Buffer the body so the request can be replayed on retry.
+        await request.aread()
+        name = self.limiter.name
+        attempt = 0
+        while True:
+            left = self._apply_deadline(request)
+            try:
+                await asyncio.wait_for(self.limiter.acquire(), left)
+            except asyncio.TimeoutError:
+                metrics.upstream_requests.inc(1, name, "deadline")
+                raise DeadlineExceeded(f"{name}: no upstream slot before the turn deadline")
+
+            try:
+                response = await self.inner.handle_async_request(request)
+            except RETRY_ERRORS:
+                self.limiter.release()
+                delay = self._backoff(attempt, None)
+                if not self._can_retry(attempt, delay):
+                    metrics.upstream_requests.inc(1, name, "error")
+                    raise
+            except asyncio.CancelledError:
+                # Usually a barge-in cancelling the turn; not an upstream fault.
+                self.limiter.release()
+                metrics.upstream_requests.inc(1, name, "cancelled")
+                raise
+            except BaseException:
+                self.limiter.release()
+                metrics.upstream_requests.inc(1, name, "error")
+                raise
+            else:
+                delay = self._backoff(attempt, response)
+                if response.status_code not in RETRY_STATUSES or not self._can_retry(attempt, delay):
+                    outcome = "ok" if response.status_code < 400 else str(response.status_code)
+                    metrics.upstream_requests.inc(1, name, outcome)
+                    response.stream = _ReleasingStream(response.stream, self.limiter.release)
+                    return response
+                await response.aclose()
+                self.limiter.release()
+
+            metrics.upstream_retries.inc(1, name)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        # The inner pool is shared; it is closed once by aclose() below.
+        pass
+
+def _build_pool() -> httpx.AsyncBaseTransport:
+    http2 = settings.upstream_http2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print("h2 is not installed; upstream requests will use HTTP/1.1.", file=sys.stderr)
+            http2 = False
+    return httpx.AsyncHTTPTransport(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.upstream_max_connections,
+            max_keepalive_connections=settings.upstream_max_keepalive,
+        ),
+    )
+
+# One pool for every upstream: connections to the same host (STT and LLM
+# both go to Groq) are shared.
+pool = _build_pool()
+
+limiters = {
+    "stt": Limiter("stt", settings.stt_max_concurrency, settings.stt_requests_per_second),
+    "llm": Limiter("llm", settings.llm_max_concurrency, settings.llm_requests_per_second),
+    "tts": Limiter("tts", settings.tts_max_concurrency, settings.tts_requests_per_second),
+}
+
+timeout = httpx.Timeout(settings.upstream_read_timeout, connect=settings.upstream_connect_timeout)
+
+def client(upstream: str) -> httpx.AsyncClient:
+    """An httpx client for an SDK to use, limited and retried as `upstream`."""
+    return httpx.AsyncClient(transport=UpstreamTransport(limiters[upstream], pool), timeout=timeout)
+
+async def hedged(attempts: list[Callable[[], Awaitable[T]]], hedge_after: float, upstream: str) -> T:
+    """
+    Runs attempts[0], and starts the next attempt when everything running
+    has failed, or when nothing has succeeded within `hedge_after` seconds
+    (0 disables hedging on slowness). A slow attempt is only hedged while
+    the upstream has a free slot; otherwise the backup would just queue
+    behind it. The first success wins; the rest are cancelled.
+    """
+    limiter = limiters[upstream]
+    waiting = list(attempts)
+    running: set[asyncio.Task] = set()
+    last_error: BaseException | None = None
+    running.add(asyncio.create_task(waiting.pop(0)()))
+    try:
+        while running:
+            timeout = hedge_after if waiting and hedge_after > 0 else None
+            done, running = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                last_error = task.exception()
+            if waiting and (not running or (not done and not limiter.slots.locked())):
+                metrics.upstream_hedges.inc(1, upstream)
+                running.add(asyncio.create_task(waiting.pop(0)()))
+        raise last_error
+    finally:
+        for task in running:
+            task.cancel()
+
+async def prewarm(urls: list[str]):
+    """
+    Opens a pooled connection to each upstream host, so the first turn
+    doesn't pay for DNS, TCP and TLS. Any response, even an error status,
+    leaves a warm connection behind.
+    """
+    async def connect(url: str):
+        try:
+            response = await pool.handle_async_request(
+                httpx.Request("HEAD", url, extensions={"timeout": timeout.as_dict()})
+            )
+            # An unread response would close the connection instead of pooling it.
+            await response.aread()
+            await response.aclose()
+        except Exception as e:
+            print(f"Could not pre-connect to {url}: {e}")
+
+    await asyncio.gather(*(connect(url) for url in dict.fromkeys(urls)))
+
+async def aclose():
+    await pool.aclose()
@@ -0,0 +1,33 @@
+import asyncio
+
+import fakeredis
+
+from connection_registry import RedisRegistry
+
+
+def test_malformed_relayed_frame_is_skipped():
+    async def run():
+        server = fakeredis.FakeServer()
+        receiver = RedisRegistry(fakeredis.FakeAsyncRedis(server=server))
+        sender = RedisRegistry(fakeredis.FakeAsyncRedis(server=server))
+        delivered = []
+
+        async def deliver(client_id, kind, payload):
+            delivered.append((client_id, kind, payload))
+
+        await receiver.start(deliver)
+        await sender.start(deliver)
+        await receiver.register("client")
+        channel = receiver._channel(receiver.worker_id)
+        for junk in (b"", b"\x07client\0payload", b"\x01no separator", b"\x01\xff\xfe\0payload"):
+            await sender.client.publish(channel, junk)
+        assert await sender.forward("client", "control", b"hello")
+        for _ in range(100):
+            if delivered:
+                break
+            await asyncio.sleep(0.01)
+        assert delivered == [("client", "control", b"hello")]
+        await receiver.close()
+        await sender.close()
+
+    asyncio.run(run())
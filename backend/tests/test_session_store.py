@@ -0,0 +1,110 @@
+import asyncio
+import os
+
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("ELEVENLABS_API_KEY", "test")
+
+import fakeredis
+
+from interview_flow.session_store import InMemorySessionStore, RedisSessionStore, dump_session, load_session
+from models.session import InterviewPhase, InterviewSession
+
+
+def make_session() -> InterviewSession:
+    session = InterviewSession(phase=InterviewPhase.TECHNICAL, skills=["Go", "SQL"], target_role="Backend Engineer")
+    session.resume_text = "Ten years of distributed systems."
+    session.chat_memory.summary = "The candidate built a payments service."
+    for i in range(8):
+        session.chat_memory.save_context({"input": f"answer {i}"}, {"output": f"question {i}"})
+    return session
+
+
+def assert_same(restored: InterviewSession, session: InterviewSession):
+    assert restored.interview_id == session.interview_id
+    assert restored.phase == session.phase
+    assert restored.skills == session.skills
+    assert restored.target_role == session.target_role
+    assert restored.resume_text == session.resume_text
+    memory, expected = restored.chat_memory, session.chat_memory
+    assert memory.summary == expected.summary
+    assert [(m.type, m.content) for m in memory.pending] == [(m.type, m.content) for m in expected.pending]
+    assert [(m.type, m.content) for m in memory.chat_memory.messages] == [
+        (m.type, m.content) for m in expected.chat_memory.messages
+    ]
+
+
+def test_dump_load_round_trip():
+    session = make_session()
+    assert session.chat_memory.pending, "the fixture should exercise both halves of the memory"
+    assert_same(load_session(dump_session(session)), session)
+
+
+def test_redis_store_round_trip():
+    async def run():
+        store = RedisSessionStore(fakeredis.FakeAsyncRedis(), idle_ttl=60)
+        session = make_session()
+        await store.set("client", session)
+        assert_same(await store.get("client"), session)
+        assert await store.count() == 1
+        await store.delete("client")
+        assert await store.get("client") is None
+        assert await store.count() == 0
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_redis_store_ttl():
+    async def run():
+        client = fakeredis.FakeAsyncRedis()
+        store = RedisSessionStore(client, idle_ttl=60)
+        await store.set("client", make_session())
+        key = store.prefix + "client"
+        assert 55 < await client.ttl(key) <= 60
+
+        # Reading a session makes it active again.
+        await client.expire(key, 5)
+        assert await store.get("client") is not None
+        assert await client.ttl(key) > 5
+
+        short = RedisSessionStore(client, idle_ttl=1, prefix="short:")
+        await short.set("idle", make_session())
+        assert await short.count() == 1
+        await asyncio.sleep(1.5)
+        assert await short.get("idle") is None
+        assert await short.count() == 0
+        # The other store's session is untouched.
+        assert await store.count() == 1
+        await store.close()
+
+    asyncio.run(run())
+
+
+def test_memory_store_evicts_least_recently_used():
+    async def run():
+        store = InMemorySessionStore(max_sessions=2)
+        for client_id in ("a", "b"):
+            await store.set(client_id, make_session())
+        # Reading "a" makes "b" the least recently used.
+        assert await store.get("a") is not None
+        await store.set("c", make_session())
+        assert await store.count() == 2
+        assert await store.get("b") is None
+        assert await store.get("a") is not None
+        assert await store.get("c") is not None
+
+    asyncio.run(run())
+
+
+def test_memory_store_ttl():
+    async def run():
+        store = InMemorySessionStore(idle_ttl=0.2)
+        await store.set("idle", make_session())
+        await store.set("active", make_session())
+        for _ in range(3):
+            await asyncio.sleep(0.1)
+            assert await store.get("active") is not None
+        assert await store.get("idle") is None
+        assert await store.count() == 1
+
+    asyncio.run(run())
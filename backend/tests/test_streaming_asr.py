@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fixtures import SPEECH_SAMPLE_RATE, decode_tone_speech, make_tone_speech
+from services.streaming_asr import StreamingTranscriber, stitch
+from services.vad import EnergyVAD
+
+SCRIPT = (
+    "i have spent five years building backend services in python and go mostly on payments where latency "
+    "and reliability matter a lot"
+)
+FRAME_BYTES = SPEECH_SAMPLE_RATE * 40 // 1000 * 2
+
+
+async def instant(pcm: bytes) -> str:
+    return decode_tone_speech(pcm)
+
+
+def transcribe_stream(pcm: bytes, transcribe=instant, **kwargs) -> tuple[list[str], list[int]]:
+    """Feeds `pcm` in 40 ms frames; returns the transcripts and the lengths of the windows sent."""
+    windows = []
+
+    async def recording(window: bytes) -> str:
+        windows.append(len(window))
+        return await transcribe(window)
+
+    async def run():
+        streaming = StreamingTranscriber(recording, vad=EnergyVAD(end_silence_ms=600), **kwargs)
+        transcripts = []
+        for offset in range(0, len(pcm), FRAME_BYTES):
+            transcripts.extend(await streaming.feed(pcm[offset:offset + FRAME_BYTES]))
+        streaming.close()
+        return transcripts
+
+    return asyncio.run(run()), windows
+
+
+def test_stitch_drops_a_word_cut_at_the_window_boundary():
+    # The first window heard "backend" cut short and got it wrong; the next
+    # one, overlapping it, heard it whole.
+    previous = "i have spent five years building bag"
+    new = "years building backend services"
+    assert stitch(previous, new) == "i have spent five years building backend services"
+
+
+def test_stitch_without_overlap_concatenates():
+    assert stitch("i have spent", "five years") == "i have spent five years"
+    assert stitch("", "five years") == "five years"
+    assert stitch("i have spent", "") == "i have spent"
+
+
+@pytest.mark.parametrize("window_s, overlap_s", [(4.0, 0.75), (2.0, 0.5), (1.5, 0.6), (3.1, 0.45)])
+def test_stitched_transcript_matches_the_script(window_s, overlap_s):
+    pcm = make_tone_speech(SCRIPT.split())
+    transcripts, windows = transcribe_stream(pcm, window_s=window_s, overlap_s=overlap_s)
+    assert len(windows) > 1, "the utterance should span several windows"
+    assert transcripts == [SCRIPT]
+
+
+def test_utterances_are_transcribed_separately():
+    first, second = SCRIPT.split()[:7], SCRIPT.split()[7:]
+    pcm = make_tone_speech(first, seed=1) + make_tone_speech(second, seed=2)
+    transcripts, _ = transcribe_stream(pcm, window_s=2.0, overlap_s=0.5)
+    assert transcripts == [" ".join(first), " ".join(second)]
+
+
+def test_failed_window_is_retried():
+    failures = [RuntimeError("upstream error")]
+
+    async def flaky(pcm: bytes) -> str:
+        if failures:
+            raise failures.pop()
+        return decode_tone_speech(pcm)
+
+    pcm = make_tone_speech(SCRIPT.split())
+    transcripts, windows = transcribe_stream(pcm, flaky, window_s=2.0, overlap_s=0.5)
+    assert transcripts == [SCRIPT]
+    # The first window was sent twice.
+    assert not failures and windows[0] == windows[1]
+
+
+def test_window_that_keeps_failing_is_left_out():
+    async def fails_on_backend(pcm: bytes) -> str:
+        text = decode_tone_speech(pcm)
+        if "backend" in text.split():
+            raise TimeoutError("upstream timed out")
+        return text
+
+    pcm = make_tone_speech(SCRIPT.split())
+    transcripts, _ = transcribe_stream(pcm, fails_on_backend, window_s=2.0, overlap_s=0.5)
+    assert len(transcripts) == 1
+    words = transcripts[0].split()
+    assert "backend" not in words
+    assert words[:3] == SCRIPT.split()[:3]
+    assert words[-3:] == SCRIPT.split()[-3:]
@@ -0,0 +1,78 @@
+import asyncio
+import io
+import os
+import wave
+
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("ELEVENLABS_API_KEY", "test")
+
+import pytest
+
+from services.stt import SAMPLE_RATE, LocalWhisperSTT
+
+
+def wav(seconds: float) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(b"\0\0" * int(seconds * SAMPLE_RATE))
+    return buffer.getvalue()
+
+
+class StubWhisper(LocalWhisperSTT):
+    """Decodes for real; "transcribes" each utterance to its length in samples."""
+
+    def __init__(self, fail_batch: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.model = object()
+        self.fail_batch = fail_batch
+        self.batches: list[int] = []
+
+    def _transcribe_batch(self, audios: list) -> list[str]:
+        self.batches.append(len(audios))
+        if self.fail_batch:
+            raise RuntimeError("batch failed")
+        return [str(len(audio)) for audio in audios]
+
+    def _transcribe_one(self, audio) -> str:
+        if len(audio) == SAMPLE_RATE:
+            raise RuntimeError("model failed")
+        return str(len(audio))
+
+
+def test_bad_utterance_fails_only_its_own_request():
+    async def run():
+        stt = StubWhisper(workers=1, max_batch=8, batch_window=0.05)
+        results = await asyncio.gather(
+            stt.transcribe(wav(0.5), "a.wav"),
+            stt.transcribe(b"not a wav file", "b.wav"),
+            stt.transcribe(wav(0.25), "c.wav"),
+            return_exceptions=True,
+        )
+        stt.close()
+        return stt, results
+
+    stt, (good, bad, other) = asyncio.run(run())
+    assert stt.batches == [2]
+    assert good == str(SAMPLE_RATE // 2)
+    assert other == str(SAMPLE_RATE // 4)
+    assert isinstance(bad, Exception)
+
+
+def test_failed_batch_falls_back_per_utterance():
+    async def run():
+        stt = StubWhisper(fail_batch=True, workers=1, max_batch=8, batch_window=0.05)
+        results = await asyncio.gather(
+            stt.transcribe(wav(0.5), "a.wav"),
+            stt.transcribe(wav(1), "b.wav"),
+            return_exceptions=True,
+        )
+        stt.close()
+        return results
+
+    good, bad = asyncio.run(run())
+    assert good == str(SAMPLE_RATE // 2)
+    with pytest.raises(RuntimeError, match="model failed"):
+        raise bad
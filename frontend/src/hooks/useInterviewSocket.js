@@ -171,6 +171,17 @@ export const useInterviewSocket = () => {
                     if (message.type === 'transcript') {
                         setTranscript(prev => [...prev, message.data]);
                     }
+                    else if (message.type === 'flush') {
+                        // The server cancelled the reply (barge-in): drop anything not yet played.
+                        audioQueue.current = [];
+                        visemeQueue.current = [];
+                        audioPlayerRef.current.pause();
+                        isPlaying.current = false;
+                    }
+                    else if (message.type === 'session_expired') {
+                        // The server lost the interview; it closes the socket next.
+                        setStatus('Session expired. Please start a new interview.');
+                    }
                     else if (message.type === 'viseme') {
                         const { viseme, offset } = message.data;
                         visemeQueue.current.push({ viseme, offset });